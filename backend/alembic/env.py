@@ -5,7 +5,7 @@ from sqlalchemy import pool
 
 from alembic import context
 from app.db import DATABASE_URL
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.compiler import compiles
 
 
@@ -27,6 +27,10 @@ from app.models.models import Base
 @compiles(JSONB, "sqlite")
 def compile_jsonb_sqlite(type_, compiler, **kw):
     return "JSON"
+# "UUID" would get NUMERIC affinity in SQLite and mangle hex ids that look like numbers
+@compiles(UUID, "sqlite")
+def compile_uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
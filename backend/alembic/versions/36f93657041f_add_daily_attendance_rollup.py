@@ -0,0 +1,51 @@
+"""add daily attendance rollup
+
+Revision ID: 36f93657041f
+Revises: d6502edee549
+Create Date: 2026-10-18 19:26:41.208514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '36f93657041f'
+down_revision: Union[str, Sequence[str], None] = 'd6502edee549'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_attendance_rollup',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('event_id', sa.UUID(), nullable=False),
+    sa.Column('membership_type', sa.String(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('members', sa.Integer(), nullable=False),
+    sa.Column('guests', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.PrimaryKeyConstraint('day', 'event_id', 'membership_type', 'kind')
+    )
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('row_version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    if op.get_bind().dialect.name == "postgresql":
+        # Build without blocking inserts from the door scanners
+        with op.get_context().autocommit_block():
+            op.create_index('ix_scans_row_version', 'scans', ['row_version'],
+                            unique=False, postgresql_concurrently=True)
+    else:
+        op.create_index('ix_scans_row_version', 'scans', ['row_version'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_scans_row_version', table_name='scans')
+    op.drop_table('rollup_watermarks')
+    op.drop_table('daily_attendance_rollup')
@@ -0,0 +1,32 @@
+"""add row_version to pass_status
+
+Revision ID: 5b1e7c9a4f20
+Revises: 36f93657041f
+Create Date: 2026-10-19 09:12:36.581904
+
+Existing rows get row_version 0: their verdicts are part of every full door
+pack, and later changes bump them into deltas.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e7c9a4f20'
+down_revision: Union[str, Sequence[str], None] = '36f93657041f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('pass_status', sa.Column('row_version', sa.BigInteger(), server_default='0', nullable=False))
+    op.create_index(op.f('ix_pass_status_row_version'), 'pass_status', ['row_version'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_pass_status_row_version'), table_name='pass_status')
+    op.drop_column('pass_status', 'row_version')
@@ -0,0 +1,48 @@
+"""unique scan per event, pass and mode
+
+Revision ID: 836e56d2cfe2
+Revises: d9d46d7d17df
+Create Date: 2026-10-18 10:02:47.918320
+
+Fails with a list of offending rows if `scans` already holds duplicates; resolve
+those (then run `python -m app.cli backfill-counters`) before upgrading.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '836e56d2cfe2'
+down_revision: Union[str, Sequence[str], None] = 'd9d46d7d17df'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not op.get_context().as_sql:  # can't inspect data when generating offline SQL
+        duplicates = op.get_bind().execute(sa.text(
+            "SELECT event_id, pass_id, mode, count(*) FROM scans "
+            "GROUP BY event_id, pass_id, mode HAVING count(*) > 1"
+        )).fetchall()
+        if duplicates:
+            listing = "\n".join(f"  event={e} pass={p} mode={m} rows={n}" for e, p, m, n in duplicates[:20])
+            raise RuntimeError(
+                f"{len(duplicates)} duplicate (event_id, pass_id, mode) groups in scans; "
+                f"remove them before creating the unique index:\n{listing}"
+            )
+
+    if op.get_bind().dialect.name == "postgresql":
+        # Build without blocking inserts from the door scanners
+        with op.get_context().autocommit_block():
+            op.create_index('uq_scans_event_id_pass_id_mode', 'scans', ['event_id', 'pass_id', 'mode'],
+                            unique=True, postgresql_concurrently=True)
+    else:
+        op.create_index('uq_scans_event_id_pass_id_mode', 'scans', ['event_id', 'pass_id', 'mode'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_scans_event_id_pass_id_mode', table_name='scans')
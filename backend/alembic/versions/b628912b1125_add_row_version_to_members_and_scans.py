@@ -0,0 +1,46 @@
+"""add row_version to members and scans
+
+Revision ID: b628912b1125
+Revises: 836e56d2cfe2
+Create Date: 2026-10-18 11:26:40.204117
+
+Existing rows get row_version 0, so they are part of every full door pack but
+never of a delta.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b628912b1125'
+down_revision: Union[str, Sequence[str], None] = '836e56d2cfe2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('members', sa.Column('row_version', sa.BigInteger(), server_default='0', nullable=False))
+    op.create_index(op.f('ix_members_row_version'), 'members', ['row_version'], unique=False)
+    op.add_column('scans', sa.Column('row_version', sa.BigInteger(), server_default='0', nullable=False))
+    if op.get_bind().dialect.name == "postgresql":
+        # Build without blocking inserts from the door scanners
+        with op.get_context().autocommit_block():
+            op.create_index('ix_scans_event_id_row_version', 'scans', ['event_id', 'row_version'],
+                            unique=False, postgresql_concurrently=True)
+    else:
+        op.create_index('ix_scans_event_id_row_version', 'scans', ['event_id', 'row_version'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_scans_event_id_row_version', table_name='scans', postgresql_concurrently=True)
+    else:
+        op.drop_index('ix_scans_event_id_row_version', table_name='scans')
+    op.drop_column('scans', 'row_version')
+    op.drop_index(op.f('ix_members_row_version'), table_name='members')
+    op.drop_column('members', 'row_version')
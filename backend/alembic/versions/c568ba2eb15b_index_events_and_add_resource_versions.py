@@ -0,0 +1,36 @@
+"""index events for keyset pagination and add resource_versions
+
+Revision ID: c568ba2eb15b
+Revises: b628912b1125
+Create Date: 2026-10-18 12:14:09.337560
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c568ba2eb15b'
+down_revision: Union[str, Sequence[str], None] = 'b628912b1125'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('resource_versions',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_index('ix_events_starts_at_id', 'events', ['starts_at', 'id'], unique=False)
+    op.create_index('ix_events_ends_at', 'events', ['ends_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_ends_at', table_name='events')
+    op.drop_index('ix_events_starts_at_id', table_name='events')
+    op.drop_table('resource_versions')
@@ -0,0 +1,41 @@
+"""add passkit outage policy
+
+Revision ID: d4d0ded79694
+Revises: 94591356c083
+Create Date: 2026-10-18 15:12:08.431907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4d0ded79694'
+down_revision: Union[str, Sequence[str], None] = '94591356c083'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('passkit_outage_policy', sa.String(), server_default='reject', nullable=False))
+    deferred = sa.text("validation_reason = 'deferred'")
+    if op.get_bind().dialect.name == "postgresql":
+        # Build without blocking inserts from the door scanners
+        with op.get_context().autocommit_block():
+            op.create_index('ix_scans_deferred', 'scans', ['scanned_at'], unique=False,
+                            postgresql_where=deferred, postgresql_concurrently=True)
+    else:
+        op.create_index('ix_scans_deferred', 'scans', ['scanned_at'], unique=False, sqlite_where=deferred)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_scans_deferred', table_name='scans', postgresql_concurrently=True)
+    else:
+        op.drop_index('ix_scans_deferred', table_name='scans')
+    op.drop_column('events', 'passkit_outage_policy')
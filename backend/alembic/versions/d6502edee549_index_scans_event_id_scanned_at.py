@@ -0,0 +1,34 @@
+"""index scans event_id scanned_at
+
+Revision ID: d6502edee549
+Revises: d4d0ded79694
+Create Date: 2026-10-18 18:40:12.517203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6502edee549'
+down_revision: Union[str, Sequence[str], None] = 'd4d0ded79694'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        # Build without blocking inserts from the door scanners
+        with op.get_context().autocommit_block():
+            op.create_index('ix_scans_event_id_scanned_at', 'scans', ['event_id', 'scanned_at'],
+                            unique=False, postgresql_concurrently=True)
+    else:
+        op.create_index('ix_scans_event_id_scanned_at', 'scans', ['event_id', 'scanned_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_scans_event_id_scanned_at', table_name='scans')
@@ -0,0 +1,58 @@
+"""add event attendance counters
+
+Revision ID: d9d46d7d17df
+Revises: d6c85225e85a
+Create Date: 2026-10-18 09:12:04.511203
+
+Counters for existing scans are filled in by the migration itself, with the
+labels of app/services/attendance.py (member's type, else the PassKit
+payload's member_type, else "Unknown"). `python -m app.cli backfill-counters`
+rebuilds them later if they drift.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9d46d7d17df'
+down_revision: Union[str, Sequence[str], None] = 'd6c85225e85a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('event_attendance_counters',
+    sa.Column('event_id', sa.UUID(), nullable=False),
+    sa.Column('membership_type', sa.String(), nullable=False),
+    sa.Column('members', sa.Integer(), nullable=False),
+    sa.Column('guests', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.PrimaryKeyConstraint('event_id', 'membership_type')
+    )
+
+    # members.membership_type stores the enum name; counters use its value
+    member_types = " ".join(
+        f"WHEN '{name}' THEN '{value}'"
+        for name, value in (("FAMILY", "Family"), ("PATRON", "Patron"), ("LIFE", "Life"), ("INDIVIDUAL", "Individual"))
+    )
+    if op.get_context().dialect.name == "postgresql":
+        payload_type = "s.passkit_payload ->> 'member_type'"
+    else:
+        payload_type = "json_extract(s.passkit_payload, '$.member_type')"
+    op.execute(
+        "INSERT INTO event_attendance_counters (event_id, membership_type, members, guests) "
+        "SELECT event_id, label, count(*), coalesce(sum(guests), 0) FROM ("
+        f"  SELECT s.event_id, CASE m.membership_type {member_types} "
+        f"    ELSE coalesce({payload_type}, 'Unknown') END AS label, s.guests"
+        "  FROM scans s LEFT JOIN members m ON m.id = s.member_id"
+        "  WHERE s.mode = 'in'"
+        ") labeled GROUP BY event_id, label"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('event_attendance_counters')
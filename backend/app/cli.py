@@ -0,0 +1,115 @@
+"""
+Operational commands.
+
+    cd backend
+    python -m app.cli backfill-counters [--event-id UUID]
+    python -m app.cli check-counters [--event-id UUID]
+    python -m app.cli import-roster PATH   # "-" reads stdin
+    python -m app.cli prefetch-passes [--all]
+    python -m app.cli rollup-attendance [--rebuild]
+"""
+import argparse
+import asyncio
+import sys
+from uuid import UUID
+
+from app.db import SessionLocal
+from app.services import attendance, pass_prefetch, passkit, rollup, roster
+
+
+def backfill_counters(args) -> int:
+    with SessionLocal() as db:
+        rows = attendance.backfill_counters(db, args.event_id)
+    print(f"Rebuilt {rows} attendance counter rows")
+    return 0
+
+
+def check_counters(args) -> int:
+    with SessionLocal() as db:
+        drift = attendance.check_counters(db, args.event_id)
+    for d in drift:
+        print(
+            f"{d.event_id} {d.membership_type}: "
+            f"scans say members={d.expected[0]} guests={d.expected[1]}, "
+            f"counters say members={d.actual[0]} guests={d.actual[1]}"
+        )
+    print("Counters consistent" if not drift else f"{len(drift)} counter rows drifted")
+    return 1 if drift else 0
+
+
+def import_roster(args) -> int:
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8-sig", newline="")
+    try:
+        with SessionLocal() as db:
+            result = roster.import_roster(db, source)
+    except roster.RosterFormatError as e:
+        print(f"Cannot import {args.path}: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    for error in result.errors:
+        print(f"line {error.line}: {error.reason}", file=sys.stderr)
+    print(
+        f"Imported roster: {result.inserted} inserted, {result.updated} updated, "
+        f"{result.unchanged} unchanged, {result.rejected} rejected"
+    )
+    return 1 if result.rejected else 0
+
+
+def prefetch_passes(args) -> int:
+    async def run():
+        try:
+            return await pass_prefetch.prefetch_pass_statuses(refresh_all=args.all)
+        finally:
+            await passkit.close_passkit_async_client()
+
+    result = asyncio.run(run())
+    print(
+        f"Checked {result.checked} passes: {result.valid} valid, "
+        f"{result.invalid} invalid, {result.failed} failed"
+    )
+    return 1 if result.failed else 0
+
+
+def rollup_attendance(args) -> int:
+    with SessionLocal() as db:
+        result = rollup.rebuild_rollup(db) if args.rebuild else rollup.update_rollup(db)
+    print(f"Rolled up {result.groups} event days into {result.rows} rows (watermark {result.watermark})")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("backfill-counters", help="rebuild event_attendance_counters from scans")
+    cmd.add_argument("--event-id", type=UUID, default=None)
+    cmd.set_defaults(func=backfill_counters)
+
+    cmd = commands.add_parser("check-counters", help="report drift between counters and scans")
+    cmd.add_argument("--event-id", type=UUID, default=None)
+    cmd.set_defaults(func=check_counters)
+
+    cmd = commands.add_parser("import-roster", help="upsert members from a roster CSV")
+    cmd.add_argument("path", help="CSV with pass_id,full_name,email,membership_type columns, or - for stdin")
+    cmd.set_defaults(func=import_roster)
+
+    cmd = commands.add_parser("prefetch-passes", help="validate member passes into pass_status ahead of an event")
+    cmd.add_argument("--all", action="store_true", help="recheck every pass, not only missing or aging ones")
+    cmd.set_defaults(func=prefetch_passes)
+
+    cmd = commands.add_parser("rollup-attendance", help="bring daily_attendance_rollup up to date with scans")
+    cmd.add_argument("--rebuild", action="store_true", help="recompute every day, not only changed ones")
+    cmd.set_defaults(func=rollup_attendance)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
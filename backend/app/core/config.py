@@ -7,3 +7,69 @@ MEMBERSHIP_GUEST_LIMITS = {
     "COUPLES": 1,     # 1 member + 1 guest
     "PATRON": 0       # or adjust if they get more
 }
+
+import os
+
+# Batch scan uploads (POST /scan/batch) from scanners replaying an offline queue
+SCAN_BATCH_MAX_ITEMS = int(os.getenv("SCAN_BATCH_MAX_ITEMS", "200"))
+SCAN_BATCH_PASSKIT_CONCURRENCY = int(os.getenv("SCAN_BATCH_PASSKIT_CONCURRENCY", "8"))
+
+# Live dashboard stream (GET /dashboard/events/{event_id}/stream)
+DASHBOARD_STREAM_INTERVAL_SECONDS = float(os.getenv("DASHBOARD_STREAM_INTERVAL_SECONDS", "1.0"))
+DASHBOARD_STREAM_QUEUE_SIZE = int(os.getenv("DASHBOARD_STREAM_QUEUE_SIZE", "8"))
+DASHBOARD_STREAM_KEEPALIVE_SECONDS = float(os.getenv("DASHBOARD_STREAM_KEEPALIVE_SECONDS", "15"))
+
+# In-memory admitted-pass index used to reject repeat scans before touching the DB
+ADMITTED_INDEX_MAX_EVENTS = int(os.getenv("ADMITTED_INDEX_MAX_EVENTS", "50"))
+ADMITTED_INDEX_END_GRACE_SECONDS = int(os.getenv("ADMITTED_INDEX_END_GRACE_SECONDS", "3600"))
+
+# pass_id -> member cache used when a scan omits member_id
+MEMBER_CACHE_TTL_SECONDS = float(os.getenv("MEMBER_CACHE_TTL_SECONDS", "600"))
+MEMBER_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("MEMBER_CACHE_NEGATIVE_TTL_SECONDS", "60"))
+MEMBER_CACHE_MAX_SIZE = int(os.getenv("MEMBER_CACHE_MAX_SIZE", "100000"))
+
+# Offline door pack: rows changed this long before a device's `since` version are resent
+DOOR_PACK_SYNC_OVERLAP_SECONDS = int(os.getenv("DOOR_PACK_SYNC_OVERLAP_SECONDS", "30"))
+
+# GET /events page size
+EVENTS_PAGE_DEFAULT_LIMIT = int(os.getenv("EVENTS_PAGE_DEFAULT_LIMIT", "100"))
+EVENTS_PAGE_MAX_LIMIT = int(os.getenv("EVENTS_PAGE_MAX_LIMIT", "500"))
+
+# Scan export: rows fetched per server-side cursor batch, and approximate size of streamed chunks
+EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "1000"))
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", "65536"))
+
+# Member roster import: rows validated and written per batch, and rejected rows echoed back
+ROSTER_IMPORT_CHUNK_SIZE = int(os.getenv("ROSTER_IMPORT_CHUNK_SIZE", "500"))
+ROSTER_IMPORT_MAX_ERRORS = int(os.getenv("ROSTER_IMPORT_MAX_ERRORS", "100"))
+ROSTER_UPLOAD_SPOOL_BYTES = int(os.getenv("ROSTER_UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+
+# Pre-event PassKit prefetch into pass_status
+PASS_PREFETCH_CONCURRENCY = int(os.getenv("PASS_PREFETCH_CONCURRENCY", "8"))
+PASS_PREFETCH_RATE_PER_SECOND = float(os.getenv("PASS_PREFETCH_RATE_PER_SECOND", "20"))
+PASS_PREFETCH_BATCH_SIZE = int(os.getenv("PASS_PREFETCH_BATCH_SIZE", "500"))
+
+# Re-validation of scans admitted as "deferred" while PassKit was unavailable
+REVALIDATE_INTERVAL_SECONDS = float(os.getenv("REVALIDATE_INTERVAL_SECONDS", "30"))
+REVALIDATE_BATCH_SIZE = int(os.getenv("REVALIDATE_BATCH_SIZE", "200"))
+
+# Optional write-behind for POST /scan/: scans are journaled, acknowledged and written in group commits
+SCAN_WRITE_BEHIND = os.getenv("SCAN_WRITE_BEHIND", "0") == "1"
+SCAN_WRITE_BEHIND_BATCH_SIZE = int(os.getenv("SCAN_WRITE_BEHIND_BATCH_SIZE", "200"))
+SCAN_WRITE_BEHIND_FLUSH_MS = float(os.getenv("SCAN_WRITE_BEHIND_FLUSH_MS", "50"))
+SCAN_WRITE_BEHIND_QUEUE_SIZE = int(os.getenv("SCAN_WRITE_BEHIND_QUEUE_SIZE", "10000"))
+SCAN_JOURNAL_PATH = os.getenv("SCAN_JOURNAL_PATH", "./scan-journal/scans.ndjson")
+# fsync journal appends before acknowledging (survives power loss); 0 only survives a process crash
+SCAN_JOURNAL_FSYNC = os.getenv("SCAN_JOURNAL_FSYNC", "1") == "1"
+
+# Per-request SQL statement budgets (app/services/query_budget.py)
+QUERY_BUDGET_WARNINGS = os.getenv("QUERY_BUDGET_WARNINGS", "0") == "1"
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "3"))
+
+# Dashboard arrival curve: buckets closed this long after they end are cached per process
+ARRIVALS_CLOSE_GRACE_SECONDS = int(os.getenv("ARRIVALS_CLOSE_GRACE_SECONDS", "60"))
+ARRIVALS_CACHE_MAX_ENTRIES = int(os.getenv("ARRIVALS_CACHE_MAX_ENTRIES", "256"))
+
+# Daily attendance rollup for season reports: job interval, and how far before its watermark it re-reads
+ATTENDANCE_ROLLUP_INTERVAL_SECONDS = float(os.getenv("ATTENDANCE_ROLLUP_INTERVAL_SECONDS", "300"))
+ATTENDANCE_ROLLUP_OVERLAP_SECONDS = int(os.getenv("ATTENDANCE_ROLLUP_OVERLAP_SECONDS", "30"))
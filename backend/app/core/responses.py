@@ -0,0 +1,39 @@
+"""
+orjson-backed JSON responses.
+
+ORJSONResponse is the app's default response class. It also accepts pydantic
+models (alone, in lists or in dicts), so an endpoint that already holds its
+validated response models can return `ORJSONResponse(model)` directly. FastAPI
+passes returned Response objects through untouched, which skips its
+response_model round trip (dump, re-validate, jsonable_encoder, json.dumps);
+the route's `response_model` still documents the schema.
+
+Output matches pydantic's JSON mode for the types the schemas use: UUIDs as
+strings, datetimes in ISO 8601 with UTC as "Z", enums by value.
+"""
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        # model_dump() in Python mode (orjson handles UUIDs and datetimes natively),
+        # minus its per-call argument handling, which adds up over a page of rows
+        return value.__pydantic_serializer__.to_python(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,6 +1,13 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, DateTime
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.concurrency import run_in_threadpool
 import os
+import threading
+import time
 
 # Load environment variables from .env (for local dev)
 from dotenv import load_dotenv
@@ -17,8 +24,40 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+def naive_utc(value: datetime | None) -> datetime | None:
+    """Convert an aware datetime to UTC and strip it, as `UTCDateTime` columns store it."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+class UTCDateTime(TypeDecorator):
+    """
+    Naive-UTC timestamp column. Aware datetimes are converted to UTC and stripped
+    before binding: asyncpg refuses aware values for TIMESTAMP WITHOUT TIME ZONE.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return naive_utc(value)
+
+_row_version_lock = threading.Lock()
+_last_row_version = 0
+
+def next_row_version() -> int:
+    """
+    Change-tracking stamp for `row_version` columns: microseconds since the epoch,
+    bumped past the previous value so it is strictly increasing within a process.
+    Clients syncing on it (the door pack) re-read a small overlap window to cover
+    in-flight transactions and clock skew between workers.
+    """
+    global _last_row_version
+    with _row_version_lock:
+        _last_row_version = max(time.time_ns() // 1000, _last_row_version + 1)
+        return _last_row_version
+
 class Base(DeclarativeBase):
-    pass
+    type_annotation_map = {datetime: UTCDateTime()}
 
 # ✅ Single shared DB dependency for FastAPI + tests
 def get_db():
@@ -27,3 +66,80 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def dialect_insert(db, model):
+    """`INSERT` construct with ON CONFLICT support for the session's (or connection's) dialect."""
+    bind = db.get_bind() if isinstance(db, Session) else db
+    if bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
+# ----------------------------
+# Async engine (opt-in with ASYNC_DB=1)
+# ----------------------------
+def to_async_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching async driver."""
+    if url.startswith("sqlite+aiosqlite") or url.startswith("postgresql+asyncpg"):
+        return url
+    if url.startswith("sqlite"):
+        return "sqlite+aiosqlite" + url[url.index(":"):]
+    if url.startswith("postgresql") or url.startswith("postgres"):
+        return "postgresql+asyncpg" + url[url.index(":"):]
+    raise ValueError(f"No async driver known for {url!r}; set ASYNC_DATABASE_URL")
+
+ASYNC_DB_ENABLED = os.getenv("ASYNC_DB", "0") == "1"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+def get_async_engine():
+    """Create the async engine on first use so the async driver is only needed when enabled."""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL)
+        _AsyncSessionLocal = async_sessionmaker(bind=_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+async def dispose_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
+
+# Dependency used by the routers: AsyncSession when ASYNC_DB=1, otherwise the sync Session
+# (tests override get_db, which is what this resolves to by default).
+get_session = get_async_db if ASYNC_DB_ENABLED else get_db
+
+def in_new_session(fn, *args, **kwargs):
+    """Run sync DB work `fn(session, *args)` in a short-lived session of its own."""
+    with SessionLocal() as db:
+        return fn(db, *args, **kwargs)
+
+async def run_in_new_session(fn, *args, **kwargs):
+    """Like run_db(), for background work that has no request-scoped session."""
+    if ASYNC_DB_ENABLED:
+        get_async_engine()
+        async with _AsyncSessionLocal() as db:
+            return await db.run_sync(fn, *args, **kwargs)
+
+    return await run_in_threadpool(in_new_session, fn, *args, **kwargs)
+
+async def run_db(db, fn, *args, **kwargs):
+    """
+    Run sync-style DB work `fn(session, *args)` without blocking the event loop.
+    AsyncSession runs it via run_sync(); a plain Session runs it in the threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
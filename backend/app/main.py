@@ -1,9 +1,44 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 
 from . import db  # import database setup (to be created)
+from app.core.config import QUERY_BUDGET_WARNINGS, SCAN_WRITE_BEHIND
+from app.core.responses import ORJSONResponse
+from app.db import dispose_async_engine
 from app.routers import api_router# import API routes (to be created)
+from app.services import metrics, passkit
+from app.services.passkit_auth import token_manager
+from app.services.query_budget import QueryBudgetMiddleware
+from app.services.revalidation import revalidator
+from app.services.rollup import rollup_job
+from app.services.scan_queue import scan_queue
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    token_manager.start()
+    if SCAN_WRITE_BEHIND:
+        # Replays scans journaled but not written before the last shutdown or crash
+        await scan_queue.start()
+    revalidator.start()
+    rollup_job.start()
+    yield
+    await rollup_job.stop()
+    await revalidator.stop()
+    if SCAN_WRITE_BEHIND:
+        await scan_queue.stop()
+    token_manager.stop()
+    # Release pooled PassKit connections on shutdown
+    passkit.close_passkit_client()
+    await passkit.close_passkit_async_client()
+    await dispose_async_engine()
 
-app = FastAPI(title="Arimala Admin API")
+
+app = FastAPI(title="Arimala Admin API", lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_middleware(metrics.MetricsMiddleware)
+if QUERY_BUDGET_WARNINGS:
+    app.add_middleware(QueryBudgetMiddleware)
 
 # Include API routers (assuming routes.py will define an APIRouter)
 app.include_router(api_router)
@@ -12,3 +47,9 @@ app.include_router(api_router)
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    body, content_type = metrics.render_metrics()
+    return Response(body, media_type=content_type)
@@ -1,2 +1,2 @@
 # app/models/__init__.py
-from .models import Event, Member, Scan, GuestDetail  # expose ORM models
+from .models import Event, Member, Scan, GuestDetail, EventAttendanceCounter, ResourceVersion, PassStatus  # expose ORM models
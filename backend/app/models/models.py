@@ -1,11 +1,11 @@
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Enum, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, BigInteger, Boolean, DateTime, Enum, ForeignKey, Text, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 import enum
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 
-from app.db import Base
+from app.db import Base, next_row_version
 
 
 
@@ -23,12 +23,20 @@ class MembershipType(enum.Enum):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # Keyset pagination order for list_events, and the active_only window
+        Index("ix_events_starts_at_id", "starts_at", "id"),
+        Index("ix_events_ends_at", "ends_at"),
+    )
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String, nullable=False)
     starts_at: Mapped[datetime]
     ends_at: Mapped[datetime | None] = mapped_column(nullable=True)
     location: Mapped[str | None]
     created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
+    # What scans do while PassKit is unreachable: "reject" (503) or "admit_deferred"
+    # (admit with validation_reason="deferred" and re-validate later)
+    passkit_outage_policy: Mapped[str] = mapped_column(String, default="reject", server_default="reject")
 
 class Member(Base):
     __tablename__ = "members"
@@ -38,9 +46,29 @@ class Member(Base):
     membership_type: Mapped[MembershipType]
     pass_id: Mapped[str] = mapped_column(String, nullable=False, unique=True)
     created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
+    # Bumped on every write; door-pack delta syncs select rows newer than the device's version
+    row_version: Mapped[int] = mapped_column(
+        BigInteger, default=next_row_version, onupdate=next_row_version, index=True
+    )
 
 class Scan(Base):
     __tablename__ = "scans"
+    __table_args__ = (
+        # One scan per pass, event and direction; inserts rely on it for ON CONFLICT
+        Index("uq_scans_event_id_pass_id_mode", "event_id", "pass_id", "mode", unique=True),
+        Index("ix_scans_event_id_row_version", "event_id", "row_version"),
+        # Arrival curve buckets
+        Index("ix_scans_event_id_scanned_at", "event_id", "scanned_at"),
+        # Changes since the attendance rollup's watermark, across events
+        Index("ix_scans_row_version", "row_version"),
+        # Small partial index for the re-validator's work queue
+        Index(
+            "ix_scans_deferred",
+            "scanned_at",
+            postgresql_where=text("validation_reason = 'deferred'"),
+            sqlite_where=text("validation_reason = 'deferred'"),
+        ),
+    )
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     event_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("events.id"))
     member_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("members.id"), nullable=True)
@@ -54,6 +82,7 @@ class Scan(Base):
     scanned_by: Mapped[str] = mapped_column(default="unknown")
     scanned_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
     passkit_payload: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    row_version: Mapped[int] = mapped_column(BigInteger, default=next_row_version, onupdate=next_row_version)
 
     member = relationship("Member")
     event = relationship("Event")
@@ -76,4 +105,50 @@ class GuestDetail(Base):
 
     scan: Mapped["Scan"] = relationship("Scan", back_populates="guest_details")
 
-    
+
+class EventAttendanceCounter(Base):
+    """Running check-in totals per event and membership label, maintained by scan_pass."""
+    __tablename__ = "event_attendance_counters"
+    event_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("events.id"), primary_key=True)
+    membership_type: Mapped[str] = mapped_column(String, primary_key=True)
+    members: Mapped[int] = mapped_column(default=0)
+    guests: Mapped[int] = mapped_column(default=0)
+
+
+class DailyAttendanceRollup(Base):
+    """Check-ins per UTC day, event, membership label and scan kind; maintained by the rollup job."""
+    __tablename__ = "daily_attendance_rollup"
+    day: Mapped[date] = mapped_column(primary_key=True)
+    event_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("events.id"), primary_key=True)
+    membership_type: Mapped[str] = mapped_column(String, primary_key=True)
+    kind: Mapped[str] = mapped_column(String, primary_key=True)
+    members: Mapped[int] = mapped_column(default=0)
+    guests: Mapped[int] = mapped_column(default=0)
+
+
+class RollupWatermark(Base):
+    """Highest scans.row_version a rollup job has folded in."""
+    __tablename__ = "rollup_watermarks"
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    row_version: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class ResourceVersion(Base):
+    """Write counter per resource (e.g. "events"), bumped in the writing transaction; backs list ETags."""
+    __tablename__ = "resource_versions"
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class PassStatus(Base):
+    """Last known PassKit verdict per pass, filled ahead of events by the prefetch job."""
+    __tablename__ = "pass_status"
+    pass_id: Mapped[str] = mapped_column(String, primary_key=True)
+    is_valid: Mapped[bool]
+    reason: Mapped[str | None]
+    payload: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    checked_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
+    # Bumped when the verdict changes (not on every re-check), so door-pack deltas carry revocations
+    row_version: Mapped[int] = mapped_column(
+        BigInteger, default=next_row_version, onupdate=next_row_version, index=True
+    )
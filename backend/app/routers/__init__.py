@@ -6,9 +6,10 @@ from fastapi import APIRouter
 api_router = APIRouter(prefix="/api/v1")
 
 
-from app.routers import scan, events, dashboard
+from app.routers import scan, events, dashboard, admin
 
 
 api_router.include_router(scan.router)
 api_router.include_router(events.router)
-api_router.include_router(dashboard.router)
\ No newline at end of file
+api_router.include_router(dashboard.router)
+api_router.include_router(admin.router)
\ No newline at end of file
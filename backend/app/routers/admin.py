@@ -0,0 +1,69 @@
+import io
+import tempfile
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+
+from app.core.config import ROSTER_UPLOAD_SPOOL_BYTES
+from app.db import get_db, run_db
+from app.schemas.admin import PrefetchStatusOut, RosterImportOut
+from app.services.pass_prefetch import prefetch_job
+from app.services.roster import RosterFormatError, import_roster
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.post("/members/import", response_model=RosterImportOut)
+async def import_members(
+    request: Request,
+    # Always a sync Session: the Postgres path COPYs through the psycopg2 connection
+    db: Session = Depends(get_db),
+):
+    """
+    Upsert members from a roster CSV sent as the raw request body
+    (`Content-Type: text/csv`). The body is spooled to a temp file as it
+    arrives, so large rosters are never held in memory.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=ROSTER_UPLOAD_SPOOL_BYTES) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        try:
+            result = await run_db(db, import_roster, io.TextIOWrapper(spool, encoding="utf-8-sig", newline=""))
+        except RosterFormatError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return RosterImportOut.model_validate(result)
+
+
+@router.post("/passes/prefetch", response_model=PrefetchStatusOut, status_code=202)
+async def start_pass_prefetch(refresh_all: bool = False):
+    """
+    Start validating member passes against PassKit into `pass_status` in the
+    background. By default only passes without a recent check are included.
+    """
+    try:
+        prefetch_job.start(refresh_all)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _prefetch_status()
+
+
+@router.get("/passes/prefetch", response_model=PrefetchStatusOut)
+async def pass_prefetch_status():
+    if prefetch_job.result is None:
+        raise HTTPException(status_code=404, detail="No prefetch has run since startup")
+    return _prefetch_status()
+
+
+def _prefetch_status() -> PrefetchStatusOut:
+    result = prefetch_job.result
+    return PrefetchStatusOut(
+        running=prefetch_job.running,
+        total=result.total,
+        checked=result.checked,
+        valid=result.valid,
+        invalid=result.invalid,
+        failed=result.failed,
+        started_at=result.started_at,
+        finished_at=result.finished_at,
+    )
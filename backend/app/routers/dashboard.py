@@ -1,46 +1,194 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from datetime import date, timezone
+from typing import Literal
+
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
-from collections import defaultdict
 
-from app.db import SessionLocal, get_db
-from app.models.models import Scan
-from app.schemas.dashboard import EventSummary, MembershipBreakdown
+from app.core.config import DASHBOARD_STREAM_KEEPALIVE_SECONDS
+from app.core.responses import ORJSONResponse
+from app.db import get_db, get_session, run_db, run_in_new_session
+from app.models.models import Event
+from app.schemas.dashboard import (
+    ArrivalBucket,
+    AttendanceReport,
+    AttendanceReportRow,
+    EventArrivals,
+    EventSummary,
+    MembershipBreakdown,
+)
+from app.services.arrivals import event_arrivals
+from app.services.rollup import REPORT_DIMENSIONS, REPORT_PERIODS, attendance_report
+from app.services.attendance import read_counters
+from app.services.export import EXPORT_FORMATS, export_chunks
+from app.services.live import summary_delta, summary_hub
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 
-
 @router.get("/events/{event_id}/summary", response_model=EventSummary)
-def event_summary(event_id: UUID, db: Session = Depends(get_db)):
-    scans = db.query(Scan).filter(Scan.event_id == event_id, Scan.mode == "in").all()
-
-    if not scans:
+async def event_summary(event_id: UUID, db=Depends(get_session)):
+    summary = await run_db(db, _event_summary, event_id)
+    if summary is None:
         raise HTTPException(status_code=404, detail="No scans found for this event.")
+    return ORJSONResponse(summary)
 
-    total_check_ins = len(scans)
-    total_guests = sum(s.guests for s in scans)
 
-    breakdown = defaultdict(lambda: {"members": 0, "guests": 0})
+def _event_summary(db: Session, event_id: UUID) -> EventSummary | None:
+    # Reads the incrementally maintained counters: one row per membership type
+    counters = read_counters(db, event_id)
 
-    for s in scans:
-        if s.member and s.member.membership_type:
-            member_type = s.member.membership_type.value
-        elif s.passkit_payload:
-            member_type = s.passkit_payload.get("member_type", "Unknown")
-        else:
-            member_type = "Unknown"
-        breakdown[member_type]["members"] += 1
-        breakdown[member_type]["guests"] += s.guests
+    if not counters:
+        return None
 
+    # Plain ints and strings from the counters: nothing to validate
     by_type = {
-        k: MembershipBreakdown(members=v["members"], guests=v["guests"])
-        for k, v in breakdown.items()
+        member_type: MembershipBreakdown.model_construct(members=members, guests=guests)
+        for member_type, (members, guests) in counters.items()
     }
 
-    return EventSummary(
+    return EventSummary.model_construct(
         event_id=event_id,
-        total_check_ins=total_check_ins,
-        total_guests=total_guests,
+        total_check_ins=sum(b.members for b in by_type.values()),
+        total_guests=sum(b.guests for b in by_type.values()),
         by_membership_type=by_type
     )
+
+
+@router.get("/events/{event_id}/arrivals", response_model=EventArrivals)
+async def event_arrival_curve(
+    event_id: UUID,
+    bucket: Literal["1m", "5m", "15m"] = Query(default="1m"),
+    db=Depends(get_session),
+):
+    """Check-ins and guests per time bucket (UTC starts), from the first check-in to the last."""
+    counts = await run_db(db, event_arrivals, event_id, bucket)
+    if counts is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return ORJSONResponse(EventArrivals.model_construct(
+        event_id=event_id,
+        bucket=bucket,
+        buckets=[
+            ArrivalBucket.model_construct(
+                start=c.start.replace(tzinfo=timezone.utc), check_ins=c.check_ins, guests=c.guests
+            )
+            for c in counts
+        ],
+    ))
+
+
+@router.get("/reports/attendance", response_model=AttendanceReport)
+async def attendance_report_endpoint(
+    from_date: date | None = Query(default=None, alias="from"),
+    to_date: date | None = Query(default=None, alias="to"),
+    group_by: str = Query(default="month", description="Comma-separated: one of day|month|year, plus event, membership_type, kind"),
+    db=Depends(get_session),
+):
+    """Check-ins and guests across events from the daily rollup (up to ATTENDANCE_ROLLUP_INTERVAL_SECONDS behind)."""
+    groups = [name.strip() for name in group_by.split(",") if name.strip()]
+    unknown = [name for name in groups if name not in REPORT_PERIODS and name not in REPORT_DIMENSIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by: {', '.join(unknown)}")
+    if sum(name in REPORT_PERIODS for name in groups) > 1 or len(set(groups)) != len(groups):
+        raise HTTPException(status_code=400, detail="group_by takes at most one period and no repeats")
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+
+    rows = await run_db(db, attendance_report, from_date, to_date, groups)
+    return ORJSONResponse(AttendanceReport.model_construct(
+        from_date=from_date,
+        to_date=to_date,
+        group_by=groups,
+        rows=[
+            AttendanceReportRow.model_construct(
+                period=row.period,
+                event_id=row.event_id,
+                membership_type=row.membership_type,
+                kind=row.kind,
+                members=row.members,
+                guests=row.guests,
+                guests_per_member=round(row.guests / row.members, 3) if row.members else None,
+            )
+            for row in rows
+        ],
+    ))
+
+
+async def _load_live_summary(event_id: UUID) -> dict:
+    summary = await run_in_new_session(_event_summary, event_id)
+    if summary is None:
+        summary = EventSummary(event_id=event_id, total_check_ins=0, total_guests=0, by_membership_type={})
+    return summary.model_dump(mode="json")
+
+summary_hub.loader = _load_live_summary
+
+
+@router.get("/events/{event_id}/stream")
+async def event_summary_stream(event_id: UUID, db=Depends(get_session)):
+    """
+    Server-Sent Events stream of the event summary.
+
+    The first `summary` event carries the full EventSummary; each following
+    `delta` event carries the totals and only the membership types that changed.
+    """
+    if await run_db(db, Session.get, Event, event_id) is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    async def stream():
+        # Subscribe once the body is being sent: a client gone before then leaves no queue behind
+        queue = summary_hub.subscribe(event_id)
+        try:
+            previous = None
+            current = await _load_live_summary(event_id)
+            while True:
+                delta = summary_delta(previous, current)
+                if delta is not None:
+                    kind = "summary" if previous is None else "delta"
+                    yield f"event: {kind}\ndata: {orjson.dumps(delta).decode()}\n\n"
+                    previous = current
+                try:
+                    current = await asyncio.wait_for(queue.get(), timeout=DASHBOARD_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            summary_hub.unsubscribe(event_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/events/{event_id}/export")
+async def export_event_scans(
+    event_id: UUID,
+    fmt: Literal["csv", "ndjson"] = Query(default="csv", alias="format"),
+    accept_encoding: str | None = Header(default=None),
+    # Always a sync Session: the body is produced by a sync generator in the threadpool
+    db: Session = Depends(get_db),
+):
+    """Every scan of the event with member and guest details, streamed; gzipped if the client accepts it."""
+    if await run_db(db, Session.get, Event, event_id) is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    compress = "gzip" in (accept_encoding or "").lower()
+
+    def body():
+        # The dependency has already closed the session by the time the body streams;
+        # using it again checks out a fresh connection, which is released here.
+        try:
+            yield from export_chunks(db, event_id, fmt, compress)
+        finally:
+            db.close()
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="event-{event_id}-scans.{fmt}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body(), media_type=EXPORT_FORMATS[fmt], headers=headers)
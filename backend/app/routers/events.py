@@ -1,47 +1,160 @@
+import base64
+import hashlib
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import func, or_, select, tuple_
 from sqlalchemy.orm import Session
 from uuid import UUID
 
-from app.db import get_db
+from app.core.config import EVENTS_PAGE_DEFAULT_LIMIT, EVENTS_PAGE_MAX_LIMIT
+from app.core.responses import ORJSONResponse
+from app.db import get_session, run_db
 from app.models.models import Event
-from app.schemas.events import EventIn, EventOut
+from app.schemas.events import DoorPack, EventIn, EventOut
+from app.services.door_pack import build_door_pack, door_pack_etag, door_pack_version
+from app.services.versions import EVENTS, read_version
 
 router = APIRouter(prefix="/events", tags=["events"])
 
 
 @router.post("/", response_model=EventOut)
-def create_event(event_in: EventIn, db: Session = Depends(get_db)):
+async def create_event(event_in: EventIn, db=Depends(get_session)):
+    return ORJSONResponse(await run_db(db, _create_event, event_in))
+
+
+def _create_event(db: Session, event_in: EventIn) -> EventOut:
     event = Event(**event_in.dict())
     db.add(event)
     db.commit()
     db.refresh(event)
-    return event
+    return EventOut.model_validate(event)
 
 
 @router.get("/", response_model=list[EventOut])
-def list_events(
+async def list_events(
     active_only: bool = False,
     as_of: datetime | None = None,
-    db: Session = Depends(get_db),
+    limit: int = Query(default=EVENTS_PAGE_DEFAULT_LIMIT, ge=1, le=EVENTS_PAGE_MAX_LIMIT),
+    cursor: str | None = Query(default=None, description="`X-Next-Cursor` from the previous page"),
+    if_none_match: str | None = Header(default=None),
+    db=Depends(get_session),
 ):
+    """
+    Events by `starts_at` descending, `limit` per page. When more remain, the
+    `X-Next-Cursor` response header holds the cursor for the next page.
+    """
+    etag, page = await run_db(db, _list_events, active_only, as_of, limit, cursor, if_none_match)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if page is None:
+        return Response(status_code=304, headers=headers)
+    events, next_cursor = page
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    # EventOut rows were validated from the ORM objects once; don't round-trip them again
+    return ORJSONResponse(events, headers=headers)
+
+
+def _list_events(
+    db: Session,
+    active_only: bool,
+    as_of: datetime | None,
+    limit: int,
+    cursor: str | None,
+    if_none_match: str | None,
+):
+    after = _decode_cursor(cursor) if cursor else None
+    reference = as_of or datetime.now(timezone.utc)
+
+    # Checked before running the listing: an unchanged list costs one or two indexed lookups
+    etag_key = [active_only, as_of, limit, cursor]
+    if active_only and as_of is None:
+        etag_key.append(_next_active_change(db, reference))
+    etag = _events_etag(read_version(db, EVENTS), etag_key)
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return etag, None
+
     query = db.query(Event)
 
     if active_only:
-        reference = as_of or datetime.now(timezone.utc)
         query = query.filter(
             Event.starts_at <= reference,
             or_(Event.ends_at.is_(None), Event.ends_at >= reference),
         )
+    if after:
+        query = query.filter(tuple_(Event.starts_at, Event.id) < after)
+
+    rows = query.order_by(Event.starts_at.desc(), Event.id.desc()).limit(limit + 1).all()
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return etag, ([EventOut.model_validate(e) for e in rows[:limit]], next_cursor)
+
+
+def _next_active_change(db: Session, reference: datetime) -> datetime | None:
+    """Next instant the active_only result changes without any write: an event starts or ends."""
+    next_start = db.scalar(select(func.min(Event.starts_at)).where(Event.starts_at > reference))
+    next_end = db.scalar(select(func.min(Event.ends_at)).where(Event.ends_at >= reference))
+    return min((t for t in (next_start, next_end) if t is not None), default=None)
+
+
+def _events_etag(version: int, key: list) -> str:
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return f'W/"events-{version}-{digest}"'
+
 
-    return query.order_by(Event.starts_at.desc()).all()
+def _encode_cursor(event: Event) -> str:
+    raw = f"{event.starts_at.isoformat()}|{event.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        starts_at, event_id = raw.split("|")
+        return datetime.fromisoformat(starts_at), UUID(event_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @router.get("/{event_id}", response_model=EventOut)
-def get_event(event_id: UUID, db: Session = Depends(get_db)):
-    event = db.query(Event).get(event_id)
+async def get_event(event_id: UUID, db=Depends(get_session)):
+    event = await run_db(db, _get_event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
-    return event
+    return ORJSONResponse(event)
+
+
+def _get_event(db: Session, event_id: UUID) -> EventOut | None:
+    event = db.get(Event, event_id)
+    return EventOut.model_validate(event) if event else None
+
+
+@router.get("/{event_id}/door-pack", response_model=DoorPack)
+async def get_door_pack(
+    event_id: UUID,
+    since: int | None = Query(default=None, ge=0, description="Version from a previous pack; returns only changes"),
+    if_none_match: str | None = Header(default=None),
+    db=Depends(get_session),
+):
+    """Roster snapshot for offline scanning; see app/services/door_pack.py."""
+    etag, pack = await run_db(db, _door_pack, event_id, since, if_none_match)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if pack is None:
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(pack, headers=headers)
+
+
+def _door_pack(db: Session, event_id: UUID, since: int | None, if_none_match: str | None):
+    if db.get(Event, event_id) is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    version = door_pack_version(db, event_id)
+    etag = door_pack_etag(version)
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return etag, None
+    return etag, build_door_pack(db, event_id, version, since)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison and may list several tags
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
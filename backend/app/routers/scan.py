@@ -1,43 +1,230 @@
 # app/routers/scan.py
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
 from uuid import uuid4
 from datetime import datetime, timezone
 
-from app.db import get_db
+from app.core.responses import ORJSONResponse
+from app.db import get_session, naive_utc, run_db
 from app.models.models import Scan, Member, Event, GuestDetail
-from app.schemas.scan import ScanIn, ScanOut, GuestDetailOut
-from app.services import passkit
-from app.core.config import MEMBERSHIP_GUEST_LIMITS
+from app.schemas.scan import ScanIn, ScanOut, GuestDetailOut, ScanBatchIn, ScanBatchOut, ScanBatchItemOut
+from app.services import metrics, passkit
+from app.services.admissions import admitted_passes
+from app.services.attendance import increment_counters, scan_label
+from app.services.live import summary_hub
+from app.services.members import MemberRef, member_directory
+from app.services.revalidation import ADMIT_DEFERRED, DEFERRED, admits_deferred
+from app.services.scan_queue import ScanAlreadyQueued, guest_detail_rows, insert_scan_rows, scan_queue, scan_row
+from app.core.config import MEMBERSHIP_GUEST_LIMITS, SCAN_BATCH_PASSKIT_CONCURRENCY
 
 router = APIRouter(prefix="/scan", tags=["Scan"])
 
 
+class ScanRejected(HTTPException):
+    """HTTPException with a stable error code, reported per item by the batch endpoint."""
+
+    def __init__(self, status_code: int, code: str, detail: str):
+        super().__init__(status_code=status_code, detail=detail)
+        self.code = code
+
 
 @router.post("/", response_model=ScanOut)
-def scan_pass(payload: ScanIn, db: Session = Depends(get_db)):
-    # Input validation
+async def scan_pass(payload: ScanIn, db=Depends(get_session)):
+    try:
+        scan_out = await _admit(payload, db)
+    except ScanRejected as e:
+        metrics.count_scan_outcome(e.code)
+        raise
+    metrics.count_scan_outcome(_outcome(scan_out))
+    return ORJSONResponse(scan_out)
+
+
+async def _admit(payload: ScanIn, db) -> ScanOut:
+    guest_count = _check_payload(payload)
+
+    # Repeat presentations of an admitted pass are answered from memory
+    if admitted_passes.contains(payload.event_id, payload.pass_id):
+        raise ScanRejected(409, "duplicate", "Duplicate scan detected.")
+    if not admitted_passes.is_warm(payload.event_id):
+        await run_db(db, _check_event_and_duplicate, payload)
+
+    # PassKit validation
+    try:
+        is_valid, reason, passkit_data = await passkit.validate_pass_async(payload.pass_id, db)
+    except passkit.PasskitValidationError as e:
+        # Only an outage may defer: a pass PassKit refused (e.g. a 404 for a forged one) is never admitted
+        if not isinstance(e, passkit.PasskitOutage) or not await run_db(db, admits_deferred, payload.event_id):
+            raise _passkit_failure(e)
+        # The event admits through outages; the re-validator checks the pass later
+        is_valid, reason, passkit_data = True, DEFERRED, None
+
+    if scan_queue.enabled:
+        scan_out = await _queue_scan(db, payload, guest_count, is_valid, reason, passkit_data)
+        if scan_out is not None:
+            return scan_out
+
+    scan_out = await run_db(db, _record_scan, payload, guest_count, is_valid, reason, passkit_data)
+    summary_hub.notify(payload.event_id)
+    return scan_out
+
+
+@router.post("/batch", response_model=ScanBatchOut)
+async def scan_batch(batch: ScanBatchIn, db=Depends(get_session)):
+    """
+    Record a queue of offline scans in one round trip.
+
+    Items are checked exactly like POST /scan/ and each gets its own status;
+    a rejected item never fails the rest of the batch.
+    """
+    results: dict[int, ScanBatchItemOut] = {}
+    pending: dict[int, int] = {}  # index -> guest_count
+    seen = set()
+
+    for index, item in enumerate(batch.items):
+        try:
+            guest_count = _check_payload(item)
+        except ScanRejected as e:
+            results[index] = _rejected(index, e)
+            continue
+        key = (item.event_id, item.pass_id, item.mode)
+        if key in seen or admitted_passes.contains(item.event_id, item.pass_id):
+            results[index] = _rejected(index, ScanRejected(409, "duplicate", "Duplicate scan detected."))
+            continue
+        seen.add(key)
+        pending[index] = guest_count
+
+    context = await run_db(db, _load_batch_context, [batch.items[i] for i in pending])
+    for index in list(pending):
+        try:
+            context.check(batch.items[index])
+        except ScanRejected as e:
+            results[index] = _rejected(index, e)
+            del pending[index]
+
+    validations = await _validate_passes(db, {batch.items[i].pass_id for i in pending})
+
+    accepted = []
+    for index, guest_count in pending.items():
+        item = batch.items[index]
+        validation = validations[item.pass_id]
+        if isinstance(validation, passkit.PasskitValidationError):
+            if not isinstance(validation, passkit.PasskitOutage) or item.event_id not in context.deferred_events:
+                results[index] = _rejected(index, _passkit_failure(validation))
+                continue
+            validation = (True, DEFERRED, None)
+        try:
+            member = context.member_for(item, guest_count)
+        except ScanRejected as e:
+            results[index] = _rejected(index, e)
+            continue
+        accepted.append((index, item, guest_count, member, validation))
+
+    if accepted:
+        for index, outcome in await run_db(db, _record_batch, accepted):
+            if isinstance(outcome, ScanRejected):
+                results[index] = _rejected(index, outcome)
+            else:
+                results[index] = ScanBatchItemOut(index=index, status_code=200, scan=outcome)
+        for event_id in {item.event_id for _, item, *_ in accepted}:
+            summary_hub.notify(event_id)
+
+    for result in results.values():
+        metrics.count_scan_outcome(result.error_code or _outcome(result.scan))
+    return ORJSONResponse(ScanBatchOut(results=[results[i] for i in range(len(batch.items))]))
+
+
+def _outcome(scan_out: ScanOut) -> str:
+    if scan_out.validation_reason == DEFERRED:
+        return "deferred"
+    return "accepted" if scan_out.is_valid else "invalid_pass"
+
+
+def _passkit_failure(e: passkit.PasskitValidationError) -> ScanRejected:
+    code = "passkit_unavailable" if isinstance(e, passkit.PasskitOutage) else "passkit_error"
+    return ScanRejected(503, code, str(e))
+
+
+def _rejected(index: int, e: ScanRejected) -> ScanBatchItemOut:
+    return ScanBatchItemOut(index=index, status_code=e.status_code, error_code=e.code, detail=e.detail)
+
+
+async def _validate_passes(db, pass_ids: set[str]) -> dict:
+    """Validate distinct passes concurrently; failures are returned, not raised."""
+    semaphore = asyncio.Semaphore(SCAN_BATCH_PASSKIT_CONCURRENCY)
+    # pass_status for every pass the cache can't answer, in one query on the request's session
+    misses = [pass_id for pass_id in pass_ids if passkit.validation_cache.peek(pass_id) is None]
+    stored = await run_db(db, passkit.stored_statuses, misses) if misses else {}
+
+    async def validate(pass_id):
+        async with semaphore:
+            try:
+                return await passkit.validate_pass_async(pass_id, stored=stored)
+            except passkit.PasskitValidationError as e:
+                return e
+
+    ordered = list(pass_ids)
+    return dict(zip(ordered, await asyncio.gather(*(validate(p) for p in ordered))))
+
+
+def _check_payload(payload: ScanIn) -> int:
+    """Checks that need no DB access; returns the effective guest count."""
     if payload.mode != "in":
-        raise HTTPException(status_code=400, detail="Only mode='in' is supported.")
+        raise ScanRejected(400, "invalid_mode", "Only mode='in' is supported.")
 
     if payload.kind not in ("membership_pass", "event_ticket"):
-        raise HTTPException(status_code=400, detail="Invalid kind.")
-
-    event = db.query(Event).filter(Event.id == payload.event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found.")
+        raise ScanRejected(400, "invalid_kind", "Invalid kind.")
 
     if payload.guests < 0:
-        raise HTTPException(status_code=400, detail="Guests cannot be negative.")
+        raise ScanRejected(400, "negative_guests", "Guests cannot be negative.")
 
     details_payload = payload.guest_details or []
     if details_payload and payload.guests not in (0, len(details_payload)):
-        raise HTTPException(
-            status_code=400,
-            detail="guests must equal the number of guest_details entries or be omitted.",
+        raise ScanRejected(
+            400,
+            "guest_details_mismatch",
+            "guests must equal the number of guest_details entries or be omitted.",
         )
 
-    guest_count = len(details_payload) if details_payload else payload.guests
+    return len(details_payload) if details_payload else payload.guests
+
+
+def _check_guest_limit(member: Member | MemberRef, guest_count: int) -> None:
+    max_guests = MEMBERSHIP_GUEST_LIMITS.get(member.membership_type.name, 0)
+    if guest_count > max_guests:
+        raise ScanRejected(
+            400,
+            "guest_limit_exceeded",
+            f"{member.membership_type.value} members can only bring up to {max_guests} guests.",
+        )
+
+
+def _check_event_and_duplicate(db: Session, payload: ScanIn) -> None:
+    # The event and, unless it ended too long ago to index, its admitted passes in one statement
+    cutoff = admitted_passes.index_cutoff()
+    rows = db.execute(
+        select(Event.ends_at, Scan.pass_id)
+        .outerjoin(Scan, and_(
+            Scan.event_id == Event.id,
+            Scan.mode == "in",
+            or_(Event.ends_at.is_(None), Event.ends_at > cutoff),
+        ))
+        .where(Event.id == payload.event_id)
+    ).all()
+    if not rows:
+        raise ScanRejected(404, "event_not_found", "Event not found.")
+    ends_at = rows[0].ends_at
+
+    # Warm the admitted-pass index on the event's first scan; its set answers the duplicate check
+    if admitted_passes.accepts(ends_at, cutoff):
+        pass_ids = {row.pass_id for row in rows if row.pass_id is not None}
+        admitted_passes.warm(payload.event_id, ends_at, pass_ids)
+        if payload.pass_id in pass_ids:
+            raise ScanRejected(409, "duplicate", "Duplicate scan detected.")
+        return
 
     # Duplicate check
     duplicate = (
@@ -50,33 +237,14 @@ def scan_pass(payload: ScanIn, db: Session = Depends(get_db)):
         .first()
     )
     if duplicate:
-        raise HTTPException(status_code=409, detail="Duplicate scan detected.")
+        raise ScanRejected(409, "duplicate", "Duplicate scan detected.")
 
-    # PassKit validation
-    try:
-        is_valid, reason, passkit_data = passkit.validate_pass(payload.pass_id)
-    except passkit.PasskitValidationError as e:
-        raise HTTPException(status_code=503, detail=str(e))
 
-    # Guest limit enforcement
-    member = None
-    if payload.member_id:
-        member = db.query(Member).filter(Member.id == payload.member_id).first()
-        if not member:
-            raise HTTPException(status_code=404, detail="Member not found.")
-
-        max_guests = MEMBERSHIP_GUEST_LIMITS.get(member.membership_type.name, 0)
-        if guest_count > max_guests:
-            raise HTTPException(
-                status_code=400,
-                detail=f"{member.membership_type.value} members can only bring up to {max_guests} guests."
-            )
-
-    # Save the scan
+def _new_scan(payload: ScanIn, member, guest_count: int, is_valid: bool, reason, passkit_data) -> Scan:
     new_scan = Scan(
         id=uuid4(),
         event_id=payload.event_id,
-        member_id=payload.member_id,
+        member_id=member.id if member else None,
         pass_id=payload.pass_id,
         pass_serial=payload.pass_serial,
         mode=payload.mode,
@@ -89,7 +257,7 @@ def scan_pass(payload: ScanIn, db: Session = Depends(get_db)):
         passkit_payload=passkit_data,
     )
 
-    if details_payload:
+    if payload.guest_details:
         new_scan.guest_details = [
             GuestDetail(
                 id=uuid4(),
@@ -98,31 +266,176 @@ def scan_pass(payload: ScanIn, db: Session = Depends(get_db)):
                 contact=detail.contact,
                 notes=detail.notes,
             )
-            for detail in details_payload
+            for detail in payload.guest_details
         ]
 
-    db.add(new_scan)
-    db.commit()
-    db.refresh(new_scan)
+    return new_scan
 
+
+def _scan_out(scan: Scan, member: Member | MemberRef | None) -> ScanOut:
+    # Every value comes from the row we just built: model_construct skips validating it again
     guest_detail_out = [
-        GuestDetailOut(
+        GuestDetailOut.model_construct(
             id=detail.id,
             name=detail.name,
             contact=detail.contact,
             notes=detail.notes,
         )
-        for detail in new_scan.guest_details
+        for detail in scan.guest_details
     ]
 
-    return ScanOut(
-        id=new_scan.id,
-        scanned_at=new_scan.scanned_at,
-        is_valid=new_scan.is_valid,
-        validation_reason=new_scan.validation_reason,
-        guests=new_scan.guests,
-        kind=new_scan.kind,
+    return ScanOut.model_construct(
+        id=scan.id,
+        # Naive UTC, exactly as the row reads back from the column: clients parse it without an offset
+        scanned_at=naive_utc(scan.scanned_at),
+        is_valid=scan.is_valid,
+        validation_reason=scan.validation_reason,
+        guests=scan.guests,
+        kind=scan.kind,
         membership_type=member.membership_type.value if member else None,
         member_name=member.full_name if member else None,
         guest_details=guest_detail_out,
     )
+
+
+def _resolve_member(db: Session, payload: ScanIn, guest_count: int) -> Member | MemberRef | None:
+    member = None
+    if payload.member_id:
+        member = db.query(Member).filter(Member.id == payload.member_id).first()
+        if not member:
+            raise ScanRejected(404, "member_not_found", "Member not found.")
+    elif payload.kind == "membership_pass":
+        # Scanner didn't look the member up: resolve it from the pass
+        member = member_directory.lookup(db, payload.pass_id)
+
+    # Guest limit enforcement
+    if member:
+        _check_guest_limit(member, guest_count)
+    return member
+
+
+def _record_scan(db: Session, payload: ScanIn, guest_count: int, is_valid: bool, reason, passkit_data) -> ScanOut:
+    member = _resolve_member(db, payload, guest_count)
+
+    # Save the scan and bump the dashboard counters in the same transaction
+    new_scan = _new_scan(payload, member, guest_count, is_valid, reason, passkit_data)
+    if not _insert_scans(db, [new_scan]):
+        # Lost a race with another door (or worker) scanning the same pass; nothing was written
+        admitted_passes.add(payload.event_id, payload.pass_id)
+        raise ScanRejected(409, "duplicate", "Duplicate scan detected.")
+    increment_counters(db, {(payload.event_id, scan_label(member, passkit_data)): (1, guest_count)})
+    # Built before commit() expires the member, which would cost a reload
+    scan_out = _scan_out(new_scan, member)
+    db.commit()
+    admitted_passes.add(payload.event_id, payload.pass_id)
+
+    return scan_out
+
+
+async def _queue_scan(db, payload: ScanIn, guest_count: int, is_valid: bool, reason, passkit_data) -> ScanOut | None:
+    """Write-behind: journal and queue the scan and answer before it is committed; None if the queue is full."""
+    member = await run_db(db, _resolve_member, payload, guest_count)
+    new_scan = _new_scan(payload, member, guest_count, is_valid, reason, passkit_data)
+    try:
+        queued = await run_in_threadpool(scan_queue.submit, new_scan, scan_label(member, passkit_data))
+    except ScanAlreadyQueued:
+        raise ScanRejected(409, "duplicate", "Duplicate scan detected.")
+    if not queued:
+        return None
+    admitted_passes.add(payload.event_id, payload.pass_id)
+    return _scan_out(new_scan, member)
+
+
+def _insert_scans(db: Session, scans: list[Scan]) -> set:
+    """Insert transient scans and their guest details; returns the ids actually inserted. Does not commit."""
+    return insert_scan_rows(
+        db, [scan_row(scan) for scan in scans], [row for scan in scans for row in guest_detail_rows(scan)]
+    )
+
+
+class _BatchContext:
+    """Events, members and already-recorded scans for a batch, loaded set-wise."""
+
+    def __init__(self, event_ids: set, members: dict, members_by_pass: dict, existing: set, deferred_events: set):
+        self.event_ids = event_ids
+        self.deferred_events = deferred_events  # events admitting while PassKit is down
+        self.members = members
+        self.members_by_pass = members_by_pass
+        self.existing = existing
+
+    def check(self, item: ScanIn) -> None:
+        if item.event_id not in self.event_ids:
+            raise ScanRejected(404, "event_not_found", "Event not found.")
+        if (item.event_id, item.pass_id) in self.existing:
+            raise ScanRejected(409, "duplicate", "Duplicate scan detected.")
+
+    def member_for(self, item: ScanIn, guest_count: int) -> Member | MemberRef | None:
+        if item.member_id:
+            member = self.members.get(item.member_id)
+            if member is None:
+                raise ScanRejected(404, "member_not_found", "Member not found.")
+        elif item.kind == "membership_pass":
+            member = self.members_by_pass.get(item.pass_id)
+        else:
+            member = None
+        if member:
+            _check_guest_limit(member, guest_count)
+        return member
+
+
+def _load_batch_context(db: Session, items: list[ScanIn]) -> _BatchContext:
+    if not items:
+        return _BatchContext(set(), {}, {}, set(), set())
+
+    event_ids = {item.event_id for item in items}
+    member_ids = {item.member_id for item in items if item.member_id}
+    pass_ids = {item.pass_id for item in items}
+
+    events = db.query(Event.id, Event.passkit_outage_policy).filter(Event.id.in_(event_ids)).all()
+    found_events = {row.id for row in events}
+    deferred_events = {row.id for row in events if row.passkit_outage_policy == ADMIT_DEFERRED}
+    members = {}
+    if member_ids:
+        members = {m.id: m for m in db.query(Member).filter(Member.id.in_(member_ids))}
+    members_by_pass = member_directory.lookup_many(
+        db, [item.pass_id for item in items if not item.member_id and item.kind == "membership_pass"]
+    )
+    existing = {
+        (row.event_id, row.pass_id)
+        for row in db.query(Scan.event_id, Scan.pass_id).filter(
+            Scan.event_id.in_(found_events),
+            Scan.pass_id.in_(pass_ids),
+            Scan.mode == "in",
+        )
+    }
+    return _BatchContext(found_events, members, members_by_pass, existing, deferred_events)
+
+
+def _record_batch(db: Session, accepted: list) -> list[tuple[int, ScanOut | ScanRejected]]:
+    scans = [
+        (index, _new_scan(item, member, guest_count, is_valid, reason, passkit_data), member)
+        for index, item, guest_count, member, (is_valid, reason, passkit_data) in accepted
+    ]
+
+    # One transaction for the whole batch, counters included
+    inserted = _insert_scans(db, [scan for _, scan, _ in scans])
+
+    results = []
+    increments: dict = {}
+    for index, scan, member in scans:
+        if scan.id not in inserted:
+            results.append((index, ScanRejected(409, "duplicate", "Duplicate scan detected.")))
+            continue
+        key = (scan.event_id, scan_label(member, scan.passkit_payload))
+        members, guests = increments.get(key, (0, 0))
+        increments[key] = (members + 1, guests + scan.guests)
+        results.append((index, _scan_out(scan, member)))
+
+    increment_counters(db, increments)
+    db.commit()
+
+    # Conflicting rows were committed by someone else, so every pass here is now admitted
+    for _, scan, _ in scans:
+        admitted_passes.add(scan.event_id, scan.pass_id)
+
+    return results
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+class RosterRejection(BaseModel):
+    line: int
+    reason: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RosterImportOut(BaseModel):
+    inserted: int
+    updated: int
+    unchanged: int
+    rejected: int
+    errors: list[RosterRejection]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PrefetchStatusOut(BaseModel):
+    running: bool
+    total: int
+    checked: int
+    valid: int
+    invalid: int
+    failed: int
+    started_at: datetime
+    finished_at: datetime | None
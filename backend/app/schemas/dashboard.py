@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import Dict, Optional
+from datetime import date, datetime
+from typing import Dict, List, Optional
 from uuid import UUID
 
 class MembershipBreakdown(BaseModel):
@@ -11,3 +12,28 @@ class EventSummary(BaseModel):
     total_check_ins: int
     total_guests: int
     by_membership_type: Dict[str, MembershipBreakdown]
+
+class ArrivalBucket(BaseModel):
+    start: datetime
+    check_ins: int
+    guests: int
+
+class EventArrivals(BaseModel):
+    event_id: UUID
+    bucket: str
+    buckets: List[ArrivalBucket]
+
+class AttendanceReportRow(BaseModel):
+    period: Optional[str] = None
+    event_id: Optional[UUID] = None
+    membership_type: Optional[str] = None
+    kind: Optional[str] = None
+    members: int
+    guests: int
+    guests_per_member: Optional[float]
+
+class AttendanceReport(BaseModel):
+    from_date: Optional[date]
+    to_date: Optional[date]
+    group_by: List[str]
+    rows: List[AttendanceReportRow]
@@ -1,12 +1,19 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
+from typing import Literal
 from uuid import UUID
 
+OutagePolicy = Literal["reject", "admit_deferred"]
+
 class EventIn(BaseModel):
     name: str
     starts_at: datetime
     ends_at: datetime | None = None
     location: str | None = None
+    passkit_outage_policy: OutagePolicy = Field(
+        default="reject",
+        description="While PassKit is unavailable: reject scans (503), or admit them as deferred and re-validate later",
+    )
 
 class EventOut(BaseModel):
     id: UUID
@@ -15,5 +22,33 @@ class EventOut(BaseModel):
     ends_at: datetime | None
     location: str | None
     created_at: datetime
+    passkit_outage_policy: OutagePolicy
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class DoorPackMember(BaseModel):
+    id: UUID
+    pass_id: str
+    name: str
+    membership_type: str
+    pass_status: str | None = Field(default=None, description=(
+        "PassKit status from the prefetched `pass_status` table (e.g. ACTIVE, REVOKED); "
+        "null if the pass hasn't been prefetched"
+    ))
+
+
+class DoorPackAdmission(BaseModel):
+    pass_id: str
+    scanned_at: datetime
+    guests: int
+
+
+class DoorPack(BaseModel):
+    format: int
+    event_id: UUID
+    version: int = Field(description="Pass back as `since` to fetch only later changes")
+    since: int | None = Field(default=None, description="Set on delta responses: rows changed after this version")
+    guest_limits: dict[str, int] = Field(description="Maximum guests per membership type")
+    members: list[DoorPackMember]
+    admitted: list[DoorPackAdmission]
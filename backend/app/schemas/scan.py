@@ -4,6 +4,8 @@ from uuid import UUID
 from datetime import datetime
 from typing import Optional, List
 
+from app.core.config import SCAN_BATCH_MAX_ITEMS
+
 
 class GuestDetailIn(BaseModel):
     name: Optional[str] = Field(default=None, description="Guest full name")
@@ -45,3 +47,19 @@ class ScanOut(BaseModel):
     guest_details: List[GuestDetailOut] = Field(default_factory=list)
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ScanBatchIn(BaseModel):
+    items: List[ScanIn] = Field(min_length=1, max_length=SCAN_BATCH_MAX_ITEMS)
+
+
+class ScanBatchItemOut(BaseModel):
+    index: int = Field(description="Position of the item in the submitted batch")
+    status_code: int = Field(description="HTTP status the item would have received from POST /scan/")
+    error_code: Optional[str] = None
+    detail: Optional[str] = None
+    scan: Optional[ScanOut] = None
+
+
+class ScanBatchOut(BaseModel):
+    results: List[ScanBatchItemOut]
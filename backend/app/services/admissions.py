@@ -0,0 +1,93 @@
+"""
+Per-event in-memory index of admitted passes.
+
+The first scan for an event loads every admitted pass_id for it (one query);
+afterwards repeat presentations of the same pass are rejected without any DB
+access, and the event lookup is skipped as well. The index is per process and
+can miss admissions made by other workers, so the unique index on
+scans(event_id, pass_id, mode) stays the final authority.
+
+Memory is bounded by dropping events once `ends_at` is more than
+`end_grace_seconds` in the past, and by keeping at most `max_events` events
+(least recently scanned go first).
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Optional
+from uuid import UUID
+
+from app.core.config import ADMITTED_INDEX_END_GRACE_SECONDS, ADMITTED_INDEX_MAX_EVENTS
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class AdmittedPassIndex:
+    def __init__(self, max_events: int, end_grace_seconds: int, clock: Callable[[], datetime] = _utcnow):
+        self.max_events = max_events
+        self.end_grace = timedelta(seconds=end_grace_seconds)
+        self._clock = clock
+        self._events: "OrderedDict[UUID, tuple[Optional[datetime], set[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_warm(self, event_id: UUID) -> bool:
+        with self._lock:
+            return event_id in self._events
+
+    def contains(self, event_id: UUID, pass_id: str) -> bool:
+        """True only when the pass is known to be admitted; False if unknown or not warm."""
+        with self._lock:
+            entry = self._events.get(event_id)
+            if entry is None:
+                return False
+            self._events.move_to_end(event_id)
+            return pass_id in entry[1]
+
+    def index_cutoff(self) -> datetime:
+        """Events that end after this (naive UTC) are worth indexing."""
+        return self._clock() - self.end_grace
+
+    def accepts(self, ends_at: Optional[datetime], cutoff: Optional[datetime] = None) -> bool:
+        """Whether an event with this end time is worth indexing, against `cutoff` if given."""
+        ends_at = _naive_utc(ends_at)
+        return ends_at is None or ends_at > (cutoff or self.index_cutoff())
+
+    def warm(self, event_id: UUID, ends_at: Optional[datetime], pass_ids: Iterable[str]) -> bool:
+        """Index an event's admitted passes; returns False for events that already ended."""
+        if self.max_events <= 0 or not self.accepts(ends_at):
+            return False
+        with self._lock:
+            self._events[event_id] = (_naive_utc(ends_at), set(pass_ids))
+            self._events.move_to_end(event_id)
+            self._evict()
+        return True
+
+    def add(self, event_id: UUID, pass_id: str) -> None:
+        """Record a committed admission; ignored for events that are not indexed."""
+        with self._lock:
+            entry = self._events.get(event_id)
+            if entry is not None:
+                entry[1].add(pass_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._events.clear()
+
+    def _evict(self) -> None:
+        now = self._clock()
+        for event_id, (ends_at, _) in list(self._events.items()):
+            if ends_at is not None and ends_at + self.end_grace <= now:
+                del self._events[event_id]
+        while len(self._events) > self.max_events:
+            self._events.popitem(last=False)
+
+
+admitted_passes = AdmittedPassIndex(ADMITTED_INDEX_MAX_EVENTS, ADMITTED_INDEX_END_GRACE_SECONDS)
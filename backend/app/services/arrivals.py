@@ -0,0 +1,149 @@
+"""
+Arrival curve: check-ins per time bucket for an event.
+
+Buckets are computed in SQL from `scans.scanned_at` (date_trunc on Postgres,
+unixepoch arithmetic on SQLite) over the (event_id, scanned_at) index. A
+bucket is closed once it ended ARRIVALS_CLOSE_GRACE_SECONDS ago (scans
+committed late, e.g. through the write-behind queue, still land in it);
+closed buckets are cached per process, so a refresh only aggregates scans
+since the oldest open bucket.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+from uuid import UUID
+
+from sqlalchemy import DateTime, Integer, cast, func, select, type_coerce
+from sqlalchemy.orm import Session
+
+from app.core.config import ARRIVALS_CACHE_MAX_ENTRIES, ARRIVALS_CLOSE_GRACE_SECONDS
+from app.models.models import Event, Scan
+
+BUCKET_SECONDS = {"1m": 60, "5m": 300, "15m": 900}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class ArrivalCount:
+    start: datetime  # naive UTC, like scans.scanned_at
+    check_ins: int
+    guests: int
+
+
+def bucket_start(db: Session, seconds: int):
+    """SQL expression for the start of the `seconds`-wide bucket holding scanned_at (must divide an hour)."""
+    if db.get_bind().dialect.name == "postgresql":
+        if seconds == 60:
+            return func.date_trunc("minute", Scan.scanned_at)
+        minutes = seconds // 60
+        offset = cast(func.floor(func.date_part("minute", Scan.scanned_at) / minutes) * minutes, Integer)
+        return func.date_trunc("hour", Scan.scanned_at) + func.make_interval(0, 0, 0, 0, 0, offset)
+    epoch = cast(func.strftime("%s", Scan.scanned_at), Integer)
+    return type_coerce(func.datetime(epoch // seconds * seconds, "unixepoch"), DateTime)
+
+
+def count_buckets(db: Session, event_id: UUID, seconds: int, since: Optional[datetime] = None) -> list[ArrivalCount]:
+    """Check-ins and guests per bucket, optionally only for scans at or after `since`."""
+    # Group on the labelled subquery's column (see attendance.recompute_counters)
+    scans = select(bucket_start(db, seconds).label("start"), Scan.guests).where(
+        Scan.event_id == event_id, Scan.mode == "in"
+    )
+    if since is not None:
+        scans = scans.where(Scan.scanned_at >= since)
+    scans = scans.subquery()
+
+    rows = db.execute(
+        select(scans.c.start, func.count(), func.coalesce(func.sum(scans.c.guests), 0))
+        .group_by(scans.c.start)
+        .order_by(scans.c.start)
+    )
+    return [ArrivalCount(start, check_ins, guests) for start, check_ins, guests in rows]
+
+
+class ClosedBucketCache:
+    """Closed buckets per (event, bucket width), with the start of the first bucket not yet closed."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple[UUID, int], tuple[datetime, list[ArrivalCount]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[UUID, int]) -> Optional[tuple[datetime, list[ArrivalCount]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: tuple[UUID, int], closed_until: datetime, buckets: list[ArrivalCount]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            current = self._entries.get(key)
+            # A concurrent refresh may already have closed more buckets
+            if current is None or current[0] <= closed_until:
+                self._entries[key] = (closed_until, buckets)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+closed_buckets = ClosedBucketCache(ARRIVALS_CACHE_MAX_ENTRIES)
+
+
+def event_arrivals(
+    db: Session,
+    event_id: UUID,
+    bucket: str,
+    clock: Callable[[], datetime] = _utcnow,
+) -> Optional[list[ArrivalCount]]:
+    """
+    Every bucket from the first check-in to the last (empty ones included);
+    None if the event doesn't exist.
+    """
+    seconds = BUCKET_SECONDS[bucket]
+    key = (event_id, seconds)
+    cached = closed_buckets.get(key)
+    if cached is None:
+        if db.get(Event, event_id) is None:
+            return None
+        since, closed = None, []
+    else:
+        since, closed = cached
+
+    recent = count_buckets(db, event_id, seconds, since)
+
+    horizon = clock() - timedelta(seconds=ARRIVALS_CLOSE_GRACE_SECONDS)
+    closed_until = _floor(horizon, seconds)
+    if since is not None and since > closed_until:
+        closed_until = since
+    closed_buckets.set(key, closed_until, closed + [b for b in recent if b.start < closed_until])
+    return _fill_gaps(closed + recent, seconds)
+
+
+def _floor(value: datetime, seconds: int) -> datetime:
+    epoch = int(value.replace(tzinfo=timezone.utc).timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, timezone.utc).replace(tzinfo=None)
+
+
+def _fill_gaps(buckets: list[ArrivalCount], seconds: int) -> list[ArrivalCount]:
+    if not buckets:
+        return []
+    step = timedelta(seconds=seconds)
+    filled = [buckets[0]]
+    for current in buckets[1:]:
+        start = filled[-1].start + step
+        while start < current.start:
+            filled.append(ArrivalCount(start, 0, 0))
+            start += step
+        filled.append(current)
+    return filled
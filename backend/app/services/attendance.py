@@ -0,0 +1,139 @@
+"""
+Per-event attendance counters.
+
+`event_attendance_counters` holds one row per (event, membership label) with
+running member/guest totals. scan_pass bumps it in the same transaction as the
+scan insert, so the dashboard summary reads O(#membership types) rows instead
+of aggregating `scans`. `recompute_counters()` derives the same numbers from
+`scans` for backfills and consistency checks.
+"""
+from dataclasses import dataclass
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.orm import Session
+
+from app.db import dialect_insert
+from app.models.models import EventAttendanceCounter, Member, MembershipType, Scan
+
+UNKNOWN = "Unknown"
+
+CounterKey = tuple[UUID, str]  # (event_id, membership label)
+
+
+def membership_label():
+    """
+    SQL expression for a scan's membership label: the linked member's type,
+    else the `member_type` in the PassKit payload, else "Unknown".
+    """
+    return case(
+        *[(Member.membership_type == t, t.value) for t in MembershipType],
+        else_=func.coalesce(Scan.passkit_payload["member_type"].as_string(), UNKNOWN),
+    )
+
+
+def scan_label(member: Optional[Member], passkit_payload: Optional[dict]) -> str:
+    """Python twin of membership_label() for a scan that is about to be inserted."""
+    if member is not None and member.membership_type:
+        return member.membership_type.value
+    if passkit_payload:
+        label = passkit_payload.get("member_type")
+        return str(label) if label is not None else UNKNOWN
+    return UNKNOWN
+
+
+def increment_counters(db: Session, increments: dict[CounterKey, tuple[int, int]]) -> None:
+    """Add (members, guests) to each counter row, creating rows as needed. Does not commit."""
+    if not increments:
+        return
+    table = EventAttendanceCounter.__table__
+    stmt = dialect_insert(db, EventAttendanceCounter)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.event_id, table.c.membership_type],
+        set_={
+            "members": table.c.members + stmt.excluded.members,
+            "guests": table.c.guests + stmt.excluded.guests,
+        },
+    )
+    db.execute(stmt, [
+        {"event_id": event_id, "membership_type": label, "members": members, "guests": guests}
+        for (event_id, label), (members, guests) in increments.items()
+    ])
+
+
+def read_counters(db: Session, event_id: UUID) -> dict[str, tuple[int, int]]:
+    rows = db.execute(
+        select(
+            EventAttendanceCounter.membership_type,
+            EventAttendanceCounter.members,
+            EventAttendanceCounter.guests,
+        ).where(EventAttendanceCounter.event_id == event_id)
+    )
+    return {label: (members, guests) for label, members, guests in rows}
+
+
+def recompute_counters(db: Session, event_id: Optional[UUID] = None) -> dict[CounterKey, tuple[int, int]]:
+    """Aggregate check-ins from `scans` in one GROUP BY, optionally for a single event."""
+    # Label in a subquery and group on that column: grouping on the CASE itself would
+    # repeat its bind parameters, which server-side binding (asyncpg) treats as distinct.
+    labeled = (
+        select(Scan.event_id, membership_label().label("membership_label"), Scan.guests)
+        .select_from(Scan)
+        .outerjoin(Member, Scan.member_id == Member.id)
+        .where(Scan.mode == "in")
+    )
+    if event_id is not None:
+        labeled = labeled.where(Scan.event_id == event_id)
+    labeled = labeled.subquery()
+
+    rows = db.execute(
+        select(
+            labeled.c.event_id,
+            labeled.c.membership_label,
+            func.count(),
+            func.coalesce(func.sum(labeled.c.guests), 0),
+        ).group_by(labeled.c.event_id, labeled.c.membership_label)
+    )
+    return {(eid, label): (members, guests) for eid, label, members, guests in rows}
+
+
+def backfill_counters(db: Session, event_id: Optional[UUID] = None) -> int:
+    """Rebuild counter rows from `scans` and commit; returns the number of rows written."""
+    totals = recompute_counters(db, event_id)
+    clear = delete(EventAttendanceCounter)
+    if event_id is not None:
+        clear = clear.where(EventAttendanceCounter.event_id == event_id)
+    db.execute(clear)
+    increment_counters(db, totals)
+    db.commit()
+    return len(totals)
+
+
+@dataclass
+class CounterDrift:
+    event_id: UUID
+    membership_type: str
+    expected: tuple[int, int]  # recomputed from scans
+    actual: tuple[int, int]  # stored in event_attendance_counters
+
+
+def check_counters(db: Session, event_id: Optional[UUID] = None) -> list[CounterDrift]:
+    """Compare stored counters with a recomputation from `scans`."""
+    expected = recompute_counters(db, event_id)
+
+    query = select(
+        EventAttendanceCounter.event_id,
+        EventAttendanceCounter.membership_type,
+        EventAttendanceCounter.members,
+        EventAttendanceCounter.guests,
+    )
+    if event_id is not None:
+        query = query.where(EventAttendanceCounter.event_id == event_id)
+    actual = {(eid, label): (members, guests) for eid, label, members, guests in db.execute(query)}
+
+    return [
+        CounterDrift(key[0], key[1], expected.get(key, (0, 0)), actual.get(key, (0, 0)))
+        for key in sorted(expected.keys() | actual.keys(), key=lambda k: (str(k[0]), k[1]))
+        if expected.get(key, (0, 0)) != actual.get(key, (0, 0))
+    ]
@@ -0,0 +1,88 @@
+"""
+Offline "door pack": the roster a scanner device needs to admit members
+without the server or PassKit.
+
+A pack is versioned by the highest `row_version` among members, their
+prefetched PassKit verdicts (`pass_status`) and the event's scans. Devices
+keep the version and later ask for `since=<version>`, which returns only rows
+changed after it; a member whose verdict changed counts as changed, so
+revocations reach devices. The delta re-reads DOOR_PACK_SYNC_OVERLAP_SECONDS
+before the version, to cover transactions still in flight and clock skew
+between workers (resent rows are idempotent on the device). Deleted members
+are not tracked, so devices should refetch the full pack before each event.
+
+Pass statuses come only from `pass_status`, never a process's own PassKit
+cache, so every worker serves the same body under the same ETag.
+"""
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import DOOR_PACK_SYNC_OVERLAP_SECONDS, MEMBERSHIP_GUEST_LIMITS
+from app.models.models import Member, MembershipType, PassStatus, Scan
+from app.schemas.events import DoorPack, DoorPackAdmission, DoorPackMember
+
+DOOR_PACK_FORMAT = 1
+
+
+def door_pack_version(db: Session, event_id: UUID) -> int:
+    versions = db.execute(select(
+        select(func.max(Member.row_version)).scalar_subquery(),
+        select(func.max(PassStatus.row_version)).scalar_subquery(),
+        select(func.max(Scan.row_version)).where(Scan.event_id == event_id).scalar_subquery(),
+    )).one()
+    return max(version or 0 for version in versions)
+
+
+def door_pack_etag(version: int) -> str:
+    return f'W/"door-pack-{DOOR_PACK_FORMAT}-{version}"'
+
+
+def build_door_pack(db: Session, event_id: UUID, version: int, since: Optional[int] = None) -> DoorPack:
+    member_query = (
+        select(
+            Member.id, Member.pass_id, Member.full_name, Member.membership_type,
+            PassStatus.is_valid, PassStatus.payload["status"].as_string().label("status"),
+        )
+        .outerjoin(PassStatus, PassStatus.pass_id == Member.pass_id)
+    )
+    admitted_query = (
+        select(Scan.pass_id, Scan.scanned_at, Scan.guests)
+        .where(Scan.event_id == event_id, Scan.mode == "in")
+    )
+    if since is not None:
+        changed_after = since - DOOR_PACK_SYNC_OVERLAP_SECONDS * 1_000_000
+        member_query = member_query.where(
+            or_(Member.row_version > changed_after, PassStatus.row_version > changed_after)
+        )
+        admitted_query = admitted_query.where(Scan.row_version > changed_after)
+
+    return DoorPack(
+        format=DOOR_PACK_FORMAT,
+        event_id=event_id,
+        version=version,
+        since=since,
+        guest_limits={t.value: MEMBERSHIP_GUEST_LIMITS.get(t.name, 0) for t in MembershipType},
+        members=[
+            DoorPackMember(
+                id=row.id,
+                pass_id=row.pass_id,
+                name=row.full_name,
+                membership_type=row.membership_type.value,
+                pass_status=_pass_status(row.is_valid, row.status),
+            )
+            for row in db.execute(member_query)
+        ],
+        admitted=[
+            DoorPackAdmission(pass_id=row.pass_id, scanned_at=row.scanned_at, guests=row.guests)
+            for row in db.execute(admitted_query)
+        ],
+    )
+
+
+def _pass_status(is_valid: Optional[bool], status: Optional[str]) -> Optional[str]:
+    if status:
+        return str(status).upper()
+    return "ACTIVE" if is_valid else None
@@ -0,0 +1,109 @@
+"""
+Streaming export of an event's scans with member and guest details.
+
+Rows are read through `yield_per` (a server-side cursor on Postgres) and
+encoded into ~EXPORT_CHUNK_BYTES chunks as they arrive, so memory stays flat
+however many scans the event has.
+
+CSV has one line per guest detail, repeating the scan columns (scans without
+guest details get one line with empty guest columns). NDJSON has one object
+per scan with its `guest_details` nested.
+"""
+import csv
+import io
+import json
+import zlib
+from itertools import groupby
+from typing import Iterable, Iterator
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import EXPORT_CHUNK_BYTES, EXPORT_YIELD_PER
+from app.models.models import GuestDetail, Member, Scan
+from app.services.attendance import membership_label
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+SCAN_COLUMNS = [
+    "scan_id", "scanned_at", "mode", "kind", "pass_id", "pass_serial", "is_valid", "validation_reason",
+    "guests", "scanned_by", "member_id", "member_name", "member_email", "membership_type",
+]
+GUEST_COLUMNS = ["guest_name", "guest_contact", "guest_notes"]
+
+
+def export_rows(db: Session, event_id: UUID):
+    stmt = (
+        select(
+            Scan.id, Scan.scanned_at, Scan.mode, Scan.kind, Scan.pass_id, Scan.pass_serial, Scan.is_valid,
+            Scan.validation_reason, Scan.guests, Scan.scanned_by, Scan.member_id, Member.full_name,
+            Member.email, membership_label(), GuestDetail.name, GuestDetail.contact, GuestDetail.notes,
+        )
+        .select_from(Scan)
+        .outerjoin(Member, Scan.member_id == Member.id)
+        .outerjoin(GuestDetail, GuestDetail.scan_id == Scan.id)
+        .where(Scan.event_id == event_id)
+        .order_by(Scan.scanned_at, Scan.id, GuestDetail.created_at, GuestDetail.id)
+        .execution_options(yield_per=EXPORT_YIELD_PER)
+    )
+    return db.execute(stmt)
+
+
+def export_chunks(db: Session, event_id: UUID, fmt: str, compress: bool = False) -> Iterator[bytes]:
+    encode = _csv_lines if fmt == "csv" else _ndjson_lines
+    chunks = _chunked(encode(export_rows(db, event_id)))
+    return _gzipped(chunks) if compress else chunks
+
+
+def _csv_lines(rows) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield line(SCAN_COLUMNS + GUEST_COLUMNS)
+    for row in rows:
+        values = list(row)
+        values[1] = values[1].isoformat()
+        yield line(values)
+
+
+def _ndjson_lines(rows) -> Iterator[str]:
+    # Rows are ordered by scan, so each scan's guest rows are adjacent
+    for _, scan_rows in groupby(rows, key=lambda row: row[0]):
+        first = next(scan_rows)
+        record = dict(zip(SCAN_COLUMNS, first[:len(SCAN_COLUMNS)]))
+        record["scan_id"] = str(record["scan_id"])
+        record["scanned_at"] = record["scanned_at"].isoformat()
+        record["member_id"] = str(record["member_id"]) if record["member_id"] else None
+        record["guest_details"] = [
+            {"name": row[-3], "contact": row[-2], "notes": row[-1]}
+            for row in (first, *scan_rows) if any(v is not None for v in row[-3:])
+        ]
+        yield json.dumps(record) + "\n"
+
+
+def _chunked(lines: Iterable[str]) -> Iterator[bytes]:
+    pending, size = [], 0
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield "".join(pending).encode()
+            pending, size = [], 0
+    if pending:
+        yield "".join(pending).encode()
+
+
+def _gzipped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
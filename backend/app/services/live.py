@@ -0,0 +1,112 @@
+"""
+In-process pub/sub for live dashboard summaries.
+
+scan handlers call `summary_hub.notify(event_id)` after committing. Each event
+with subscribers has one pump task that waits for a notification, sleeps for
+`interval_seconds` so a burst of scans collapses into a single update, loads
+the summary once and fans it out. Subscriber queues are bounded and drop their
+oldest entry when full: every entry is a complete summary, so a slow reader
+only ever misses intermediate states.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+
+from app.core.config import DASHBOARD_STREAM_INTERVAL_SECONDS, DASHBOARD_STREAM_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+SummaryLoader = Callable[[UUID], Awaitable[Optional[dict]]]
+
+
+class SummaryHub:
+    def __init__(self, interval_seconds: float, queue_size: int, loader: Optional[SummaryLoader] = None):
+        self.interval_seconds = interval_seconds
+        self.queue_size = queue_size
+        self.loader = loader
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: dict[UUID, set[asyncio.Queue]] = {}
+        self._dirty: dict[UUID, asyncio.Event] = {}
+        self._pumps: dict[UUID, asyncio.Task] = {}
+
+    def subscribe(self, event_id: UUID) -> asyncio.Queue:
+        """Register a subscriber; must be called from the event loop."""
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(event_id, set()).add(queue)
+        if event_id not in self._pumps:
+            self._dirty[event_id] = asyncio.Event()
+            self._pumps[event_id] = asyncio.create_task(self._pump(event_id))
+        return queue
+
+    def unsubscribe(self, event_id: UUID, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(event_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[event_id]
+            self._dirty.pop(event_id, None)
+            pump = self._pumps.pop(event_id, None)
+            if pump is not None:
+                pump.cancel()
+
+    def subscriber_count(self, event_id: UUID) -> int:
+        return len(self._subscribers.get(event_id, ()))
+
+    def notify(self, event_id: UUID) -> None:
+        """Mark an event's summary as changed. Safe to call from any thread."""
+        loop = self._loop
+        if loop is None or event_id not in self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._mark_dirty(event_id)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._mark_dirty, event_id)
+
+    def _mark_dirty(self, event_id: UUID) -> None:
+        dirty = self._dirty.get(event_id)
+        if dirty is not None:
+            dirty.set()
+
+    async def _pump(self, event_id: UUID) -> None:
+        dirty = self._dirty[event_id]
+        while True:
+            await dirty.wait()
+            await asyncio.sleep(self.interval_seconds)
+            dirty.clear()
+            try:
+                summary = await self.loader(event_id)
+            except Exception:
+                logger.exception("Failed to load live summary for event %s", event_id)
+                continue
+            for queue in list(self._subscribers.get(event_id, ())):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(summary)
+
+
+def summary_delta(previous: Optional[dict], current: dict) -> Optional[dict]:
+    """
+    EventSummary-shaped delta: totals plus only the membership types that changed.
+    Returns None when nothing changed.
+    """
+    if previous is None:
+        return current
+    changed = {
+        member_type: counts
+        for member_type, counts in current["by_membership_type"].items()
+        if previous["by_membership_type"].get(member_type) != counts
+    }
+    if not changed and current["total_check_ins"] == previous["total_check_ins"] \
+            and current["total_guests"] == previous["total_guests"]:
+        return None
+    return {**current, "by_membership_type": changed}
+
+
+summary_hub = SummaryHub(DASHBOARD_STREAM_INTERVAL_SECONDS, DASHBOARD_STREAM_QUEUE_SIZE)
@@ -0,0 +1,81 @@
+"""
+pass_id -> member resolution for scans that arrive without a member_id.
+
+`member_directory` caches a small immutable MemberRef per pass_id (misses are
+cached too, for a shorter time). Entries are invalidated through ORM events
+whenever a Member is inserted, updated or deleted in this process; the TTLs
+bound staleness for changes made elsewhere (other workers, bulk imports).
+"""
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.core.config import MEMBER_CACHE_MAX_SIZE, MEMBER_CACHE_NEGATIVE_TTL_SECONDS, MEMBER_CACHE_TTL_SECONDS
+from app.models.models import Member, MembershipType
+from app.services.ttl_cache import TTLCache
+
+
+@dataclass(frozen=True)
+class MemberRef:
+    """Detached view of a Member with the fields the scan path needs."""
+    id: UUID
+    full_name: str
+    membership_type: MembershipType
+    pass_id: str
+
+
+_MISSING = object()
+
+
+class MemberDirectory:
+    def __init__(self, ttl_seconds: float, negative_ttl_seconds: float, max_size: int, clock=time.monotonic):
+        # None is cached too: a pass with no member is a (negative) answer
+        self._cache = TTLCache(ttl_seconds, negative_ttl_seconds, max_size, clock=clock)
+
+    def lookup(self, db: Session, pass_id: str) -> Optional[MemberRef]:
+        return self.lookup_many(db, [pass_id]).get(pass_id)
+
+    def lookup_many(self, db: Session, pass_ids: Iterable[str]) -> dict[str, MemberRef]:
+        """Resolve pass_ids to members, querying only the cache misses (in one query)."""
+        found: dict[str, MemberRef] = {}
+        misses = []
+        for pass_id in set(pass_ids):
+            cached = self._cache.get(pass_id, _MISSING)
+            if cached is _MISSING:
+                misses.append(pass_id)
+            elif cached is not None:
+                found[pass_id] = cached
+
+        if misses:
+            rows = db.execute(
+                select(Member.id, Member.full_name, Member.membership_type, Member.pass_id)
+                .where(Member.pass_id.in_(misses))
+            )
+            loaded = {row.pass_id: MemberRef(*row) for row in rows}
+            for pass_id in misses:
+                self._cache.set(pass_id, loaded.get(pass_id))
+            found.update(loaded)
+        return found
+
+    def invalidate(self, pass_id: str) -> None:
+        self._cache.invalidate(pass_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+member_directory = MemberDirectory(MEMBER_CACHE_TTL_SECONDS, MEMBER_CACHE_NEGATIVE_TTL_SECONDS, MEMBER_CACHE_MAX_SIZE)
+
+
+@event.listens_for(Member, "after_insert")
+@event.listens_for(Member, "after_update")
+@event.listens_for(Member, "after_delete")
+def _invalidate_member(mapper, connection, target: Member) -> None:
+    member_directory.invalidate(target.pass_id)
+    # A changed pass_id must also drop the entry under the old value
+    for old_pass_id in inspect(target).attrs.pass_id.history.deleted:
+        member_directory.invalidate(old_pass_id)
@@ -0,0 +1,190 @@
+"""
+Prometheus metrics, served at GET /metrics.
+
+- HTTP: latency per route template, method and status (MetricsMiddleware).
+- DB: every statement on any SQLAlchemy engine is counted and timed through
+  cursor events; per request, the number of statements and their total time
+  are observed under the route. Pool gauges report `app.db.engine`.
+- PassKit: latency of live calls by outcome (passkit._record_outcome).
+- Scans: admission outcomes (accepted, invalid_pass, deferred, or the
+  rejection's error code, e.g. duplicate or guest_limit_exceeded), and
+  write-behind scans moved to the dead-letter file (scan_queue.py).
+
+Everything is in-process and lock-light (a few dict lookups and counter
+increments per request or statement), so it stays on in production. With
+several worker processes each serves its own numbers.
+"""
+import time
+from collections import Counter as StatementCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.db import engine
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed")
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Duration of individual SQL statements",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed while serving one request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 12, 20, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Total SQL statement time while serving one request",
+    ["route"],
+)
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out_connections", "Connections checked out of the pool")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow_connections", "Connections open beyond the pool size")
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured pool size")
+
+PASSKIT_REQUEST_DURATION = Histogram(
+    "passkit_request_duration_seconds",
+    "Latency of live PassKit calls by outcome",
+    ["outcome"],
+)
+PASSKIT_CIRCUIT_REJECTIONS = Counter(
+    "passkit_circuit_rejections_total", "PassKit calls refused while the circuit breaker was open"
+)
+SCAN_OUTCOMES = Counter("scan_outcomes_total", "Scan admission outcomes", ["outcome"])
+SCAN_QUEUE_DEAD_LETTERS = Counter(
+    "scan_queue_dead_letters_total", "Write-behind scans that could not be written and were dead-lettered"
+)
+
+
+class RequestQueries:
+    """SQL statements run on behalf of the current request; query_budget checks them too."""
+
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = StatementCounter()
+
+
+# Set by track_queries(); context variables follow the request into the threadpool
+current_queries: ContextVar[Optional[RequestQueries]] = ContextVar("current_queries", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[RequestQueries]:
+    """
+    Count the statements executed in this context (and threadpool work started from it).
+    Nested calls share the outer counter, so the metrics and budget middlewares see the same numbers.
+    """
+    queries = current_queries.get()
+    if queries is not None:
+        yield queries
+        return
+    queries = RequestQueries()
+    token = current_queries.set(queries)
+    try:
+        yield queries
+    finally:
+        current_queries.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    DB_QUERIES.inc()
+    DB_QUERY_DURATION.observe(elapsed)
+    queries = current_queries.get()
+    if queries is not None:
+        queries.count += 1
+        queries.seconds += elapsed
+        queries.statements[statement] += 1
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # after_cursor_execute doesn't run for failed statements
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def _pool_stat(name: str) -> float:
+    stat = getattr(engine.pool, name, None)
+    return stat() if callable(stat) else 0
+
+
+DB_POOL_CHECKED_OUT.set_function(lambda: _pool_stat("checkedout"))
+DB_POOL_OVERFLOW.set_function(lambda: max(_pool_stat("overflow"), 0))
+DB_POOL_SIZE.set_function(lambda: _pool_stat("size"))
+
+
+def observe_passkit_call(outcome: str, seconds: float) -> None:
+    PASSKIT_REQUEST_DURATION.labels(outcome).observe(seconds)
+
+
+def count_circuit_rejection() -> None:
+    PASSKIT_CIRCUIT_REJECTIONS.inc()
+
+
+def count_scan_outcome(outcome: str) -> None:
+    SCAN_OUTCOMES.labels(outcome).inc()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware: it would buffer streaming
+    responses) timing each HTTP request until its response is complete.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        with track_queries() as queries:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = _route_template(scope)
+                HTTP_REQUEST_DURATION.labels(scope["method"], route, str(status)).observe(time.perf_counter() - started)
+                DB_QUERIES_PER_REQUEST.labels(route).observe(queries.count)
+                DB_TIME_PER_REQUEST.labels(route).observe(queries.seconds)
+
+
+def _route_template(scope) -> str:
+    # Templates, not raw paths, keep label cardinality bounded
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
@@ -0,0 +1,170 @@
+"""
+Pre-event PassKit prefetch.
+
+Validates every member pass against PassKit ahead of an event and stores the
+verdicts in `pass_status`, so the first wave of arrivals is answered from the
+table instead of PassKit (see passkit.validate_pass). Calls run with bounded
+concurrency and a requests-per-second cap to stay inside PassKit's limits;
+passes that fail to validate are left untouched and retried on the next run.
+"""
+import asyncio
+import contextvars
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import case, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import PASS_PREFETCH_BATCH_SIZE, PASS_PREFETCH_CONCURRENCY, PASS_PREFETCH_RATE_PER_SECOND
+from app.db import dialect_insert, run_in_new_session
+from app.models.models import Member, PassStatus
+from app.services import passkit
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Spaces acquisitions at least 1/rate seconds apart (no bursts)."""
+
+    def __init__(self, rate_per_second: float, clock=time.monotonic, sleep=asyncio.sleep):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = self._clock()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await self._sleep(wait)
+
+
+@dataclass
+class PrefetchResult:
+    total: int = 0
+    valid: int = 0
+    invalid: int = 0
+    failed: int = 0
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+
+    @property
+    def checked(self) -> int:
+        return self.valid + self.invalid + self.failed
+
+
+def pass_ids_to_check(db: Session, refresh_all: bool = False) -> list[str]:
+    """Member passes without a `pass_status` row younger than half its trust window."""
+    query = select(Member.pass_id).outerjoin(PassStatus, PassStatus.pass_id == Member.pass_id)
+    if not refresh_all:
+        # Refresh before entries go stale mid-event, not just once they have
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=passkit.PASS_STATUS_MAX_AGE_SECONDS / 2)
+        query = query.where(or_(PassStatus.pass_id.is_(None), PassStatus.checked_at < cutoff))
+    return list(db.scalars(query.order_by(Member.pass_id)))
+
+
+def store_statuses(db: Session, rows: list[dict]) -> None:
+    table = PassStatus.__table__
+    stmt = dialect_insert(db, PassStatus)
+    # Only a different verdict gets a new row_version; re-checks that agree leave door-pack deltas alone
+    changed = or_(
+        table.c.is_valid.is_distinct_from(stmt.excluded.is_valid),
+        table.c.payload["status"].as_string().is_distinct_from(stmt.excluded.payload["status"].as_string()),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.pass_id],
+        set_={
+            **{column: stmt.excluded[column] for column in ("is_valid", "reason", "payload", "checked_at")},
+            "row_version": case((changed, stmt.excluded.row_version), else_=table.c.row_version),
+        },
+    )
+    db.execute(stmt, rows)
+    db.commit()
+
+
+async def prefetch_pass_statuses(
+    refresh_all: bool = False,
+    concurrency: int = PASS_PREFETCH_CONCURRENCY,
+    rate_per_second: float = PASS_PREFETCH_RATE_PER_SECOND,
+    result: Optional[PrefetchResult] = None,
+) -> PrefetchResult:
+    """Validate member passes live and upsert the verdicts; `result` is updated as calls complete."""
+    result = result or PrefetchResult()
+    pass_ids = await run_in_new_session(pass_ids_to_check, refresh_all)
+    result.total = len(pass_ids)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate_per_second)
+    pending: list[dict] = []
+
+    async def check(pass_id: str) -> None:
+        async with semaphore:
+            await limiter.acquire()
+            try:
+                is_valid, reason, payload = await passkit.refresh_pass_async(pass_id)
+            except passkit.PasskitValidationError:
+                result.failed += 1
+                return
+        if is_valid:
+            result.valid += 1
+        else:
+            result.invalid += 1
+        pending.append({
+            "pass_id": pass_id,
+            "is_valid": is_valid,
+            "reason": reason,
+            "payload": payload,
+            "checked_at": datetime.now(timezone.utc),
+        })
+
+    # Feed the workers in batches so tasks and unsaved rows stay bounded
+    for start in range(0, len(pass_ids), PASS_PREFETCH_BATCH_SIZE):
+        await asyncio.gather(*(check(p) for p in pass_ids[start:start + PASS_PREFETCH_BATCH_SIZE]))
+        if pending:
+            rows, pending = pending, []
+            await run_in_new_session(store_statuses, rows)
+
+    result.finished_at = datetime.now(timezone.utc)
+    logger.info(
+        "PassKit prefetch: %d passes, %d valid, %d invalid, %d failed",
+        result.total, result.valid, result.invalid, result.failed,
+    )
+    return result
+
+
+class PrefetchJob:
+    """The prefetch run started from the admin API; one at a time per process."""
+
+    def __init__(self):
+        self.result: Optional[PrefetchResult] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, refresh_all: bool = False) -> PrefetchResult:
+        if self.running:
+            raise RuntimeError("A PassKit prefetch is already running")
+        self.result = PrefetchResult()
+        # In an empty context: the task would otherwise inherit the starting request's context
+        # variables, and its queries would count against that request's budget and metrics
+        self._task = contextvars.Context().run(
+            asyncio.create_task, prefetch_pass_statuses(refresh_all, result=self.result)
+        )
+        self._task.add_done_callback(_log_failure)
+        return self.result
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("PassKit prefetch failed", exc_info=task.exception())
+
+
+prefetch_job = PrefetchJob()
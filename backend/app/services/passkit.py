@@ -1,62 +1,464 @@
+import asyncio
 import os
+import time
+import threading
 import httpx
 import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone
 from typing import Tuple, Optional
 
-from app.services.passkit_auth import make_passkit_jwt
+from sqlalchemy import select
+
+from app.db import in_new_session, run_db, run_in_new_session
+from app.models.models import PassStatus
+from app.services import metrics
+from app.services.passkit_auth import token_manager
+from app.services.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
 IS_STUB_MODE = os.getenv("ENV", "prod") == "dev"
 BASE_URL = os.getenv("PASSKIT_BASE_URL", "https://api.passkit.com")
 
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "5"))
+POOL_MAX_CONNECTIONS = int(os.getenv("PASSKIT_POOL_MAX_CONNECTIONS", "20"))
+POOL_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("PASSKIT_POOL_MAX_KEEPALIVE_CONNECTIONS", "10"))
+POOL_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("PASSKIT_POOL_KEEPALIVE_EXPIRY_SECONDS", "30"))
+HTTP2_ENABLED = os.getenv("PASSKIT_HTTP2", "0") == "1"
+
+CACHE_TTL_SECONDS = float(os.getenv("PASSKIT_CACHE_TTL_SECONDS", "300"))
+CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("PASSKIT_CACHE_NEGATIVE_TTL_SECONDS", "30"))
+CACHE_MAX_SIZE = int(os.getenv("PASSKIT_CACHE_MAX_SIZE", "10000"))
+
+# How long prefetched `pass_status` rows are trusted instead of a live call
+PASS_STATUS_MAX_AGE_SECONDS = float(os.getenv("PASS_STATUS_MAX_AGE_SECONDS", "21600"))
+PASS_STATUS_NEGATIVE_MAX_AGE_SECONDS = float(os.getenv("PASS_STATUS_NEGATIVE_MAX_AGE_SECONDS", "900"))
+
+# Circuit breaker: open after N consecutive outage errors, or when p95 latency over the
+# last BREAKER_LATENCY_WINDOW calls exceeds BREAKER_P95_SECONDS; probe again after BREAKER_OPEN_SECONDS
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("PASSKIT_BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_P95_SECONDS = float(os.getenv("PASSKIT_BREAKER_P95_SECONDS", "2.0"))
+BREAKER_LATENCY_WINDOW = int(os.getenv("PASSKIT_BREAKER_LATENCY_WINDOW", "50"))
+BREAKER_MIN_SAMPLES = int(os.getenv("PASSKIT_BREAKER_MIN_SAMPLES", "20"))
+BREAKER_OPEN_SECONDS = float(os.getenv("PASSKIT_BREAKER_OPEN_SECONDS", "30"))
+# Send a second, hedged request when the first hasn't answered after this long (0 disables)
+HEDGE_DELAY_SECONDS = float(os.getenv("PASSKIT_HEDGE_DELAY_SECONDS", "0"))
+
+ValidationResult = Tuple[bool, Optional[str], Optional[dict]]
+
 class PasskitValidationError(Exception):
     pass
 
-def passkit_client() -> httpx.Client:
-    jwt = make_passkit_jwt(ttl_seconds=60)
-    return httpx.Client(
+class PasskitOutage(PasskitValidationError):
+    """PassKit is down, slow or throttling (network error, 5xx, 429): nothing is known about the pass."""
+
+class PasskitUnavailable(PasskitOutage):
+    """Raised without calling PassKit while the circuit breaker is open."""
+
+class PasskitPassRejected(PasskitValidationError):
+    """PassKit answered, but refused the pass with a 4xx (e.g. 404 for a pass it doesn't know)."""
+
+
+class PassValidationCache(TTLCache):
+    """
+    TTL + LRU cache of validate_pass() results keyed by pass_id.
+
+    Valid passes are kept for `ttl_seconds`; REVOKED/EXPIRED results use the
+    shorter `negative_ttl_seconds` so a reinstated pass is picked up quickly.
+    Errors are never cached.
+    """
+
+    def is_positive(self, result: ValidationResult) -> bool:
+        return result[0]
+
+
+validation_cache = PassValidationCache(
+    ttl_seconds=CACHE_TTL_SECONDS,
+    negative_ttl_seconds=CACHE_NEGATIVE_TTL_SECONDS,
+    max_size=CACHE_MAX_SIZE,
+)
+
+class CircuitBreaker:
+    """
+    Fail fast while PassKit is down or slow.
+
+    Closed: calls go through; `failure_threshold` consecutive outage errors
+    (network errors, 5xx, 429) or a p95 latency above `p95_seconds` over the
+    last `window` calls open the circuit. Open: calls are refused for
+    `open_seconds`. Half-open: one probe call is let through; its outcome
+    closes or re-opens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        p95_seconds: float = BREAKER_P95_SECONDS,
+        window: int = BREAKER_LATENCY_WINDOW,
+        min_samples: int = BREAKER_MIN_SAMPLES,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        clock=time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.p95_seconds = p95_seconds
+        self.min_samples = min_samples
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._latencies: deque = deque(maxlen=window)
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at < self.open_seconds:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self, latency_seconds: float) -> None:
+        with self._lock:
+            self._probing = False
+            self._failures = 0
+            if self._opened_at is not None:
+                self._close()
+                return
+            self._latencies.append(latency_seconds)
+            if len(self._latencies) >= self.min_samples and self._p95() > self.p95_seconds:
+                self._open("p95 latency %.2fs" % self._p95())
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._probing = False
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._open(f"{self._failures} consecutive failures")
+
+    def record_abandoned(self) -> None:
+        """A call was cancelled before PassKit answered: no verdict, but the next call may probe."""
+        with self._lock:
+            self._probing = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _p95(self) -> float:
+        ordered = sorted(self._latencies)
+        return ordered[max(int(len(ordered) * 0.95) - 1, 0)]
+
+    def _open(self, why: str) -> None:
+        if self._state() == self.CLOSED:
+            logger.warning("PassKit circuit opened: %s", why)
+        self._opened_at = self._clock()
+        self._latencies.clear()
+
+    def _close(self) -> None:
+        if self._opened_at is not None:
+            logger.info("PassKit circuit closed")
+        self._opened_at = None
+        self._failures = 0
+        self._probing = False
+        self._latencies.clear()
+
+
+breaker = CircuitBreaker()
+
+class PasskitJWTAuth(httpx.Auth):
+    """Attach the cached PassKit bearer token to each outgoing request."""
+
+    def auth_flow(self, request):
+        request.headers["Authorization"] = f"Bearer {token_manager.get_token()}"
+        yield request
+
+
+def _http2_supported() -> bool:
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("PASSKIT_HTTP2=1 but the 'h2' package is not installed; falling back to HTTP/1.1")
+        return False
+    return True
+
+
+def _client_options() -> dict:
+    return dict(
         base_url=BASE_URL,
+        auth=PasskitJWTAuth(),
         headers={
-            "Authorization": f"Bearer {jwt}",
             "Accept": "application/json",
             "Content-Type": "application/json",
         },
-        timeout=float(os.getenv("HTTP_TIMEOUT_SECONDS", "5")),
+        timeout=HTTP_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        http2=_http2_supported(),
     )
 
+
+def passkit_client() -> httpx.Client:
+    """Build a PassKit client with the configured connection pool."""
+    return httpx.Client(**_client_options())
+
+
+def passkit_async_client() -> httpx.AsyncClient:
+    """Async counterpart of passkit_client() for the async scan path."""
+    return httpx.AsyncClient(**_client_options())
+
+
+_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_client_lock = threading.Lock()
+
+def get_passkit_client() -> httpx.Client:
+    """Return the process-wide PassKit client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        with _client_lock:
+            if _client is None or _client.is_closed:
+                _client = passkit_client()
+    return _client
+
+def get_passkit_async_client() -> httpx.AsyncClient:
+    """Return the process-wide async PassKit client (bound to the running event loop)."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = passkit_async_client()
+    return _async_client
+
+def close_passkit_client() -> None:
+    """Close the shared PassKit client; called from the app lifespan on shutdown."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+async def close_passkit_async_client() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
 def validate_pass(pass_id: str) -> Tuple[bool, Optional[str], Optional[dict]]:
     """
     Validate a digital pass via the PassKit API.
+    Results are served from `validation_cache`, then from a fresh prefetched
+    `pass_status` row, before calling PassKit.
     Returns:
         (is_valid, reason_if_invalid, payload_dict_or_none)
     """
     if IS_STUB_MODE:
         return True, None, {"passId": pass_id, "status": "ACTIVE", "stub_mode": True}
 
+    cached = validation_cache.get(pass_id)
+    if cached is not None:
+        return cached
+
     try:
-        with passkit_client() as client:
-            response = client.get(f"/pass/{pass_id}")
-            response.raise_for_status()
+        result = in_new_session(_stored_status, pass_id)
+    except Exception:
+        # The table only saves a PassKit round trip: never fail validation because of it
+        logger.warning("pass_status lookup failed; validating %s live", pass_id, exc_info=True)
+        result = None
+    if result is None:
+        result = _fetch_pass(pass_id)
+    validation_cache.set(pass_id, result)
+    return result
+
+async def validate_pass_async(
+    pass_id: str, db=None, stored: Optional[dict] = None
+) -> Tuple[bool, Optional[str], Optional[dict]]:
+    """
+    Same contract as validate_pass(), without blocking the event loop on PassKit.
+
+    `pass_status` is read on `db`, the caller's session, so a scan doesn't check out
+    a second pool connection; callers validating many passes instead pass `stored`,
+    their stored_statuses() read in one query. Without either, a short-lived
+    session of its own is used.
+    """
+    if IS_STUB_MODE:
+        return True, None, {"passId": pass_id, "status": "ACTIVE", "stub_mode": True}
+
+    cached = validation_cache.get(pass_id)
+    if cached is not None:
+        return cached
 
-            data = response.json()
-            status = data.get("status", "").upper()
+    if stored is not None:
+        result = stored.get(pass_id)
+    elif db is not None:
+        # Not caught: a failed query has already spoilt the caller's transaction
+        result = await run_db(db, _stored_status, pass_id)
+    else:
+        try:
+            result = await run_in_new_session(_stored_status, pass_id)
+        except Exception:
+            logger.warning("pass_status lookup failed; validating %s live", pass_id, exc_info=True)
+            result = None
+    if result is None:
+        result = await _fetch_pass_async(pass_id)
+    validation_cache.set(pass_id, result)
+    return result
 
-            if status == "REVOKED":
-                return False, "Pass is revoked", data
-            elif status == "EXPIRED":
-                return False, "Pass is expired", data
-            else:
-                return True, None, data
+async def refresh_pass_async(pass_id: str) -> ValidationResult:
+    """Live PassKit check that skips the cache and `pass_status`; the result refreshes the cache."""
+    if IS_STUB_MODE:
+        return True, None, {"passId": pass_id, "status": "ACTIVE", "stub_mode": True}
+
+    result = await _fetch_pass_async(pass_id)
+    validation_cache.set(pass_id, result)
+    return result
+
+def stored_statuses(db, pass_ids) -> dict[str, ValidationResult]:
+    """Prefetched verdicts from `pass_status` recent enough to trust, for those of `pass_ids` that have one."""
+    rows = db.execute(
+        select(PassStatus.pass_id, PassStatus.is_valid, PassStatus.reason, PassStatus.payload, PassStatus.checked_at)
+        .where(PassStatus.pass_id.in_(pass_ids))
+    )
+    now = datetime.now(timezone.utc)
+    verdicts = {}
+    for row in rows:
+        max_age = PASS_STATUS_MAX_AGE_SECONDS if row.is_valid else PASS_STATUS_NEGATIVE_MAX_AGE_SECONDS
+        checked_at = row.checked_at.replace(tzinfo=timezone.utc) if row.checked_at.tzinfo is None else row.checked_at
+        if checked_at >= now - timedelta(seconds=max_age):
+            verdicts[row.pass_id] = row.is_valid, row.reason, row.payload
+    return verdicts
 
-    except httpx.HTTPStatusError as e:
+def _stored_status(db, pass_id: str) -> Optional[ValidationResult]:
+    return stored_statuses(db, [pass_id]).get(pass_id)
+
+def _fetch_pass(pass_id: str) -> ValidationResult:
+    if not breaker.allow():
+        metrics.count_circuit_rejection()
+        raise PasskitUnavailable("PassKit is unavailable (circuit open)")
+    started = time.monotonic()
+    try:
+        result = _parse_response(get_passkit_client().get(f"/pass/{pass_id}"))
+    except Exception as e:
+        _record_outcome(e, started)
+        raise _validation_error(e)
+    _record_outcome(None, started, result)
+    return result
+
+async def _fetch_pass_async(pass_id: str) -> ValidationResult:
+    if not breaker.allow():
+        metrics.count_circuit_rejection()
+        raise PasskitUnavailable("PassKit is unavailable (circuit open)")
+    started = time.monotonic()
+    try:
+        result = await _hedged(lambda: _request_pass_async(pass_id))
+    except asyncio.CancelledError:
+        # Client gone or shutting down; a cancelled probe must not leave the breaker half-open forever
+        breaker.record_abandoned()
+        raise
+    except Exception as e:
+        _record_outcome(e, started)
+        raise _validation_error(e)
+    _record_outcome(None, started, result)
+    return result
+
+async def _request_pass_async(pass_id: str) -> ValidationResult:
+    return _parse_response(await get_passkit_async_client().get(f"/pass/{pass_id}"))
+
+async def _hedged(call):
+    """
+    Await `call()`; if it hasn't finished after HEDGE_DELAY_SECONDS, start a second
+    attempt and return whichever succeeds first (the other is cancelled).
+    """
+    if HEDGE_DELAY_SECONDS <= 0:
+        return await call()
+    tasks = [asyncio.ensure_future(call())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=HEDGE_DELAY_SECONDS)
+        if done:
+            return tasks[0].result()
+
+        tasks.append(asyncio.ensure_future(call()))
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        # Also when we are cancelled ourselves, so no attempt outlives the caller
+        for task in tasks:
+            task.cancel()
+
+def _record_outcome(error: Optional[Exception], started: float, result: Optional[ValidationResult] = None) -> None:
+    elapsed = time.monotonic() - started
+    # Only outages count against PassKit; a 4xx for one pass means it is answering fine
+    if _is_outage(error):
+        breaker.record_failure()
+    else:
+        breaker.record_success(elapsed)
+    metrics.observe_passkit_call(_outcome_label(error, result), elapsed)
+
+def _is_outage(error: Optional[Exception]) -> bool:
+    return isinstance(error, httpx.RequestError) or (
+        isinstance(error, httpx.HTTPStatusError)
+        and (error.response.status_code >= 500 or error.response.status_code == 429)
+    )
+
+def _outcome_label(error: Optional[Exception], result: Optional[ValidationResult]) -> str:
+    if error is None:
+        return "valid" if result[0] else "invalid"
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"http_{error.response.status_code // 100}xx"
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.RequestError):
+        return "network_error"
+    return "error"
+
+def _parse_response(response: httpx.Response) -> ValidationResult:
+    response.raise_for_status()
+
+    data = response.json()
+    status = data.get("status", "").upper()
+
+    if status == "REVOKED":
+        return False, "Pass is revoked", data
+    elif status == "EXPIRED":
+        return False, "Pass is expired", data
+    else:
+        return True, None, data
+
+def _validation_error(e: Exception) -> PasskitValidationError:
+    if isinstance(e, httpx.HTTPStatusError):
         logger.error(f"PassKit HTTP error: {e.response.status_code} - {e.response.text}")
-        raise PasskitValidationError(f"PassKit error: {e.response.status_code}")
+        error_type = PasskitOutage if _is_outage(e) else PasskitPassRejected
+        return error_type(f"PassKit error: {e.response.status_code}")
 
-    except httpx.RequestError as e:
+    if isinstance(e, httpx.RequestError):
         logger.error(f"PassKit network error: {e}")
-        raise PasskitValidationError("Network error during PassKit validation")
+        return PasskitOutage("Network error during PassKit validation")
 
-    except Exception as e:
-        logger.exception("Unexpected error during PassKit validation")
-        raise PasskitValidationError("Unexpected internal error during pass validation")
+    logger.exception("Unexpected error during PassKit validation", exc_info=e)
+    return PasskitValidationError("Unexpected internal error during pass validation")
@@ -1,13 +1,125 @@
-import os, time, hmac, hashlib, base64, json
+import os, time, hmac, hashlib, base64, json, threading, logging
+from typing import NamedTuple, Optional
 API_KEY = os.getenv("PASSKIT_API_KEY", "")
 API_SECRET = os.getenv("PASSKIT_API_SECRET", "")
 USERNAME = os.getenv("PASSKIT_USERNAME", "")
+# Tolerated clock difference between us and PassKit: tokens are issued this far in the past
+# and treated as expired this far before their `exp`.
+CLOCK_SKEW_SECONDS = int(os.getenv("PASSKIT_JWT_CLOCK_SKEW_SECONDS", "10"))
+TOKEN_TTL_SECONDS = int(os.getenv("PASSKIT_JWT_TTL_SECONDS", "120"))
+REFRESH_MARGIN_SECONDS = int(os.getenv("PASSKIT_JWT_REFRESH_MARGIN_SECONDS", "30"))
+logger = logging.getLogger(__name__)
 def _b64url(b: bytes) -> str: return base64.urlsafe_b64encode(b).decode().rstrip("=")
-def make_passkit_jwt(ttl_seconds: int = 120) -> str:
-    header = {"alg": "HS256", "typ": "JWT"}
-    now = int(time.time())
-    payload = {"uid": API_KEY, "username": USERNAME, "iat": now - 10, "exp": now + ttl_seconds}
-    h = _b64url(json.dumps(header, separators=(",", ":")).encode())
+_HEADER_SEGMENT = _b64url(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+def make_passkit_jwt(ttl_seconds: int = 120, skew_seconds: int = CLOCK_SKEW_SECONDS, now: Optional[int] = None) -> str:
+    now = int(time.time()) if now is None else now
+    payload = {"uid": API_KEY, "username": USERNAME, "iat": now - skew_seconds, "exp": now + ttl_seconds}
     p = _b64url(json.dumps(payload, separators=(",", ":")).encode())
-    sig = hmac.new(API_SECRET.encode(), f"{h}.{p}".encode(), hashlib.sha256).digest()
-    return f"{h}.{p}.{_b64url(sig)}"
\ No newline at end of file
+    sig = hmac.new(API_SECRET.encode(), f"{_HEADER_SEGMENT}.{p}".encode(), hashlib.sha256).digest()
+    return f"{_HEADER_SEGMENT}.{p}.{_b64url(sig)}"
+
+
+class _Token(NamedTuple):
+    value: str
+    refresh_at: float
+    expires_at: float
+
+
+class PasskitTokenManager:
+    """
+    Mint a PassKit JWT once and reuse it until it nears expiry.
+
+    A token is considered usable until `exp - skew_seconds`; from
+    `refresh_margin_seconds` before that point a replacement is minted off the
+    request path (by the background thread from `start()`, or a one-off thread
+    when it isn't running). Only the very first call, or a call after the token
+    has fully lapsed, signs inline.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = TOKEN_TTL_SECONDS,
+        refresh_margin_seconds: int = REFRESH_MARGIN_SECONDS,
+        skew_seconds: int = CLOCK_SKEW_SECONDS,
+        clock=time.time,
+    ):
+        if ttl_seconds <= skew_seconds + refresh_margin_seconds:
+            raise ValueError("ttl_seconds must exceed skew_seconds + refresh_margin_seconds")
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.skew_seconds = skew_seconds
+        self._clock = clock
+        self._token: Optional[_Token] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get_token(self) -> str:
+        token = self._token
+        now = self._clock()
+        if token is not None and now < token.expires_at:
+            if now >= token.refresh_at:
+                self._refresh_in_background()
+            return token.value
+        return self.refresh().value
+
+    def refresh(self) -> _Token:
+        with self._lock:
+            now = self._clock()
+            current = self._token
+            # Another caller may have refreshed while we waited for the lock
+            if current is not None and now < current.refresh_at:
+                return current
+            issued = int(now)
+            expires_at = issued + self.ttl_seconds - self.skew_seconds
+            self._token = _Token(
+                value=make_passkit_jwt(self.ttl_seconds, self.skew_seconds, now=issued),
+                refresh_at=expires_at - self.refresh_margin_seconds,
+                expires_at=expires_at,
+            )
+            return self._token
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="passkit-token-refresh", daemon=True).start()
+
+    def start(self) -> None:
+        """Start the background refresher; the first token is minted immediately."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name="passkit-token-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            token = self._token
+            wait = max(token.refresh_at - self._clock(), 0) if token else 0
+            if self._stop.wait(wait):
+                break
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("PassKit token refresh failed")
+                self._stop.wait(1)
+
+
+token_manager = PasskitTokenManager()
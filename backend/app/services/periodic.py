@@ -0,0 +1,48 @@
+"""
+Background jobs that run every few seconds inside the app's event loop.
+
+A PeriodicTask is started from the lifespan and cancelled on shutdown. A run
+that raises is logged and the job carries on at the next interval.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Awaits run_once() every `interval_seconds` between start() and stop()."""
+
+    failure_message = "Periodic task failed"
+    run_at_start = False  # or wait one interval first
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> None:
+        raise NotImplementedError
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        delay = 0 if self.run_at_start else self.interval_seconds
+        while True:
+            await asyncio.sleep(delay)
+            delay = self.interval_seconds
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception(self.failure_message)
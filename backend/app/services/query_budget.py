@@ -0,0 +1,106 @@
+"""
+Per-request SQL statement budgets and N+1 detection.
+
+Statements are counted by the metrics module's cursor events (any engine, sync
+or async) into the request's metrics.RequestQueries, so nothing is counted
+twice. At the end of the request QueryBudgetMiddleware compares the count with the route's entry in
+ROUTE_BUDGETS and reports identical statements run QUERY_REPEAT_THRESHOLD or
+more times, the usual signature of a lazy load inside a loop.
+
+In production the middleware only logs (enable with QUERY_BUDGET_WARNINGS=1).
+The test suite installs it on its client with a collector, so any request
+over its route's budget fails the test that made it (see tests/conftest.py).
+"""
+import logging
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from app.core.config import QUERY_REPEAT_THRESHOLD
+from app.services.metrics import RequestQueries, track_queries
+
+logger = logging.getLogger(__name__)
+
+# Statements per request, by (method, route template), for the worst case (cold caches).
+# Roster import is budgeted for a file that fits in one chunk; None means unbounded
+# (the live stream runs one query per update for as long as it stays open).
+ROUTE_BUDGETS: dict[tuple[str, str], Optional[int]] = {
+    # event with its admitted passes, pass_status, member, scan, guest details, counters;
+    # a warm scan (event indexed, no guest details) runs the last four (see tests)
+    ("POST", "/api/v1/scan/"): 6,
+    # events, members by id, members by pass, existing scans, pass_status, scans, guest details, counters
+    ("POST", "/api/v1/scan/batch"): 8,
+    ("POST", "/api/v1/events/"): 4,
+    ("GET", "/api/v1/events/"): 4,
+    ("GET", "/api/v1/events/{event_id}"): 1,
+    ("GET", "/api/v1/events/{event_id}/door-pack"): 5,
+    ("GET", "/api/v1/dashboard/events/{event_id}/summary"): 2,
+    # event (cold cache only), buckets
+    ("GET", "/api/v1/dashboard/events/{event_id}/arrivals"): 2,
+    ("GET", "/api/v1/dashboard/events/{event_id}/stream"): None,
+    ("GET", "/api/v1/dashboard/reports/attendance"): 1,
+    ("GET", "/api/v1/dashboard/events/{event_id}/export"): 2,
+    ("POST", "/api/v1/admin/members/import"): 4,
+    ("POST", "/api/v1/admin/passes/prefetch"): 0,
+    ("GET", "/api/v1/admin/passes/prefetch"): 0,
+}
+
+
+def repeated_statements(queries: RequestQueries, threshold: int = QUERY_REPEAT_THRESHOLD) -> list[tuple[str, int]]:
+    return [(statement, n) for statement, n in queries.statements.most_common() if n >= threshold]
+
+
+@dataclass
+class BudgetReport:
+    method: str
+    route: str
+    count: int
+    budget: Optional[int]
+    repeated: list[tuple[str, int]]
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+
+def log_report(report: BudgetReport) -> None:
+    if report.over_budget:
+        logger.warning("%s %s ran %d SQL statements (budget %d)", report.method, report.route,
+                       report.count, report.budget)
+    for statement, n in report.repeated:
+        logger.warning("%s %s ran the same statement %d times (N+1?): %s", report.method, report.route,
+                       n, " ".join(statement.split())[:200])
+
+
+class QueryBudgetMiddleware:
+    """Pure ASGI middleware checking each request against ROUTE_BUDGETS; reports go to `on_report`."""
+
+    def __init__(
+        self,
+        app,
+        budgets: dict[tuple[str, str], Optional[int]] = ROUTE_BUDGETS,
+        on_report: Callable[[BudgetReport], None] = log_report,
+    ):
+        self.app = app
+        self.budgets = budgets
+        self.on_report = on_report
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as queries:
+            await self.app(scope, receive, send)
+
+        route = getattr(scope.get("route"), "path", None)
+        if route is None:
+            return
+        report = BudgetReport(
+            method=scope["method"],
+            route=route,
+            count=queries.count,
+            budget=self.budgets.get((scope["method"], route)),
+            repeated=repeated_statements(queries),
+        )
+        if report.over_budget or report.repeated:
+            self.on_report(report)
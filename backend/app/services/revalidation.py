@@ -0,0 +1,114 @@
+"""
+Deferred admissions and their re-validation.
+
+Events with passkit_outage_policy="admit_deferred" keep admitting while
+PassKit is unavailable: scans are stored with is_valid=True and
+validation_reason="deferred". The re-validator re-checks those passes once
+the circuit breaker lets calls through again and records PassKit's verdict;
+a pass that turns out revoked or expired, or that PassKit refuses with a 4xx,
+stays admitted but is marked invalid with PassKit's reason, for follow-up.
+Scans are only deferred on outages (network errors, 5xx, 429, circuit open);
+a pass PassKit refuses at the door is rejected.
+"""
+import logging
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import REVALIDATE_BATCH_SIZE, REVALIDATE_INTERVAL_SECONDS
+from app.db import run_in_new_session
+from app.models.models import Event, Scan
+from app.services import passkit
+from app.services.attendance import increment_counters, scan_label
+from app.services.live import summary_hub
+from app.services.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+DEFERRED = "deferred"
+ADMIT_DEFERRED = "admit_deferred"
+
+
+def admits_deferred(db: Session, event_id: UUID) -> bool:
+    policy = db.scalar(select(Event.passkit_outage_policy).where(Event.id == event_id))
+    return policy == ADMIT_DEFERRED
+
+
+def deferred_pass_ids(db: Session, limit: int) -> list[str]:
+    rows = db.scalars(
+        select(Scan.pass_id)
+        .where(Scan.validation_reason == DEFERRED)
+        .order_by(Scan.scanned_at)
+        .limit(limit)
+    )
+    return list(dict.fromkeys(rows))
+
+
+def apply_verdicts(db: Session, verdicts: dict[str, passkit.ValidationResult]) -> set[UUID]:
+    """Record PassKit's verdict on every still-deferred scan of these passes; returns touched events."""
+    scans = db.scalars(
+        select(Scan)
+        .options(selectinload(Scan.member))
+        .where(Scan.validation_reason == DEFERRED, Scan.pass_id.in_(verdicts))
+        .with_for_update(skip_locked=True)  # another worker may be on the same rows
+    ).all()
+
+    increments: dict = {}
+    for scan in scans:
+        is_valid, reason, payload = verdicts[scan.pass_id]
+        # Unlinked scans are labelled from the PassKit payload they now have
+        before = scan_label(scan.member, scan.passkit_payload)
+        after = scan_label(scan.member, payload)
+        if before != after:
+            for key, sign in (((scan.event_id, before), -1), ((scan.event_id, after), 1)):
+                members, guests = increments.get(key, (0, 0))
+                increments[key] = (members + sign, guests + sign * scan.guests)
+        if not is_valid:
+            logger.warning("Deferred admission of pass %s at event %s failed re-validation: %s",
+                           scan.pass_id, scan.event_id, reason)
+        scan.is_valid = is_valid
+        scan.validation_reason = reason
+        scan.passkit_payload = payload
+
+    increment_counters(db, increments)
+    db.commit()
+    return {scan.event_id for scan in scans}
+
+
+async def revalidate_deferred(limit: int = REVALIDATE_BATCH_SIZE) -> int:
+    """Re-check up to `limit` deferred scans; returns how many passes got a verdict."""
+    if passkit.breaker.state == passkit.CircuitBreaker.OPEN:
+        return 0
+    pass_ids = await run_in_new_session(deferred_pass_ids, limit)
+
+    verdicts = {}
+    for pass_id in pass_ids:
+        try:
+            verdicts[pass_id] = await passkit.refresh_pass_async(pass_id)
+        except passkit.PasskitOutage:
+            break  # still unavailable; the rest wait for the next round
+        except passkit.PasskitPassRejected as e:
+            # PassKit answered for this pass (e.g. 404 for a forged one): that is its verdict
+            verdicts[pass_id] = False, str(e), None
+        except passkit.PasskitValidationError:
+            logger.warning("Re-validating deferred pass %s failed; skipping it this round", pass_id, exc_info=True)
+
+    if verdicts:
+        for event_id in await run_in_new_session(apply_verdicts, verdicts):
+            summary_hub.notify(event_id)
+    return len(verdicts)
+
+
+class Revalidator(PeriodicTask):
+    """Runs revalidate_deferred() every `interval_seconds`."""
+
+    failure_message = "Re-validating deferred scans failed"
+
+    async def run_once(self) -> None:
+        # Drain the backlog in batches while PassKit keeps answering
+        while await revalidate_deferred() == REVALIDATE_BATCH_SIZE:
+            pass
+
+
+revalidator = Revalidator(REVALIDATE_INTERVAL_SECONDS)
@@ -0,0 +1,238 @@
+"""
+Daily attendance rollup for season reporting.
+
+`daily_attendance_rollup` holds check-ins and guests per (UTC day, event,
+membership label, scan kind), so reports across a season read a few rows per
+event instead of every scan. The rollup job re-aggregates only the
+(event, day) groups with scans changed since its watermark (the highest
+`scans.row_version` it has seen, minus ATTENDANCE_ROLLUP_OVERLAP_SECONDS to
+cover transactions still in flight). Groups are rewritten from `scans`, so
+re-running the job, or running it in several workers, gives the same rows.
+
+Labels are resolved when a group is rolled up, as for the event counters.
+Deleted scans only drop out on a rebuild (`python -m app.cli rollup-attendance --rebuild`).
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import Date, delete, func, select, type_coerce
+from sqlalchemy.orm import Session
+
+from app.core.config import ATTENDANCE_ROLLUP_INTERVAL_SECONDS, ATTENDANCE_ROLLUP_OVERLAP_SECONDS
+from app.db import dialect_insert, run_in_new_session
+from app.models.models import DailyAttendanceRollup, Member, RollupWatermark, Scan
+from app.services.attendance import membership_label
+from app.services.periodic import PeriodicTask
+
+WATERMARK = "daily_attendance_rollup"
+
+RollupKey = tuple[date, UUID, str, str]  # (day, event_id, membership label, kind)
+
+
+@dataclass
+class RollupResult:
+    groups: int = 0  # (event, day) groups re-aggregated
+    rows: int = 0  # rollup rows written
+    watermark: int = 0
+
+
+def scan_day():
+    """SQL expression for the UTC calendar day of a scan."""
+    return type_coerce(func.date(Scan.scanned_at), Date)
+
+
+def aggregate_scans(
+    db: Session,
+    event_id: Optional[UUID] = None,
+    first_day: Optional[date] = None,
+    last_day: Optional[date] = None,
+) -> dict[RollupKey, tuple[int, int]]:
+    """(members, guests) per rollup key straight from `scans`, optionally for one event and a day range."""
+    # Group on the labelled subquery's columns (see attendance.recompute_counters)
+    labeled = (
+        select(
+            scan_day().label("day"),
+            Scan.event_id,
+            membership_label().label("membership_label"),
+            Scan.kind,
+            Scan.guests,
+        )
+        .select_from(Scan)
+        .outerjoin(Member, Scan.member_id == Member.id)
+        .where(Scan.mode == "in")
+    )
+    if event_id is not None:
+        labeled = labeled.where(Scan.event_id == event_id)
+    if first_day is not None:
+        labeled = labeled.where(Scan.scanned_at >= datetime.combine(first_day, time()))
+    if last_day is not None:
+        labeled = labeled.where(Scan.scanned_at < datetime.combine(last_day + timedelta(days=1), time()))
+    labeled = labeled.subquery()
+
+    keys = (labeled.c.day, labeled.c.event_id, labeled.c.membership_label, labeled.c.kind)
+    rows = db.execute(
+        select(*keys, func.count(), func.coalesce(func.sum(labeled.c.guests), 0)).group_by(*keys)
+    )
+    return {(day, eid, label, kind): (members, guests) for day, eid, label, kind, members, guests in rows}
+
+
+def changed_groups(db: Session, after_version: int) -> tuple[dict[UUID, set[date]], int]:
+    """Days per event with scans whose row_version is above `after_version`, and the highest version seen."""
+    rows = db.execute(
+        select(Scan.event_id, scan_day().label("day"), func.max(Scan.row_version))
+        .where(Scan.row_version > after_version)
+        .group_by(Scan.event_id, scan_day())
+    )
+    groups: dict[UUID, set[date]] = {}
+    highest = after_version
+    for event_id, day, version in rows:
+        groups.setdefault(event_id, set()).add(day)
+        highest = max(highest, version)
+    return groups, highest
+
+
+def read_watermark(db: Session) -> Optional[int]:
+    return db.scalar(select(RollupWatermark.row_version).where(RollupWatermark.name == WATERMARK))
+
+
+def _write_watermark(db: Session, version: int) -> None:
+    table = RollupWatermark.__table__
+    stmt = dialect_insert(db, RollupWatermark).values(name=WATERMARK, row_version=version)
+    # Never move backwards if a concurrent run got further (two-argument max() is SQLite's greatest())
+    greatest = func.max if db.get_bind().dialect.name == "sqlite" else func.greatest
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={"row_version": greatest(table.c.row_version, stmt.excluded.row_version)},
+    ))
+
+
+def _upsert(db: Session, totals: dict[RollupKey, tuple[int, int]]) -> None:
+    if not totals:
+        return
+    table = DailyAttendanceRollup.__table__
+    stmt = dialect_insert(db, DailyAttendanceRollup)
+    # Upsert rather than insert: a concurrent run may have rewritten the same group
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.day, table.c.event_id, table.c.membership_type, table.c.kind],
+        set_={"members": stmt.excluded.members, "guests": stmt.excluded.guests},
+    )
+    db.execute(stmt, [
+        {"day": day, "event_id": event_id, "membership_type": label, "kind": kind,
+         "members": members, "guests": guests}
+        for (day, event_id, label, kind), (members, guests) in totals.items()
+    ])
+
+
+def rebuild_rollup(db: Session) -> RollupResult:
+    """Recompute the whole rollup from `scans` in one GROUP BY and commit."""
+    watermark = db.scalar(select(func.max(Scan.row_version))) or 0
+    totals = aggregate_scans(db)
+    db.execute(delete(DailyAttendanceRollup))
+    _upsert(db, totals)
+    _write_watermark(db, watermark)
+    db.commit()
+    return RollupResult(groups=len({(day, eid) for day, eid, _, _ in totals}), rows=len(totals), watermark=watermark)
+
+
+def update_rollup(db: Session) -> RollupResult:
+    """Re-aggregate the groups changed since the watermark and commit; rebuilds on the first run."""
+    watermark = read_watermark(db)
+    if watermark is None:
+        return rebuild_rollup(db)
+
+    groups, highest = changed_groups(db, watermark - ATTENDANCE_ROLLUP_OVERLAP_SECONDS * 1_000_000)
+    result = RollupResult(watermark=max(highest, watermark))
+    for event_id, days in groups.items():
+        # One range query per event; days in the range that didn't change are left alone
+        totals = {
+            key: value
+            for key, value in aggregate_scans(db, event_id, min(days), max(days)).items()
+            if key[0] in days
+        }
+        db.execute(delete(DailyAttendanceRollup).where(
+            DailyAttendanceRollup.event_id == event_id, DailyAttendanceRollup.day.in_(days)
+        ))
+        _upsert(db, totals)
+        result.groups += len(days)
+        result.rows += len(totals)
+    _write_watermark(db, result.watermark)
+    db.commit()
+    return result
+
+
+# Time grouping for reports: Postgres to_char / SQLite strftime formats
+REPORT_PERIODS = {"day": ("YYYY-MM-DD", "%Y-%m-%d"), "month": ("YYYY-MM", "%Y-%m"), "year": ("YYYY", "%Y")}
+REPORT_DIMENSIONS = {
+    "event": DailyAttendanceRollup.event_id,
+    "membership_type": DailyAttendanceRollup.membership_type,
+    "kind": DailyAttendanceRollup.kind,
+}
+
+
+@dataclass
+class AttendanceRow:
+    members: int
+    guests: int
+    period: Optional[str] = None
+    event_id: Optional[UUID] = None
+    membership_type: Optional[str] = None
+    kind: Optional[str] = None
+
+
+def _period(db: Session, name: str):
+    pg_format, sqlite_format = REPORT_PERIODS[name]
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(DailyAttendanceRollup.day, pg_format)
+    return func.strftime(sqlite_format, DailyAttendanceRollup.day)
+
+
+def attendance_report(
+    db: Session,
+    first_day: Optional[date],
+    last_day: Optional[date],
+    group_by: list[str],
+) -> list[AttendanceRow]:
+    """
+    Totals from the rollup alone, grouped by at most one of REPORT_PERIODS plus any of
+    REPORT_DIMENSIONS; rows are ordered by the grouping columns.
+    """
+    columns = []
+    for name in group_by:
+        if name in REPORT_PERIODS:
+            columns.append(_period(db, name).label("period"))
+        else:
+            columns.append(REPORT_DIMENSIONS[name].label("event_id" if name == "event" else name))
+    rollup = select(*columns, DailyAttendanceRollup.members, DailyAttendanceRollup.guests)
+    if first_day is not None:
+        rollup = rollup.where(DailyAttendanceRollup.day >= first_day)
+    if last_day is not None:
+        rollup = rollup.where(DailyAttendanceRollup.day <= last_day)
+    # Group on subquery columns: the period's format string is a bind parameter
+    rollup = rollup.subquery()
+
+    keys = [rollup.c[column.name] for column in columns]
+    rows = db.execute(
+        select(*keys, func.coalesce(func.sum(rollup.c.members), 0), func.coalesce(func.sum(rollup.c.guests), 0))
+        .group_by(*keys)
+        .order_by(*keys)
+    )
+    names = [column.name for column in columns]
+    return [
+        AttendanceRow(members=row[-2], guests=row[-1], **dict(zip(names, row[:-2])))
+        for row in rows
+    ]
+
+
+class RollupJob(PeriodicTask):
+    """Runs update_rollup() at startup and every `interval_seconds` after."""
+
+    failure_message = "Updating the daily attendance rollup failed"
+    run_at_start = True
+
+    async def run_once(self) -> None:
+        await run_in_new_session(update_rollup)
+
+
+rollup_job = RollupJob(ATTENDANCE_ROLLUP_INTERVAL_SECONDS)
@@ -0,0 +1,237 @@
+"""
+Bulk member roster import.
+
+Reads a CSV with `pass_id,full_name,email,membership_type` columns from any
+line iterator (an open file, a spooled request body) and upserts it into
+`members` keyed on the unique `pass_id`. Only ROSTER_IMPORT_CHUNK_SIZE rows
+are held at a time:
+
+- Postgres streams the validated rows into a temp staging table with COPY,
+  then merges them with one INSERT ... SELECT ... ON CONFLICT.
+- Other dialects (SQLite) upsert each chunk with an executemany.
+
+Rows whose values already match are left alone, so an unchanged nightly
+roster neither rewrites members nor bumps their `row_version` (which would
+make every door pack delta resend the whole roster).
+
+When a pass_id repeats, the last line wins. Earlier copies count as
+unchanged, except on the chunked path where a copy in an earlier chunk has
+already been written and the later line counts as an update.
+"""
+import csv
+import io
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Iterable, Iterator
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import ROSTER_IMPORT_CHUNK_SIZE, ROSTER_IMPORT_MAX_ERRORS
+from app.db import dialect_insert, next_row_version
+from app.models.models import Member, MembershipType
+from app.services.members import member_directory
+
+COLUMNS = ["pass_id", "full_name", "email", "membership_type"]
+
+_TYPES = {key.lower(): t for t in MembershipType for key in (t.name, t.value)}
+
+
+class RosterFormatError(ValueError):
+    pass
+
+
+@dataclass
+class RejectedRow:
+    line: int
+    reason: str
+
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    rejected: int = 0
+    errors: list[RejectedRow] = field(default_factory=list)  # first ROSTER_IMPORT_MAX_ERRORS rejections
+
+    def reject(self, line: int, reason: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < ROSTER_IMPORT_MAX_ERRORS:
+            self.errors.append(RejectedRow(line, reason))
+
+
+def import_roster(db: Session, lines: Iterable[str]) -> ImportResult:
+    """Validate and upsert a roster CSV, then commit. Raises RosterFormatError on a bad header."""
+    result = ImportResult()
+    rows = _valid_rows(lines, result)
+    if db.get_bind().dialect.name == "postgresql":
+        _import_with_copy(db, rows, result)
+    else:
+        _import_in_chunks(db, rows, result)
+    db.commit()
+    # Core writes bypass the ORM events that normally keep the pass_id cache in sync
+    member_directory.clear()
+    return result
+
+
+def _valid_rows(lines: Iterable[str], result: ImportResult) -> Iterator[dict]:
+    reader = csv.DictReader(lines)
+    missing = set(COLUMNS) - {name.strip() for name in reader.fieldnames or []}
+    if missing:
+        raise RosterFormatError(f"Missing column(s): {', '.join(sorted(missing))}")
+
+    for row in reader:
+        row = {name.strip(): (value or "").strip() for name, value in row.items() if name}
+        line = reader.line_num
+        membership_type = _TYPES.get(row["membership_type"].lower())
+        if not row["pass_id"]:
+            result.reject(line, "pass_id is required")
+        elif not row["full_name"]:
+            result.reject(line, "full_name is required")
+        elif membership_type is None:
+            result.reject(line, f"Unknown membership_type {row['membership_type']!r}")
+        else:
+            yield {
+                "line": line,
+                "pass_id": row["pass_id"],
+                "full_name": row["full_name"],
+                "email": row["email"] or None,
+                "membership_type": membership_type,
+            }
+
+
+def _new_member_row(row: dict, now: datetime) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "pass_id": row["pass_id"],
+        "full_name": row["full_name"],
+        "email": row["email"],
+        "membership_type": row["membership_type"],
+        "created_at": now,
+        "row_version": next_row_version(),
+    }
+
+
+def _import_in_chunks(db: Session, rows: Iterator[dict], result: ImportResult) -> None:
+    table = Member.__table__
+    now = datetime.now(timezone.utc)
+    while chunk := list(islice(rows, ROSTER_IMPORT_CHUNK_SIZE)):
+        # Later lines win when a pass_id repeats within the chunk
+        by_pass = {row["pass_id"]: row for row in chunk}
+        result.unchanged += len(chunk) - len(by_pass)
+
+        current = {
+            pass_id: values
+            for pass_id, *values in db.execute(
+                select(Member.pass_id, Member.full_name, Member.email, Member.membership_type)
+                .where(Member.pass_id.in_(by_pass))
+            )
+        }
+        changed = []
+        for pass_id, row in by_pass.items():
+            values = [row["full_name"], row["email"], row["membership_type"]]
+            if pass_id not in current:
+                result.inserted += 1
+            elif current[pass_id] != values:
+                result.updated += 1
+            else:
+                result.unchanged += 1
+                continue
+            changed.append(_new_member_row(row, now))
+
+        if changed:
+            stmt = dialect_insert(db, Member)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.pass_id],
+                set_={
+                    "full_name": stmt.excluded.full_name,
+                    "email": stmt.excluded.email,
+                    "membership_type": stmt.excluded.membership_type,
+                    "row_version": stmt.excluded.row_version,
+                },
+            )
+            db.execute(stmt, changed)
+
+
+class _CsvStream(io.RawIOBase):
+    """Readable file over generated CSV lines, for COPY ... FROM STDIN."""
+
+    def __init__(self, records: Iterator[tuple]):
+        self._records = records
+        self._pending = b""
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while len(self._pending) < len(target):
+            batch = list(islice(self._records, ROSTER_IMPORT_CHUNK_SIZE))
+            if not batch:
+                break
+            self._buffer.seek(0)
+            self._buffer.truncate()
+            self._writer.writerows(batch)
+            self._pending += self._buffer.getvalue().encode()
+        size = min(len(target), len(self._pending))
+        target[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+_STAGING_COLUMNS = "line, id, pass_id, full_name, email, membership_type, created_at, row_version"
+
+
+def _staging_record(row: dict, now: datetime) -> tuple:
+    member = _new_member_row(row, now)
+    return (
+        row["line"], member["id"], member["pass_id"], member["full_name"], member["email"],
+        member["membership_type"].name, now.isoformat(), member["row_version"],
+    )
+
+
+def _import_with_copy(db: Session, rows: Iterator[dict], result: ImportResult) -> None:
+    db.execute(text(
+        "CREATE TEMP TABLE member_import ("
+        " line integer, id uuid, pass_id text, full_name text, email text,"
+        " membership_type text, created_at timestamp, row_version bigint"
+        ") ON COMMIT DROP"
+    ))
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    records = (_staging_record(row, now) for row in rows)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY member_import ({_STAGING_COLUMNS}) FROM STDIN WITH (FORMAT csv)",
+            io.BufferedReader(_CsvStream(records), buffer_size=1 << 16),
+        )
+        staged = cursor.rowcount
+    finally:
+        cursor.close()
+
+    # Last line wins for repeated pass_ids; unchanged members are skipped by the WHERE
+    inserted, merged = db.execute(text("""
+        WITH merged AS (
+            INSERT INTO members (id, pass_id, full_name, email, membership_type, created_at, row_version)
+            SELECT DISTINCT ON (pass_id) id, pass_id, full_name, email,
+                   membership_type::membershiptype, created_at, row_version
+            FROM member_import
+            ORDER BY pass_id, line DESC
+            ON CONFLICT (pass_id) DO UPDATE SET
+                full_name = excluded.full_name,
+                email = excluded.email,
+                membership_type = excluded.membership_type,
+                row_version = excluded.row_version
+            WHERE (members.full_name, members.email, members.membership_type)
+                  IS DISTINCT FROM (excluded.full_name, excluded.email, excluded.membership_type)
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT count(*) FILTER (WHERE inserted), count(*) FROM merged
+    """)).one()
+    result.inserted += inserted
+    result.updated += merged - inserted
+    result.unchanged += staged - merged
@@ -0,0 +1,505 @@
+"""
+Optional write-behind for POST /scan/ (SCAN_WRITE_BEHIND=1).
+
+Instead of committing each scan on its own, the endpoint appends it to a local
+journal and an in-process queue and answers at once with the scan's
+server-generated id. A background worker writes the queue in group commits of
+up to SCAN_WRITE_BEHIND_BATCH_SIZE rows, at least every SCAN_WRITE_BEHIND_FLUSH_MS.
+When the queue is full the endpoint falls back to writing through.
+
+The journal is a series of NDJSON segment files per process
+(`<SCAN_JOURNAL_PATH>.<owner>.<seq>`, guarded by a lock file; see ScanJournal).
+The worker rotates to a new segment before each flush and deletes older
+segments only once everything in them is committed, so segments left behind
+by a process that died are exactly what must be replayed; the next process
+to start takes them over. Replays are idempotent: the insert skips scans
+already present (ON CONFLICT on event/pass/mode) and counters only move for
+rows actually inserted.
+
+A group commit that fails on a row's own data (constraint, foreign key, bad
+value) is retried one row at a time; rows that still fail go to
+`<SCAN_JOURNAL_PATH>.dead` and the scan_queue_dead_letters_total metric, so
+one bad row can't hold up the queue. Other failures keep the batch queued.
+
+Duplicates are rejected against the admitted-pass index, the DB and the
+queue itself, but a concurrent admission of the same pass by another worker
+process only shows up at flush time; that queued scan is dropped with a
+warning. Dashboards lag by up to one flush interval.
+"""
+import asyncio
+import glob
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+from uuid import UUID, uuid4
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    SCAN_JOURNAL_FSYNC,
+    SCAN_JOURNAL_PATH,
+    SCAN_WRITE_BEHIND_BATCH_SIZE,
+    SCAN_WRITE_BEHIND_FLUSH_MS,
+    SCAN_WRITE_BEHIND_QUEUE_SIZE,
+)
+from app.db import dialect_insert, run_in_new_session
+from app.models.models import GuestDetail, Scan
+from app.services import metrics
+from app.services.attendance import increment_counters
+from app.services.live import summary_hub
+
+logger = logging.getLogger(__name__)
+
+_UUID_FIELDS = ("id", "event_id", "member_id", "scan_id")
+
+# Errors a row causes itself (a constraint or foreign key it violates, a value the column
+# rejects): retrying won't help. Anything else, e.g. the database being down, is retried.
+ROW_ERRORS = (IntegrityError, DataError)
+
+
+def scan_row(scan: Scan) -> dict:
+    return {
+        "id": scan.id,
+        "event_id": scan.event_id,
+        "member_id": scan.member_id,
+        "pass_id": scan.pass_id,
+        "pass_serial": scan.pass_serial,
+        "mode": scan.mode,
+        "kind": scan.kind,
+        "guests": scan.guests,
+        "is_valid": scan.is_valid,
+        "validation_reason": scan.validation_reason,
+        "scanned_by": scan.scanned_by,
+        "scanned_at": scan.scanned_at,
+        "passkit_payload": scan.passkit_payload,
+    }
+
+
+def guest_detail_rows(scan: Scan) -> list[dict]:
+    return [
+        {
+            "id": detail.id,
+            "scan_id": scan.id,
+            "name": detail.name,
+            "contact": detail.contact,
+            "notes": detail.notes,
+        }
+        for detail in scan.guest_details
+    ]
+
+
+def insert_scan_rows(db: Session, rows: list[dict], detail_rows: list[dict]) -> set:
+    """
+    Insert scan rows and their guest details without going through the unit of work.
+
+    Uses INSERT ... ON CONFLICT (event_id, pass_id, mode) DO NOTHING RETURNING id, so a
+    concurrent duplicate is skipped rather than raising; returns the ids actually inserted.
+    Does not commit.
+    """
+    table = Scan.__table__
+    stmt = (
+        dialect_insert(db, table)
+        .on_conflict_do_nothing(index_elements=[table.c.event_id, table.c.pass_id, table.c.mode])
+        .returning(table.c.id)
+    )
+    inserted = set(db.execute(stmt, rows).scalars())
+
+    detail_rows = [row for row in detail_rows if row["scan_id"] in inserted]
+    if detail_rows:
+        db.execute(insert(GuestDetail.__table__), detail_rows)
+    return inserted
+
+
+class ScanAlreadyQueued(Exception):
+    """The pass already has a scan for this event waiting in the queue."""
+
+
+@dataclass
+class QueuedScan:
+    row: dict
+    label: str  # membership label for the attendance counters
+    guest_details: list[dict] = field(default_factory=list)
+
+    @property
+    def key(self) -> tuple:
+        return self.row["event_id"], self.row["pass_id"], self.row["mode"]
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"row": self.row, "label": self.label, "guest_details": self.guest_details},
+            default=str,
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, line: str) -> "QueuedScan":
+        data = json.loads(line)
+        row = _decode(data["row"])
+        row["scanned_at"] = datetime.fromisoformat(row["scanned_at"])
+        return cls(row=row, label=data["label"], guest_details=[_decode(d) for d in data["guest_details"]])
+
+
+def _decode(values: dict) -> dict:
+    return {
+        key: UUID(value) if key in _UUID_FIELDS and value is not None else value
+        for key, value in values.items()
+    }
+
+
+class ScanJournal:
+    """
+    One process's append-only NDJSON segments; sealed segments are released once their scans are committed.
+
+    Several worker processes share SCAN_JOURNAL_PATH, so each journal writes
+    `<path>.<owner>.<seq>` segments under its own owner id and holds an
+    exclusive lock on `<path>.<owner>.lock` for as long as it runs. The OS
+    drops the lock when the process dies: a lock file nobody holds marks the
+    segments of a process that exited without releasing them, and whoever
+    takes it over replays them.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self.owner = f"{os.getpid()}-{uuid4().hex[:8]}"
+        self._sealed: list[str] = []
+        self._adopted: list = []  # lock files of the dead owners whose segments we replay
+        self._lock = None
+        self._file = None
+        self._seq = 0
+        self._appended = 0  # lines appended so far / known to be on disk
+        self._synced = 0
+        self._sync_lock = threading.Lock()
+
+    def recover(self) -> list[QueuedScan]:
+        """Take our own lock, then read the segments of every owner whose lock is free."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = _open_lock(self._lock_path(self.owner))
+
+        scans = []
+        for lock_path in sorted(glob.glob(f"{glob.escape(self.path)}.*.lock")):
+            if lock_path == self._lock.name:
+                continue
+            try:
+                lock = _open_lock(lock_path)
+            except OSError:
+                continue  # a live process, or one that just released its journal
+            owner = lock_path[len(self.path) + 1:-len(".lock")]
+            for segment in self._segments(owner):
+                scans.extend(_read_segment(segment))
+                self._sealed.append(segment)
+            self._adopted.append(lock)
+        self._open_segment()
+        return scans
+
+    def append(self, scan: QueuedScan) -> int:
+        """Write a line; it is only durable once sync() is called with the returned ticket."""
+        self._file.write(scan.to_json() + "\n")
+        self._file.flush()
+        self._appended += 1
+        return self._appended
+
+    def sync(self, ticket: int) -> None:
+        """fsync up to line `ticket`; callers arriving during an fsync share the next one (group commit)."""
+        if not self.fsync:
+            return
+        with self._sync_lock:
+            if self._synced >= ticket:
+                return  # covered by another caller's fsync
+            appended = self._appended
+            os.fsync(self._file.fileno())
+            self._synced = appended
+
+    def rotate(self) -> None:
+        with self._sync_lock:
+            # Lines whose submitters haven't synced yet must be on disk before the file goes
+            if self.fsync and self._synced < self._appended:
+                os.fsync(self._file.fileno())
+            self._synced = self._appended
+            self._file.close()
+            self._sealed.append(self._file.name)
+            self._seq += 1
+            self._open_segment()
+
+    def release(self) -> None:
+        """Delete the sealed segments (ours and adopted ones) and the adopted owners' lock files."""
+        for segment in self._sealed:
+            os.remove(segment)
+        self._sealed = []
+        for lock in self._adopted:
+            _remove_lock(lock)
+        self._adopted = []
+
+    def dead_letter(self, scan: QueuedScan, error: Exception) -> None:
+        """Append a scan that can't be written to `<path>.dead`, in the segment format plus the error."""
+        line = json.dumps(
+            {**json.loads(scan.to_json()), "error": f"{type(error).__name__}: {error}"},
+            separators=(",", ":"),
+        )
+        with open(f"{self.path}.dead", "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def close(self) -> None:
+        """Close the journal; if everything it holds was released, remove its files too."""
+        if self._file is not None:
+            clean = not self._sealed and self._file.tell() == 0
+            self._file.close()
+            if clean:
+                os.remove(self._file.name)
+            self._file = None
+            for lock in self._adopted:
+                lock.close()
+            self._adopted = []
+            if clean:
+                _remove_lock(self._lock)
+            else:
+                self._lock.close()  # left for the next process to adopt
+            self._lock = None
+
+    def _lock_path(self, owner: str) -> str:
+        return f"{self.path}.{owner}.lock"
+
+    def _segments(self, owner: str) -> list[str]:
+        paths = glob.glob(f"{glob.escape(self.path)}.{glob.escape(owner)}.*")
+        return sorted((p for p in paths if not p.endswith(".lock")), key=_segment_seq)
+
+    def _open_segment(self) -> None:
+        self._file = open(f"{self.path}.{self.owner}.{self._seq:08d}", "a", encoding="utf-8")
+
+
+def _read_segment(segment: str) -> list[QueuedScan]:
+    scans = []
+    with open(segment, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            try:
+                scans.append(QueuedScan.from_json(line))
+            except (ValueError, KeyError):
+                # A torn final line: the scan was never acknowledged
+                logger.warning("Skipping unreadable line %d of scan journal %s", number, segment)
+    return scans
+
+
+def _open_lock(path: str):
+    """Open `path` and lock it exclusively without waiting; raises OSError if another process holds it."""
+    lock = open(path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # Its holder may have removed it between our open() and flock()
+            if os.fstat(lock.fileno()).st_ino != os.stat(path).st_ino:
+                raise FileNotFoundError(path)
+        else:
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock.close()
+        raise
+    return lock
+
+
+def _remove_lock(lock) -> None:
+    if fcntl is not None:
+        # Unlink while still holding it, so nobody takes over a lock file that's going away
+        os.remove(lock.name)
+        lock.close()
+        return
+    lock.close()  # Windows won't delete an open file
+    try:
+        os.remove(lock.name)
+    except OSError:
+        pass  # taken by another process meanwhile; it finds no segments and removes it
+
+
+def _segment_seq(path: str) -> int:
+    return int(path.rsplit(".", 1)[1])
+
+
+def write_scans(db: Session, scans: list[QueuedScan]) -> int:
+    """One group commit: insert the scans, bump counters for those inserted; returns how many were inserted."""
+    inserted = insert_scan_rows(
+        db, [scan.row for scan in scans], [detail for scan in scans for detail in scan.guest_details]
+    )
+    skipped = [scan for scan in scans if scan.row["id"] not in inserted]
+    if skipped:
+        # Replayed from the journal after it was committed: not a conflict
+        written = set(db.scalars(select(Scan.id).where(Scan.id.in_([scan.row["id"] for scan in skipped]))))
+        for scan in skipped:
+            if scan.row["id"] not in written:
+                logger.warning(
+                    "Dropped queued scan %s: pass %s was admitted to event %s elsewhere",
+                    scan.row["id"], scan.row["pass_id"], scan.row["event_id"],
+                )
+
+    increments: dict = {}
+    for scan in scans:
+        if scan.row["id"] in inserted:
+            key = (scan.row["event_id"], scan.label)
+            members, guests = increments.get(key, (0, 0))
+            increments[key] = (members + 1, guests + scan.row["guests"])
+    increment_counters(db, increments)
+    db.commit()
+    return len(inserted)
+
+
+class ScanQueue:
+    """Bounded queue of accepted scans, journaled before they are acknowledged."""
+
+    def __init__(
+        self,
+        journal_path: str = SCAN_JOURNAL_PATH,
+        batch_size: int = SCAN_WRITE_BEHIND_BATCH_SIZE,
+        flush_ms: float = SCAN_WRITE_BEHIND_FLUSH_MS,
+        max_size: int = SCAN_WRITE_BEHIND_QUEUE_SIZE,
+        fsync: bool = SCAN_JOURNAL_FSYNC,
+    ):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_ms / 1000
+        self.max_size = max_size
+        self._journal = ScanJournal(journal_path, fsync=fsync)
+        self._pending: list[QueuedScan] = []
+        self._keys: set[tuple] = set()  # queued or being written
+        self._lock = threading.Lock()  # submit() runs in the threadpool
+        self._flush_lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.enabled = False
+
+    def open(self) -> int:
+        """Recover journaled scans into the queue and start accepting; returns how many were recovered."""
+        recovered = self._journal.recover()
+        if not recovered:
+            self._journal.release()  # only empty segments, if any, were left behind
+        with self._lock:
+            self._pending = recovered + self._pending
+            self._keys.update(scan.key for scan in recovered)
+        if recovered:
+            logger.info("Recovered %d unwritten scans from the scan journal", len(recovered))
+        self.enabled = True
+        return len(recovered)
+
+    async def start(self) -> None:
+        self.open()
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            await self.flush()  # replay before serving new scans
+        except Exception:
+            logger.exception("Replaying the scan journal failed; retrying in the background")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop accepting, write what is queued and close the journal."""
+        self.enabled = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Final scan flush failed; the journal will be replayed at startup")
+        self._journal.close()
+
+    def submit(self, scan: Scan, label: str) -> bool:
+        """Journal and queue a scan. False when the queue is full (write it through instead)."""
+        queued = QueuedScan(row=scan_row(scan), label=label, guest_details=guest_detail_rows(scan))
+        with self._lock:
+            if queued.key in self._keys:
+                raise ScanAlreadyQueued()
+            if len(self._keys) >= self.max_size:
+                return False
+            ticket = self._journal.append(queued)
+            self._pending.append(queued)
+            self._keys.add(queued.key)
+            full = len(self._pending) >= self.batch_size
+        # Not under the lock: scans would wait for each other's disk flushes
+        self._journal.sync(ticket)
+        if full and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    async def flush(self) -> int:
+        """Write everything queued so far in group commits; returns the number of scans written."""
+        async with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                # Everything journaled so far is in `batch`; new scans go to the next segment
+                self._journal.rotate()
+                batch, self._pending = self._pending, []
+
+            done = written = 0  # scans handled (inserted, already there or dead-lettered) / inserted
+            try:
+                for start in range(0, len(batch), self.batch_size):
+                    chunk = batch[start:start + self.batch_size]
+                    try:
+                        inserted = await run_in_new_session(write_scans, chunk)
+                    except ROW_ERRORS:
+                        # One bad row fails the whole group commit; find it and keep the rest moving
+                        inserted = 0
+                        for scan in chunk:
+                            inserted += await self._write_or_dead_letter(scan)
+                    if inserted:
+                        for event_id in {scan.row["event_id"] for scan in chunk}:
+                            summary_hub.notify(event_id)
+                    written += inserted
+                    done += len(chunk)
+                    with self._lock:
+                        self._keys.difference_update(scan.key for scan in chunk)
+            except BaseException:
+                # Cancelled by stop() too: what wasn't written goes back to the queue, not just the journal
+                with self._lock:
+                    self._pending = batch[done:] + self._pending
+                raise
+
+            with self._lock:
+                self._journal.release()
+            return written
+
+    async def _write_or_dead_letter(self, scan: QueuedScan) -> int:
+        try:
+            return await run_in_new_session(write_scans, [scan])
+        except ROW_ERRORS as e:
+            logger.error("Moved queued scan %s to the dead-letter file: %s", scan.row["id"], e)
+            self._journal.dead_letter(scan, e)
+            metrics.SCAN_QUEUE_DEAD_LETTERS.inc()
+            return 0
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Writing queued scans failed; retrying")
+
+
+scan_queue = ScanQueue()
@@ -0,0 +1,75 @@
+"""
+Thread-safe TTL + LRU cache shared by the in-process caches on the scan path.
+
+Each entry expires after `ttl_seconds`, or `negative_ttl_seconds` for negative
+values (what counts as negative is up to the subclass), so a negative answer
+is re-checked sooner. Past `max_size` entries the least recently used is evicted.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    def __init__(self, ttl_seconds: float, negative_ttl_seconds: float, max_size: int, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_positive(self, value: Any) -> bool:
+        """Whether `value` is kept for ttl_seconds rather than negative_ttl_seconds."""
+        return value is not None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """The fresh value for `key` (marking it recently used), else `default`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Fresh value without touching hit/miss stats or LRU order."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                return entry[1]
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        ttl = self.ttl_seconds if self.is_positive(value) else self.negative_ttl_seconds
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
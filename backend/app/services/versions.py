@@ -0,0 +1,35 @@
+"""
+Per-resource write counters for conditional GETs.
+
+`resource_versions` holds one row per resource name. ORM writes bump the row
+inside the same transaction (through mapper events), so a list ETag built from
+the counter changes exactly when a committed write could have changed the list.
+"""
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.db import dialect_insert
+from app.models.models import Event, ResourceVersion
+
+EVENTS = "events"
+
+
+def read_version(db: Session, name: str) -> int:
+    return db.scalar(select(ResourceVersion.version).where(ResourceVersion.name == name)) or 0
+
+
+def bump_version(connection, name: str) -> None:
+    table = ResourceVersion.__table__
+    stmt = dialect_insert(connection, ResourceVersion).values(name=name, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={"version": table.c.version + 1},
+    )
+    connection.execute(stmt)
+
+
+@event.listens_for(Event, "after_insert")
+@event.listens_for(Event, "after_update")
+@event.listens_for(Event, "after_delete")
+def _bump_events_version(mapper, connection, target: Event) -> None:
+    bump_version(connection, EVENTS)
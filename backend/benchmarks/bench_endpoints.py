@@ -0,0 +1,196 @@
+"""
+Endpoint latency and memory at several data scales.
+
+    cd backend
+    python -m benchmarks.bench_endpoints --scales small,medium --output bench-results.json
+    python -m benchmarks.bench_endpoints --scales small,medium --baseline bench-baseline.json
+
+Each scale is seeded (see benchmarks.seed) into DATABASE_URL, by default the
+SQLite file ./bench.db; a Postgres database must be migrated and is emptied
+first. Every endpoint is then called `--requests` times in-process through the
+ASGI app (PassKit stubbed with ENV=dev) for p50/p95/p99 latency, and a further
+`--memory-requests` times under tracemalloc for peak Python memory (kept out
+of the latency pass, which it would slow down).
+
+Results are written as JSON. With `--baseline` (a results file from an earlier
+run on the same machine) every p50, p95 or peak memory figure that grew by
+more than `--tolerance` is reported and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# name: (members, events, scans)
+SCALES = {
+    "small": (500, 10, 10_000),
+    "medium": (5_000, 50, 100_000),
+    "large": (50_000, 500, 1_000_000),
+}
+# p99 is recorded but too noisy at these sample sizes to fail a run on
+COMPARED_METRICS = ("p50_ms", "p95_ms", "peak_kib")
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(int(round(len(ordered) * pct / 100)) - 1, 0))]
+
+
+def endpoints(data) -> dict:
+    """name -> callable(client, i) making request i against the seeded data."""
+    past_event = data.event_ids[-2] if len(data.event_ids) > 1 else data.live_event_id
+    free_passes = [p for p in data.member_pass_ids if p not in data.live_admitted_pass_ids]
+
+    def scan(client, i):
+        # A member not yet admitted to the live event, so every request records a scan
+        return client.post("/api/v1/scan/", json={
+            "event_id": str(data.live_event_id),
+            "pass_id": free_passes[i % len(free_passes)],
+            "kind": "membership_pass",
+            "mode": "in",
+        })
+
+    if not free_passes:
+        raise RuntimeError("every seeded member is already admitted to the live event")
+
+    return {
+        "list_events": lambda client, i: client.get("/api/v1/events/", params={"limit": 100}),
+        "list_events_active": lambda client, i: client.get("/api/v1/events/", params={"active_only": True}),
+        "event_summary": lambda client, i: client.get(f"/api/v1/dashboard/events/{past_event}/summary"),
+        "door_pack": lambda client, i: client.get(f"/api/v1/events/{data.live_event_id}/door-pack"),
+        "scan_pass": scan,
+    }
+
+
+def measure(client, call, requests: int, memory_requests: int, offset: int = 0) -> tuple[dict, int]:
+    """Run `call` for latency then for memory; returns the metrics and the next request index."""
+    samples = []
+    for i in range(offset, offset + requests):
+        started = time.perf_counter()
+        response = call(client, i)
+        samples.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{response.request.url} answered {response.status_code}: {response.text[:200]}")
+    offset += requests
+
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for i in range(offset, offset + memory_requests):
+            call(client, i)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    offset += memory_requests
+
+    samples_ms = [s * 1000 for s in samples]
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "peak_kib": round((peak - base) / 1024, 1),
+    }, offset
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """Human-readable regressions of `results` against `baseline`."""
+    previous = {(r["scale"], r["endpoint"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["scale"], result["endpoint"]))
+        if before is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if before[metric] > 0 and result[metric] > before[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{result['scale']}/{result['endpoint']} {metric}: "
+                    f"{before[metric]} -> {result[metric]} (+{result[metric] / before[metric] - 1:.0%})"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="small,medium", help=f"comma-separated, from {', '.join(SCALES)}")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--memory-requests", type=int, default=20)
+    parser.add_argument("--output", default="bench-results.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed growth per metric (0.2 = 20%%)")
+    args = parser.parse_args()
+    scales = args.scales.split(",")
+    scan_requests = 5 + args.requests + args.memory_requests
+    unknown = set(scales) - set(SCALES)
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(sorted(unknown))}")
+
+    # Both are read when the app is imported
+    os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+    os.environ["ENV"] = "dev"
+
+    from fastapi.testclient import TestClient
+
+    from app.db import SessionLocal, engine
+    from app.main import app
+    from app.models.models import Base
+    from app.services import passkit
+    from app.services.admissions import admitted_passes
+    from app.services.members import member_directory
+    from benchmarks.seed import reset, seed
+
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(engine)
+    client = TestClient(app)  # no lifespan: no background jobs competing with the requests
+
+    results = []
+    for scale in scales:
+        members, events, scans = SCALES[scale]
+        with SessionLocal() as db:
+            reset(db)
+            seeded, data = seed(db, members, events, scans)
+        passkit.validation_cache.clear()
+        admitted_passes.clear()
+        member_directory.clear()
+        print(f"[{scale}] seeded {seeded.members} members, {seeded.events} events, "
+              f"{seeded.scans} scans in {seeded.seconds:.1f}s", file=sys.stderr)
+
+        if scan_requests > SCALES[scale][0] // 2:
+            parser.error(f"scale {scale} has too few unadmitted members for {scan_requests} scans")
+        offset = 0
+        for name, call in endpoints(data).items():
+            for i in range(5):  # warm up connections, caches and the statement cache
+                call(client, offset + i)
+            metrics, offset = measure(client, call, args.requests, args.memory_requests, offset + 5)
+            results.append({"scale": scale, "endpoint": name, **metrics})
+            print(f"[{scale}] {name:<20} p50={metrics['p50_ms']:8.2f}ms p95={metrics['p95_ms']:8.2f}ms "
+                  f"p99={metrics['p99_ms']:8.2f}ms peak={metrics['peak_kib']:9.1f}KiB", file=sys.stderr)
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "database": engine.dialect.name,
+        "python": platform.python_version(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
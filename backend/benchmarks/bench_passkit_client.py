@@ -0,0 +1,63 @@
+"""
+Per-scan PassKit latency: a fresh httpx.Client per validation vs the pooled client.
+
+    cd backend
+    python -m benchmarks.bench_passkit_client --requests 500
+"""
+import argparse
+import os
+import statistics
+import time
+
+import httpx
+
+from benchmarks.fake_passkit import start_server
+
+
+def _summarize(label: str, samples: list[float]) -> None:
+    samples_ms = sorted(s * 1000 for s in samples)
+    p95 = samples_ms[int(len(samples_ms) * 0.95) - 1]
+    print(
+        f"{label:<22} mean={statistics.mean(samples_ms):7.3f}ms "
+        f"p50={statistics.median(samples_ms):7.3f}ms p95={p95:7.3f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="artificial server latency")
+    args = parser.parse_args()
+
+    server = start_server(latency_seconds=args.latency_ms / 1000)
+    os.environ["PASSKIT_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    from app.services import passkit
+
+    passkit.BASE_URL = os.environ["PASSKIT_BASE_URL"]
+
+    # Before: build and tear down a client for every validation
+    before = []
+    for i in range(args.requests):
+        start = time.perf_counter()
+        with passkit.passkit_client() as client:
+            client.get(f"/pass/BENCH{i}").raise_for_status()
+        before.append(time.perf_counter() - start)
+
+    # After: one long-lived pooled client (cache bypassed via _fetch_pass)
+    after = []
+    for i in range(args.requests):
+        start = time.perf_counter()
+        passkit._fetch_pass(f"BENCH{i}")
+        after.append(time.perf_counter() - start)
+
+    passkit.close_passkit_client()
+    server.shutdown()
+
+    print(f"{args.requests} validations against {os.environ['PASSKIT_BASE_URL']} (httpx {httpx.__version__})")
+    _summarize("client per request", before)
+    _summarize("pooled client", after)
+
+
+if __name__ == "__main__":
+    main()
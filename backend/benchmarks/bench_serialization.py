@@ -0,0 +1,129 @@
+"""
+Response serialization cost: FastAPI's response_model path vs ORJSONResponse.
+
+Times rendering the body of a 1,000-event list_events page, and building and
+rendering a scan result with 10 guest details, without a database or HTTP in
+the way.
+
+    cd backend
+    python -m benchmarks.bench_serialization --iterations 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Callable
+from uuid import uuid4
+
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.responses import ORJSONResponse
+from app.schemas.events import EventOut
+from app.schemas.scan import GuestDetailOut, ScanOut
+
+START = datetime(2026, 6, 1, 18, 0, tzinfo=timezone.utc)
+
+
+def _event_rows(count: int) -> list[SimpleNamespace]:
+    """Stand-ins for Event ORM rows, as list_events reads them."""
+    return [
+        SimpleNamespace(
+            id=uuid4(),
+            name=f"Concert {i}",
+            starts_at=START + timedelta(days=i),
+            ends_at=START + timedelta(days=i, hours=3),
+            location="Main Hall",
+            created_at=START,
+            passkit_outage_policy="reject",
+        )
+        for i in range(count)
+    ]
+
+
+def _scan_fields(guests: int) -> tuple[dict, list[dict]]:
+    scan = {
+        "id": uuid4(),
+        "scanned_at": START,
+        "is_valid": True,
+        "validation_reason": None,
+        "guests": guests,
+        "kind": "membership_pass",
+        "membership_type": "Family",
+        "member_name": "Bench Member",
+    }
+    details = [
+        {"id": uuid4(), "name": f"Guest {i}", "contact": f"guest{i}@example.org", "notes": None}
+        for i in range(guests)
+    ]
+    return scan, details
+
+
+def _timed(fn: Callable[[], bytes], iterations: int) -> tuple[list[float], int]:
+    samples, size = [], 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        size = len(fn())
+        samples.append(time.perf_counter() - start)
+    return samples, size
+
+
+def _summarize(label: str, samples: list[float], size: int) -> float:
+    samples_ms = sorted(s * 1000 for s in samples)
+    p95 = samples_ms[int(len(samples_ms) * 0.95) - 1]
+    median = statistics.median(samples_ms)
+    print(f"  {label:<34} p50={median:8.3f}ms p95={p95:8.3f}ms body={size} bytes")
+    return median
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--guests", type=int, default=10)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+
+    def fastapi_body(model_type, content) -> bytes:
+        # What FastAPI does with a returned object: validate against response_model,
+        # jsonable_encoder, then json.dumps in JSONResponse
+        field = create_model_field(name="Response", type_=model_type, mode="serialization")
+        encoded = loop.run_until_complete(serialize_response(field=field, response_content=content))
+        return JSONResponse(encoded).body
+
+    # list_events validates its rows from the ORM either way; time only what happens after
+    events = [EventOut.model_validate(row) for row in _event_rows(args.events)]
+    events_before = lambda: fastapi_body(list[EventOut], events)
+    events_after = lambda: ORJSONResponse(events).body
+
+    scan, details = _scan_fields(args.guests)
+    scan_before = lambda: fastapi_body(
+        ScanOut, ScanOut(**scan, guest_details=[GuestDetailOut(**d) for d in details])
+    )
+    scan_after = lambda: ORJSONResponse(
+        ScanOut.model_construct(**scan, guest_details=[GuestDetailOut.model_construct(**d) for d in details])
+    ).body
+
+    # Same JSON either way
+    assert orjson.loads(events_before()) == orjson.loads(events_after())
+    assert orjson.loads(scan_before()) == orjson.loads(scan_after())
+
+    for title, before, after in [
+        (f"list_events, {args.events} events", events_before, events_after),
+        (f"scan, {args.guests} guests", scan_before, scan_after),
+    ]:
+        print(f"{title} ({args.iterations} iterations)")
+        slow = _summarize("response_model + JSONResponse", *_timed(before, args.iterations))
+        fast = _summarize("ORJSONResponse", *_timed(after, args.iterations))
+        print(f"  {'speedup':<34} {slow / fast:8.1f}x")
+
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Local stand-in for the PassKit REST API used by the benchmarks.
+
+Serves `GET /pass/{pass_id}` with a JSON body shaped like PassKit's response.
+Each pass gets a status drawn from `statuses` (weights for ACTIVE, REVOKED,
+EXPIRED), fixed per pass id so repeated lookups agree. Every response waits
+`latency_seconds` plus a uniform `jitter_seconds`, and a share `error_rate` of
+requests fails with `error_status` instead.
+Run standalone with `python -m benchmarks.fake_passkit --port 8099`.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ALL_ACTIVE = {"ACTIVE": 1.0}
+
+
+class FakePasskitHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+    latency_seconds = 0.0
+    jitter_seconds = 0.0
+    error_rate = 0.0
+    error_status = 503
+    statuses = ALL_ACTIVE
+
+    def do_GET(self):
+        if not self.path.startswith("/pass/"):
+            self._send(404, {"error": "not found"})
+            return
+        delay = self.latency_seconds + random.uniform(0, self.jitter_seconds)
+        if delay:
+            time.sleep(delay)
+        self.server.stats.count("requests")
+        if self.error_rate and random.random() < self.error_rate:
+            self.server.stats.count("errors")
+            self._send(self.error_status, {"error": "injected failure"})
+            return
+        pass_id = self.path[len("/pass/"):]
+        status = pass_status(pass_id, self.statuses)
+        self.server.stats.count(status)
+        self._send(200, {"passId": pass_id, "status": status, "member_type": "Family"})
+
+    def _send(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ServerStats:
+    """Thread-safe tallies of what the stand-in answered."""
+
+    def __init__(self):
+        self._counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+def pass_status(pass_id: str, statuses: dict[str, float]) -> str:
+    """The status `pass_id` always gets under the `statuses` weights."""
+    point = zlib.crc32(pass_id.encode()) / 2**32 * sum(statuses.values())
+    for status, weight in statuses.items():
+        point -= weight
+        if point < 0:
+            return status
+    return status
+
+
+def parse_statuses(spec: str) -> dict[str, float]:
+    """`ACTIVE=0.9,REVOKED=0.05,EXPIRED=0.05` -> weights by status."""
+    statuses = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        statuses[name.strip().upper()] = float(weight or 1)
+    return statuses
+
+
+def start_server(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency_seconds: float = 0.0,
+    jitter_seconds: float = 0.0,
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    statuses: dict[str, float] = ALL_ACTIVE,
+) -> ThreadingHTTPServer:
+    """Start the stand-in server on a daemon thread and return it (port 0 picks a free port)."""
+    handler = type("Handler", (FakePasskitHandler,), {
+        "latency_seconds": latency_seconds,
+        "jitter_seconds": jitter_seconds,
+        "error_rate": error_rate,
+        "error_status": error_status,
+        "statuses": statuses,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.stats = ServerStats()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--statuses", default="ACTIVE=1", help="e.g. ACTIVE=0.9,REVOKED=0.05,EXPIRED=0.05")
+    args = parser.parse_args()
+
+    srv = start_server(
+        args.host,
+        args.port,
+        args.latency_ms / 1000,
+        args.jitter_ms / 1000,
+        args.error_rate,
+        args.error_status,
+        parse_statuses(args.statuses),
+    )
+    print(f"Fake PassKit listening on http://{args.host}:{srv.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -0,0 +1,269 @@
+"""
+Concurrent scanner load against the app running under uvicorn, with PassKit
+replaced by the local stand-in (benchmarks.fake_passkit).
+
+    cd backend
+    python -m benchmarks.load_test --scanners 12 --duration 30 --passkit-latency-ms 300
+    python -m benchmarks.load_test --passkit-error-rate 0.05 --passkit-statuses ACTIVE=0.9,REVOKED=0.05,EXPIRED=0.05
+
+Seeds DATABASE_URL (default `sqlite:///./loadtest.db`; a Postgres database must
+be migrated and is emptied first), starts the fake PassKit and `uvicorn
+app.main:app` with PASSKIT_BASE_URL pointing at it, then runs `--scanners`
+concurrent door scanners against the live event for `--duration` seconds.
+Each scanner is one keep-alive connection posting scans back to back (plus
+`--think-ms`), drawn from this mix:
+
+- duplicate: a pass the same scanner already admitted (expects 409)
+- guest_details: a member allowed guests, with named guests up to the limit
+- walk_in: an event ticket with no member
+- member: a member pass, no guests (the rest)
+
+The report gives throughput, p50/p95/p99 latency and status codes per scan
+type, the error rate (5xx and connection failures) and what the fake PassKit
+served. Other settings (ASYNC_DB, SCAN_WRITE_BEHIND, pool sizes...) are taken
+from the environment by the server as usual.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+import httpx
+
+from benchmarks.bench_endpoints import percentile
+from benchmarks.fake_passkit import parse_statuses, start_server
+
+EXPECTED_STATUS = {"duplicate": 409, "guest_details": 200, "walk_in": 200, "member": 200}
+
+
+@dataclass
+class ScanTypeStats:
+    latencies: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+
+    def record(self, seconds: float, status: str) -> None:
+        self.latencies.append(seconds * 1000)
+        self.statuses[status] += 1
+
+
+class Scanner:
+    """One door device: its own passes to present and the ones it has admitted."""
+
+    def __init__(self, number: int, event_id: str, passes: list[str], guest_passes: list[tuple[str, int]],
+                 mix: dict[str, float], rng: random.Random):
+        self.number = number
+        self.event_id = event_id
+        self.passes = passes
+        self.guest_passes = guest_passes
+        self.mix = mix
+        self.rng = rng
+        self.admitted: list[str] = []
+        self.walk_ins = 0
+
+    def next_scan(self) -> tuple[str, dict]:
+        roll = self.rng.random()
+        for kind, share in self.mix.items():
+            if roll < share:
+                break
+            roll -= share
+        else:
+            kind = "member"
+
+        body = {"event_id": self.event_id, "mode": "in", "scanned_by": f"door-{self.number}"}
+        if kind == "duplicate" and self.admitted:
+            return kind, {**body, "pass_id": self.rng.choice(self.admitted), "kind": "membership_pass"}
+        if kind == "guest_details" and self.guest_passes:
+            pass_id, limit = self.guest_passes.pop()
+            guests = [{"name": f"Guest {i + 1} of {pass_id}"} for i in range(self.rng.randint(1, limit))]
+            return kind, {**body, "pass_id": pass_id, "kind": "membership_pass", "guest_details": guests}
+        if kind == "member" and self.passes:
+            return kind, {**body, "pass_id": self.passes.pop(), "kind": "membership_pass"}
+        # Walk-ins never run out; also stands in when a scanner has used up its members
+        self.walk_ins += 1
+        return "walk_in", {**body, "pass_id": f"WALKIN-{self.number:02d}-{self.walk_ins:06d}", "kind": "event_ticket"}
+
+
+async def run_scanner(base_url: str, scanner: Scanner, deadline: float, think_seconds: float,
+                      stats: dict[str, ScanTypeStats]) -> None:
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        while time.perf_counter() < deadline:
+            kind, body = scanner.next_scan()
+            started = time.perf_counter()
+            try:
+                response = await client.post("/api/v1/scan/", json=body)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            stats.setdefault(kind, ScanTypeStats()).record(time.perf_counter() - started, status)
+            if status == "200" and kind != "duplicate":
+                scanner.admitted.append(body["pass_id"])
+            if think_seconds:
+                await asyncio.sleep(think_seconds)
+
+
+def wait_until_ready(server: subprocess.Popen, base_url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"uvicorn did not answer on {base_url} within {timeout:.0f}s")
+
+
+def build_report(stats: dict[str, ScanTypeStats], elapsed: float, passkit_stats: dict) -> dict:
+    by_type = {}
+    total = errors = unexpected = 0
+    all_latencies = []
+    for kind, s in sorted(stats.items()):
+        count = len(s.latencies)
+        failed = sum(n for status, n in s.statuses.items() if not status.isdigit() or status.startswith("5"))
+        total += count
+        errors += failed
+        unexpected += count - failed - s.statuses[str(EXPECTED_STATUS[kind])]
+        all_latencies += s.latencies
+        by_type[kind] = {
+            "requests": count,
+            "p50_ms": round(percentile(s.latencies, 50), 2),
+            "p95_ms": round(percentile(s.latencies, 95), 2),
+            "p99_ms": round(percentile(s.latencies, 99), 2),
+            "statuses": dict(s.statuses),
+        }
+    return {
+        "seconds": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(all_latencies, 50), 2) if all_latencies else None,
+        "p95_ms": round(percentile(all_latencies, 95), 2) if all_latencies else None,
+        "p99_ms": round(percentile(all_latencies, 99), 2) if all_latencies else None,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "unexpected_rate": round(unexpected / total, 4) if total else 0.0,
+        "by_type": by_type,
+        "passkit": passkit_stats,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"{report['requests']} scans in {report['seconds']}s: {report['throughput_rps']} req/s, "
+          f"p50={report['p50_ms']}ms p95={report['p95_ms']}ms p99={report['p99_ms']}ms, "
+          f"errors {report['error_rate']:.2%}, unexpected statuses {report['unexpected_rate']:.2%}")
+    for kind, s in report["by_type"].items():
+        statuses = " ".join(f"{status}:{n}" for status, n in sorted(s["statuses"].items()))
+        print(f"  {kind:<14} n={s['requests']:<6} p50={s['p50_ms']:8.2f}ms p95={s['p95_ms']:8.2f}ms "
+              f"p99={s['p99_ms']:8.2f}ms  {statuses}")
+    print(f"  fake PassKit   {report['passkit']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scanners", type=int, default=12)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pause between a scanner's scans")
+    parser.add_argument("--duplicate-share", type=float, default=0.1)
+    parser.add_argument("--guest-detail-share", type=float, default=0.2)
+    parser.add_argument("--walk-in-share", type=float, default=0.1)
+    parser.add_argument("--members", type=int, default=20_000)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--history-scans", type=int, default=100_000, help="scans seeded before the run")
+    parser.add_argument("--passkit-latency-ms", type=float, default=300.0)
+    parser.add_argument("--passkit-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--passkit-error-rate", type=float, default=0.0)
+    parser.add_argument("--passkit-statuses", default="ACTIVE=0.9,REVOKED=0.05,EXPIRED=0.05")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", "sqlite:///./loadtest.db")
+
+    from app.db import SessionLocal, engine
+    from app.core.config import MEMBERSHIP_GUEST_LIMITS
+    from app.models.models import Base
+    from benchmarks.seed import reset, seed
+
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        reset(db)
+        seeded, data = seed(db, args.members, args.events, args.history_scans, args.seed)
+    engine.dispose()
+    print(f"Seeded {seeded.members} members, {seeded.events} events, {seeded.scans} scans "
+          f"in {seeded.seconds:.1f}s", file=sys.stderr)
+
+    # Unadmitted members for the live event, dealt out to the scanners
+    rng = random.Random(args.seed)
+    free = [p for p in data.member_pass_ids if p not in data.live_admitted_pass_ids]
+    rng.shuffle(free)
+    mix = {"duplicate": args.duplicate_share, "guest_details": args.guest_detail_share, "walk_in": args.walk_in_share}
+    scanners = []
+    for n in range(args.scanners):
+        mine = free[n::args.scanners]
+        limits = {p: MEMBERSHIP_GUEST_LIMITS.get(data.member_types[p].name, 0) for p in mine}
+        scanners.append(Scanner(
+            number=n + 1,
+            event_id=str(data.live_event_id),
+            passes=[p for p in mine if not limits[p]],
+            guest_passes=[(p, limits[p]) for p in mine if limits[p]],
+            mix=mix,
+            rng=random.Random(f"{args.seed}:{n}"),
+        ))
+
+    passkit = start_server(
+        latency_seconds=args.passkit_latency_ms / 1000,
+        jitter_seconds=args.passkit_jitter_ms / 1000,
+        error_rate=args.passkit_error_rate,
+        statuses=parse_statuses(args.passkit_statuses),
+    )
+    env = {
+        **os.environ,
+        "ENV": "prod",  # "dev" would stub PassKit out
+        "PASSKIT_BASE_URL": f"http://127.0.0.1:{passkit.server_address[1]}",
+    }
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    try:
+        wait_until_ready(server, base_url)
+        print(f"Running {args.scanners} scanners for {args.duration:.0f}s against {base_url} "
+              f"(PassKit {args.passkit_latency_ms:.0f}-{args.passkit_latency_ms + args.passkit_jitter_ms:.0f}ms, "
+              f"{args.passkit_error_rate:.0%} errors)", file=sys.stderr)
+
+        stats: dict[str, ScanTypeStats] = {}
+        started = time.perf_counter()
+        deadline = started + args.duration
+        think_seconds = args.think_ms / 1000
+
+        async def drive():
+            await asyncio.gather(*(run_scanner(base_url, s, deadline, think_seconds, stats) for s in scanners))
+
+        asyncio.run(drive())
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        passkit.shutdown()
+
+    report = build_report(stats, elapsed, passkit.stats.snapshot())
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), **report}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Synthetic dataset for benchmarks: members, events, scans with guest details
+and PassKit payloads, written to DATABASE_URL (SQLite or Postgres).
+
+    cd backend
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.seed --members 50000 --events 500 --scans 1000000
+
+Postgres must already be migrated (`alembic upgrade head`); SQLite tables are
+created if missing. `--reset` empties the tables first. Generation is seeded,
+so the same arguments always produce the same data. The last event is live
+(started an hour ago, no end) with at most half the members admitted, so
+scans can be posted against it.
+"""
+import argparse
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+from app.core.config import MEMBERSHIP_GUEST_LIMITS
+from app.models.models import (
+    Base,
+    Event,
+    EventAttendanceCounter,
+    GuestDetail,
+    Member,
+    MembershipType,
+    PassStatus,
+    ResourceVersion,
+    Scan,
+)
+from app.services.attendance import backfill_counters
+from app.services.versions import EVENTS, bump_version
+
+CHUNK_SIZE = 10_000
+
+
+# SQLite stand-ins for the Postgres column types (as in alembic/env.py and tests/conftest.py)
+@compiles(JSONB, "sqlite")
+def compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def compile_uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+# Rough mix of the real roster
+MEMBERSHIP_WEIGHTS = {
+    MembershipType.INDIVIDUAL: 40,
+    MembershipType.FAMILY: 35,
+    MembershipType.PATRON: 10,
+    MembershipType.LIFE: 10,
+}
+WALK_IN_SHARE = 0.1  # scans of event tickets with no member
+GUEST_DETAIL_SHARE = 0.3  # guests whose names were taken at the door
+INVALID_SHARE = 0.01
+
+
+@dataclass
+class SeedResult:
+    members: int = 0
+    events: int = 0
+    scans: int = 0
+    guest_details: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class SeededData:
+    """What a benchmark needs to address the data it just seeded."""
+
+    event_ids: list[uuid.UUID]
+    live_event_id: uuid.UUID
+    member_pass_ids: list[str]
+    member_types: dict[str, MembershipType]  # by pass id
+    live_admitted_pass_ids: set[str]
+
+
+def reset(db: Session) -> None:
+    for model in (GuestDetail, Scan, EventAttendanceCounter, PassStatus, Member, Event, ResourceVersion):
+        db.execute(delete(model))
+    db.commit()
+
+
+def seed(
+    db: Session,
+    members: int,
+    events: int,
+    scans: int,
+    seed_value: int = 0,
+    now: datetime | None = None,
+) -> tuple[SeedResult, SeededData]:
+    """Insert the dataset through chunked Core inserts and rebuild the attendance counters."""
+    started = time.perf_counter()
+    rng = random.Random(seed_value)
+    now = now or datetime.now(timezone.utc)
+    result = SeedResult()
+
+    types = list(MEMBERSHIP_WEIGHTS)
+    weights = list(MEMBERSHIP_WEIGHTS.values())
+    member_rows = []
+    for i in range(members):
+        membership_type = rng.choices(types, weights)[0]
+        member_rows.append({
+            "id": _uuid(rng),
+            "full_name": f"Member {i:06d}",
+            "email": f"member{i:06d}@example.com" if rng.random() < 0.8 else None,
+            "membership_type": membership_type,
+            "pass_id": f"SEED{i:06d}",
+            "created_at": now - timedelta(days=rng.randint(30, 2000)),
+            "row_version": i + 1,
+        })
+    _insert(db, Member, member_rows)
+    result.members = members
+
+    # Weekly events going back in time; the last one is live
+    event_rows = []
+    for i in range(events):
+        starts_at = now - timedelta(days=7 * (events - i)) if i < events - 1 else now - timedelta(hours=1)
+        event_rows.append({
+            "id": _uuid(rng),
+            "name": f"Event {i:04d}",
+            "starts_at": starts_at,
+            "ends_at": starts_at + timedelta(hours=3) if i < events - 1 else None,
+            "location": rng.choice(["Main Hall", "Garden", "Auditorium"]),
+            "created_at": starts_at - timedelta(days=30),
+            "passkit_outage_policy": "reject",
+        })
+    _insert(db, Event, event_rows)
+    bump_version(db.connection(), EVENTS)
+    result.events = events
+
+    # Spread scans evenly; within an event each pass is admitted at most once
+    per_event = [scans // events + (1 if i < scans % events else 0) for i in range(events)]
+    scan_rows, detail_rows = [], []
+    live_admitted: set[str] = set()
+    row_version = members
+    for event, count in zip(event_rows, per_event):
+        walk_ins = int(count * WALK_IN_SHARE)
+        # The live event is under way: leave half the roster still to arrive
+        capacity = len(member_rows) // 2 if event is event_rows[-1] else len(member_rows)
+        attendees = rng.sample(member_rows, min(count - walk_ins, capacity))
+        walk_ins = count - len(attendees)
+        for position in range(len(attendees) + walk_ins):
+            member = attendees[position] if position < len(attendees) else None
+            row_version += 1
+            scan_id = _uuid(rng)
+            membership_type = member["membership_type"] if member else rng.choice(types)
+            guests = rng.randint(0, MEMBERSHIP_GUEST_LIMITS.get(membership_type.name, 0)) if member else 0
+            is_valid = rng.random() >= INVALID_SHARE
+            pass_id = member["pass_id"] if member else f"TICKET-{event['name'][-4:]}-{position:06d}"
+            if event is event_rows[-1]:
+                live_admitted.add(pass_id)
+            scan_rows.append({
+                "id": scan_id,
+                "event_id": event["id"],
+                "member_id": member["id"] if member else None,
+                "pass_id": pass_id,
+                "pass_serial": None,
+                "mode": "in",
+                "kind": "membership_pass" if member else "event_ticket",
+                "guests": guests,
+                "is_valid": is_valid,
+                "validation_reason": None if is_valid else "Pass is revoked",
+                "scanned_by": f"door-{rng.randint(1, 12)}",
+                "scanned_at": event["starts_at"] + timedelta(seconds=rng.randint(0, 3 * 3600)),
+                "passkit_payload": {
+                    "passId": pass_id,
+                    "status": "ACTIVE" if is_valid else "REVOKED",
+                    "member_type": membership_type.value,
+                },
+                "row_version": row_version,
+            })
+            for g in range(guests):
+                if rng.random() < GUEST_DETAIL_SHARE:
+                    detail_rows.append({
+                        "id": _uuid(rng),
+                        "scan_id": scan_id,
+                        "name": f"Guest {g + 1} of {pass_id}",
+                        "contact": None,
+                        "notes": None,
+                        "created_at": event["starts_at"],
+                    })
+            if len(scan_rows) >= CHUNK_SIZE:
+                result.scans += _insert(db, Scan, scan_rows)
+                result.guest_details += _insert(db, GuestDetail, detail_rows)
+                scan_rows, detail_rows = [], []
+    result.scans += _insert(db, Scan, scan_rows)
+    result.guest_details += _insert(db, GuestDetail, detail_rows)
+    db.commit()
+
+    backfill_counters(db)
+    result.seconds = time.perf_counter() - started
+    return result, SeededData(
+        event_ids=[e["id"] for e in event_rows],
+        live_event_id=event_rows[-1]["id"],
+        member_pass_ids=[m["pass_id"] for m in member_rows],
+        member_types={m["pass_id"]: m["membership_type"] for m in member_rows},
+        live_admitted_pass_ids=live_admitted,
+    )
+
+
+def _insert(db: Session, model, rows: list[dict]) -> int:
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.execute(insert(model.__table__), rows[start:start + CHUNK_SIZE])
+    return len(rows)
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=50_000)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--scans", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reset", action="store_true", help="delete existing rows first")
+    args = parser.parse_args()
+
+    from app.db import SessionLocal, engine
+
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        if args.reset:
+            reset(db)
+        result, _ = seed(db, args.members, args.events, args.scans, args.seed)
+    print(
+        f"Seeded {result.members} members, {result.events} events, {result.scans} scans, "
+        f"{result.guest_details} guest details into {engine.url} in {result.seconds:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
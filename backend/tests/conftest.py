@@ -20,13 +20,19 @@ from app.models.models import Event, Member, MembershipType
 # ----------------------------
 # ✅ SQLite compat for JSONB
 # ----------------------------
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.compiler import compiles
 
 @compiles(JSONB, "sqlite")
 def compile_jsonb_sqlite(type_, compiler, **kw):
     return "JSON"
 
+# A column declared "UUID" gets NUMERIC affinity in SQLite, which turns hex ids
+# like "123e4567..." into floats; store them as text
+@compiles(UUID, "sqlite")
+def compile_uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
@@ -60,11 +66,77 @@ def db():
         transaction.rollback()
         connection.close()
 
+# ✅ In-process caches outlive the rolled-back test transactions, so reset them per test
+@pytest.fixture(autouse=True)
+def reset_caches():
+    from app.services import passkit
+    from app.services.admissions import admitted_passes
+    from app.services.arrivals import closed_buckets
+    from app.services.members import member_directory
+
+    passkit.validation_cache.clear()
+    closed_buckets.clear()
+    admitted_passes.clear()
+    member_directory.clear()
+    passkit.breaker.reset()
+    yield
+
+# ✅ Controllable time source for the PassKit cache, token manager and circuit breaker
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
+
+@pytest.fixture
+def make_breaker(fake_clock, monkeypatch):
+    """Build a circuit breaker on `fake_clock` and install it as the app's for this test."""
+    from app.services import passkit
+
+    def make(**kwargs):
+        breaker = passkit.CircuitBreaker(clock=fake_clock, **kwargs)
+        monkeypatch.setattr(passkit, "breaker", breaker)
+        return breaker
+
+    return make
+
+# ✅ SQL statement budgets: every request made through the test client is checked against
+# its route's budget; tests can tighten one with query_budgets[(method, route)] = n
+from app.services.query_budget import ROUTE_BUDGETS, QueryBudgetMiddleware
+
+query_budget_reports = []
+test_route_budgets = dict(ROUTE_BUDGETS)
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets():
+    query_budget_reports.clear()
+    test_route_budgets.clear()
+    test_route_budgets.update(ROUTE_BUDGETS)
+    yield
+    over = [r for r in query_budget_reports if r.over_budget]
+    if over:
+        pytest.fail("\n".join(
+            f"{r.method} {r.route} ran {r.count} SQL statements (budget {r.budget})" for r in over
+        ))
+
+@pytest.fixture
+def query_budgets():
+    return test_route_budgets
+
 # ✅ Build test app instance inside fixture
 from fastapi import FastAPI
+from app.core.responses import ORJSONResponse
 
 def create_test_app():
-    test_app = FastAPI(title="Test Arimala App")
+    test_app = FastAPI(title="Test Arimala App", default_response_class=ORJSONResponse)
+    test_app.add_middleware(
+        QueryBudgetMiddleware, budgets=test_route_budgets, on_report=query_budget_reports.append
+    )
     test_app.include_router(api_router)
     return test_app
 
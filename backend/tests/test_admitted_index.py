@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from uuid import uuid4
+
+from app.models.models import Event
+from app.services import passkit
+from app.services.admissions import AdmittedPassIndex, admitted_passes
+
+
+NOW = datetime(2026, 5, 1, 20, 0)
+
+
+def test_warm_add_and_contains():
+    index = AdmittedPassIndex(max_events=10, end_grace_seconds=60, clock=lambda: NOW)
+    event_id = uuid4()
+
+    assert not index.contains(event_id, "A")
+    assert index.warm(event_id, NOW + timedelta(hours=1), ["A"])
+    index.add(event_id, "B")
+    index.add(uuid4(), "C")  # not warm: ignored
+
+    assert index.contains(event_id, "A")
+    assert index.contains(event_id, "B")
+    assert not index.contains(event_id, "C")
+
+
+def test_ended_events_are_not_indexed_and_get_evicted():
+    clock = {"now": NOW}
+    index = AdmittedPassIndex(max_events=10, end_grace_seconds=60, clock=lambda: clock["now"])
+    ended, running = uuid4(), uuid4()
+
+    assert not index.warm(ended, NOW - timedelta(hours=1), ["A"])
+    assert index.warm(running, NOW + timedelta(minutes=30), ["A"])
+
+    clock["now"] = NOW + timedelta(hours=2)
+    index.warm(uuid4(), None, [])  # eviction runs on warm
+    assert not index.is_warm(running)
+
+
+def test_least_recently_scanned_event_is_evicted_first():
+    index = AdmittedPassIndex(max_events=2, end_grace_seconds=60, clock=lambda: NOW)
+    first, second, third = uuid4(), uuid4(), uuid4()
+    index.warm(first, None, [])
+    index.warm(second, None, [])
+    index.contains(first, "X")
+    index.warm(third, None, [])
+
+    assert index.is_warm(first)
+    assert not index.is_warm(second)
+    assert index.is_warm(third)
+
+
+def test_repeat_scan_is_rejected_without_db_checks(client, test_event, test_member):
+    payload = {
+        "event_id": str(test_event.id),
+        "member_id": str(test_member.id),
+        "pass_id": test_member.pass_id,
+        "guests": 0,
+    }
+
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})) as validate:
+        assert client.post("/api/v1/scan", json=payload).status_code == 200
+        assert admitted_passes.contains(test_event.id, test_member.pass_id)
+
+        with patch("app.routers.scan._check_event_and_duplicate", side_effect=AssertionError("hit the DB")):
+            response = client.post("/api/v1/scan", json=payload)
+
+    assert response.status_code == 409
+    assert validate.await_count == 1
+
+
+def test_ended_event_falls_back_to_db_duplicate_check(client, db):
+    ended = Event(id=uuid4(), name="Past", starts_at=NOW - timedelta(days=3), ends_at=NOW - timedelta(days=2))
+    db.add(ended)
+    db.commit()
+    payload = {"event_id": str(ended.id), "pass_id": "LATEPASS", "kind": "event_ticket"}
+
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {})):
+        assert client.post("/api/v1/scan", json=payload).status_code == 200
+        assert client.post("/api/v1/scan", json=payload).status_code == 409
+
+    assert not admitted_passes.is_warm(ended.id)
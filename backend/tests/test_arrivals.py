@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from app.models.models import Scan
+from app.services.arrivals import ArrivalCount, event_arrivals
+
+BASE = datetime(2026, 5, 2, 18, 0)  # naive UTC
+
+
+def _scan(db, event, pass_id, at, guests=0, mode="in"):
+    db.add(Scan(
+        id=uuid4(),
+        event_id=event.id,
+        pass_id=pass_id,
+        mode=mode,
+        guests=guests,
+        is_valid=True,
+        scanned_at=at,
+    ))
+    db.commit()
+
+
+def test_arrivals_per_minute_fill_empty_buckets(client, db, test_event):
+    _scan(db, test_event, "A", BASE + timedelta(seconds=5), guests=2)
+    _scan(db, test_event, "B", BASE + timedelta(seconds=59))
+    _scan(db, test_event, "C", BASE + timedelta(minutes=3, seconds=10), guests=1)
+    _scan(db, test_event, "C", BASE + timedelta(minutes=4), mode="out")
+
+    response = client.get(f"/api/v1/dashboard/events/{test_event.id}/arrivals")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["bucket"] == "1m"
+    assert [(b["start"][11:16], b["check_ins"], b["guests"]) for b in data["buckets"]] == [
+        ("18:00", 2, 2),
+        ("18:01", 0, 0),
+        ("18:02", 0, 0),
+        ("18:03", 1, 1),
+    ]
+    assert datetime.fromisoformat(data["buckets"][0]["start"]) == BASE.replace(tzinfo=timezone.utc)
+
+
+def test_arrivals_in_wider_buckets(client, db, test_event):
+    for i, minute in enumerate([0, 4, 5, 14, 16, 29]):
+        _scan(db, test_event, f"P{i}", BASE + timedelta(minutes=minute, seconds=30))
+
+    five = client.get(f"/api/v1/dashboard/events/{test_event.id}/arrivals", params={"bucket": "5m"}).json()
+    fifteen = client.get(f"/api/v1/dashboard/events/{test_event.id}/arrivals", params={"bucket": "15m"}).json()
+
+    assert [(b["start"][11:16], b["check_ins"]) for b in five["buckets"]] == [
+        ("18:00", 2), ("18:05", 1), ("18:10", 1), ("18:15", 1), ("18:20", 0), ("18:25", 1),
+    ]
+    assert [(b["start"][11:16], b["check_ins"]) for b in fifteen["buckets"]] == [("18:00", 4), ("18:15", 2)]
+
+
+def test_arrivals_unknown_event_and_bad_bucket(client, test_event):
+    assert client.get(f"/api/v1/dashboard/events/{uuid4()}/arrivals").status_code == 404
+    assert client.get(f"/api/v1/dashboard/events/{test_event.id}/arrivals", params={"bucket": "2m"}).status_code == 422
+    assert client.get(f"/api/v1/dashboard/events/{test_event.id}/arrivals").json()["buckets"] == []
+
+
+def test_closed_buckets_are_served_from_cache(db, test_event):
+    now = BASE + timedelta(minutes=5, seconds=30)
+    _scan(db, test_event, "A", BASE + timedelta(minutes=1))
+    _scan(db, test_event, "B", BASE + timedelta(minutes=5))
+
+    # Grace 60s: buckets up to 18:04 are closed at 18:05:30
+    assert event_arrivals(db, test_event.id, "1m", clock=lambda: now)[-1] == ArrivalCount(
+        BASE + timedelta(minutes=5), 1, 0
+    )
+
+    # A late row in a closed bucket isn't picked up again; the open bucket is recomputed
+    _scan(db, test_event, "LATE", BASE + timedelta(minutes=1, seconds=30))
+    _scan(db, test_event, "C", BASE + timedelta(minutes=5, seconds=20), guests=3)
+    counts = event_arrivals(db, test_event.id, "1m", clock=lambda: now)
+
+    assert [(c.start.minute, c.check_ins, c.guests) for c in counts] == [
+        (1, 1, 0), (2, 0, 0), (3, 0, 0), (4, 0, 0), (5, 2, 3),
+    ]
@@ -0,0 +1,72 @@
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db import run_db, to_async_url
+from app.services import passkit
+
+
+def test_to_async_url():
+    assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert (
+        to_async_url("postgresql+psycopg2://u:p@localhost:5432/db")
+        == "postgresql+asyncpg://u:p@localhost:5432/db"
+    )
+    with pytest.raises(ValueError):
+        to_async_url("mysql://u:p@localhost/db")
+
+
+def test_run_db_with_async_session():
+    pytest.importorskip("aiosqlite")
+
+    def count_rows(session):
+        session.execute(text("CREATE TABLE t (x INTEGER)"))
+        session.execute(text("INSERT INTO t VALUES (1), (2)"))
+        return session.execute(text("SELECT count(*) FROM t")).scalar_one()
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with AsyncSession(engine) as session:
+            result = await run_db(session, count_rows)
+        await engine.dispose()
+        return result
+
+    assert asyncio.run(run()) == 2
+
+
+def test_validate_pass_async_parses_status():
+    def handler(request):
+        return httpx.Response(200, json={"passId": "P1", "status": "REVOKED"})
+
+    async def run():
+        client = httpx.AsyncClient(base_url="https://passkit.test", transport=httpx.MockTransport(handler))
+        with patch.object(passkit, "IS_STUB_MODE", False), \
+                patch.object(passkit, "get_passkit_async_client", return_value=client):
+            result = await passkit.validate_pass_async("ASYNCPASS1")
+        await client.aclose()
+        return result
+
+    passkit.validation_cache.clear()
+    assert asyncio.run(run()) == (False, "Pass is revoked", {"passId": "P1", "status": "REVOKED"})
+    passkit.validation_cache.clear()
+
+
+def test_validate_pass_async_maps_http_errors():
+    def handler(request):
+        return httpx.Response(502, text="bad gateway")
+
+    async def run():
+        client = httpx.AsyncClient(base_url="https://passkit.test", transport=httpx.MockTransport(handler))
+        with patch.object(passkit, "IS_STUB_MODE", False), \
+                patch.object(passkit, "get_passkit_async_client", return_value=client):
+            try:
+                await passkit.validate_pass_async("ASYNCPASS2")
+            finally:
+                await client.aclose()
+
+    with pytest.raises(passkit.PasskitValidationError, match="502"):
+        asyncio.run(run())
@@ -0,0 +1,120 @@
+from datetime import date, datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import select
+
+from app.models.models import DailyAttendanceRollup, Event, Member, MembershipType, Scan
+from app.services import rollup
+from app.services.rollup import aggregate_scans, read_watermark, update_rollup
+
+DAY = datetime(2026, 3, 14, 19, 0)  # naive UTC
+
+
+def _scan(db, event, pass_id, at, guests=0, member=None, kind="membership_pass", payload=None):
+    scan = Scan(
+        id=uuid4(),
+        event_id=event.id,
+        member_id=member.id if member else None,
+        pass_id=pass_id,
+        mode="in",
+        kind=kind,
+        guests=guests,
+        is_valid=True,
+        scanned_at=at,
+        passkit_payload=payload,
+    )
+    db.add(scan)
+    db.commit()
+    return scan
+
+
+def _event(db, name, starts_at):
+    event = Event(id=uuid4(), name=name, starts_at=starts_at, created_at=starts_at)
+    db.add(event)
+    db.commit()
+    return event
+
+
+def _rollup(db):
+    return {
+        (r.day, r.event_id, r.membership_type, r.kind): (r.members, r.guests)
+        for r in db.scalars(select(DailyAttendanceRollup))
+    }
+
+
+def test_first_run_builds_the_rollup_from_scans(db, test_event, test_member):
+    _scan(db, test_event, test_member.pass_id, DAY, guests=2, member=test_member)
+    _scan(db, test_event, "TICKET-1", DAY + timedelta(hours=1), kind="event_ticket", payload={"member_type": "Patron"})
+    _scan(db, test_event, "TICKET-2", DAY + timedelta(hours=6), guests=1, kind="event_ticket")  # next UTC day
+
+    result = update_rollup(db)
+
+    assert result.rows == 3
+    assert _rollup(db) == {
+        (date(2026, 3, 14), test_event.id, test_member.membership_type.value, "membership_pass"): (1, 2),
+        (date(2026, 3, 14), test_event.id, "Patron", "event_ticket"): (1, 0),
+        (date(2026, 3, 15), test_event.id, "Unknown", "event_ticket"): (1, 1),
+    }
+    assert read_watermark(db) == db.scalar(select(Scan.row_version).order_by(Scan.row_version.desc()).limit(1))
+
+
+def test_incremental_run_rewrites_changed_days_only(db, test_event, test_member, monkeypatch):
+    # Everything here was written within the overlap window; without it only changes count
+    monkeypatch.setattr(rollup, "ATTENDANCE_ROLLUP_OVERLAP_SECONDS", 0)
+    other = _event(db, "Earlier", DAY - timedelta(days=30))
+    _scan(db, other, "OLD", DAY - timedelta(days=30), guests=1)
+    unlinked = _scan(db, test_event, "WALKIN", DAY, payload={"member_type": "Individual"})
+    update_rollup(db)
+
+    # A marker on a group with no new scans: it must survive the next run
+    db.query(DailyAttendanceRollup).filter(DailyAttendanceRollup.event_id == other.id).update({"members": 99})
+    db.commit()
+
+    _scan(db, test_event, test_member.pass_id, DAY + timedelta(minutes=5), guests=1, member=test_member)
+    unlinked.passkit_payload = {"member_type": "Patron"}  # re-validation relabels the scan
+    db.commit()
+    update_rollup(db)
+
+    assert _rollup(db) == {
+        (date(2026, 2, 12), other.id, "Unknown", "membership_pass"): (99, 1),
+        (date(2026, 3, 14), test_event.id, test_member.membership_type.value, "membership_pass"): (1, 1),
+        (date(2026, 3, 14), test_event.id, "Patron", "membership_pass"): (1, 0),
+    }
+    assert _rollup(db) != aggregate_scans(db)  # the hand-edited group was left alone
+
+
+def test_attendance_report_reads_the_rollup(client, db, test_event):
+    family = Member(id=uuid4(), full_name="F", membership_type=MembershipType.FAMILY, pass_id="FAM")
+    patron = Member(id=uuid4(), full_name="P", membership_type=MembershipType.PATRON, pass_id="PAT")
+    db.add_all([family, patron])
+    db.commit()
+    april = _event(db, "April", datetime(2026, 4, 2, 18, 0))
+    _scan(db, test_event, "FAM", DAY, guests=3, member=family)
+    _scan(db, test_event, "PAT", DAY, member=patron)
+    _scan(db, april, "FAM", datetime(2026, 4, 2, 18, 30), guests=1, member=family)
+    update_rollup(db)
+    _scan(db, april, "PAT", datetime(2026, 4, 2, 18, 45), member=patron)  # not rolled up yet
+
+    response = client.get("/api/v1/dashboard/reports/attendance", params={"group_by": "month,membership_type"})
+
+    assert response.status_code == 200
+    assert [(r["period"], r["membership_type"], r["members"], r["guests"], r["guests_per_member"])
+            for r in response.json()["rows"]] == [
+        ("2026-03", "Family", 1, 3, 3.0),
+        ("2026-03", "Patron", 1, 0, 0.0),
+        ("2026-04", "Family", 1, 1, 1.0),
+    ]
+
+    april_only = client.get(
+        "/api/v1/dashboard/reports/attendance",
+        params={"from": "2026-04-01", "to": "2026-04-30", "group_by": "event"},
+    ).json()
+    assert [(r["event_id"], r["members"], r["period"]) for r in april_only["rows"]] == [(str(april.id), 1, None)]
+
+
+def test_attendance_report_rejects_bad_grouping(client):
+    url = "/api/v1/dashboard/reports/attendance"
+    assert client.get(url, params={"group_by": "week"}).status_code == 400
+    assert client.get(url, params={"group_by": "day,month"}).status_code == 400
+    assert client.get(url, params={"from": "2026-05-01", "to": "2026-04-01"}).status_code == 400
+    assert client.get(url, params={"group_by": "year"}).json()["rows"] == []
@@ -0,0 +1,95 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from unittest.mock import patch
+
+from app.models.models import EventAttendanceCounter, Member, MembershipType, Scan
+from app.services import passkit
+from app.services.attendance import backfill_counters, check_counters
+
+
+def _scan(db, event, pass_id, guests=0, member=None, payload=None):
+    db.add(Scan(
+        id=uuid4(),
+        event_id=event.id,
+        member_id=member.id if member else None,
+        pass_id=pass_id,
+        mode="in",
+        guests=guests,
+        is_valid=True,
+        scanned_at=datetime.now(timezone.utc),
+        passkit_payload=payload,
+    ))
+    db.commit()
+
+
+def test_event_summary_breakdown(client, db, test_event, test_member):
+    patron = Member(
+        id=uuid4(),
+        full_name="Patron Member",
+        membership_type=MembershipType.PATRON,
+        pass_id="PATRONPASS",
+    )
+    db.add(patron)
+    db.commit()
+
+    _scan(db, test_event, test_member.pass_id, guests=2, member=test_member)
+    _scan(db, test_event, patron.pass_id, member=patron)
+    _scan(db, test_event, "PAYLOADPASS", guests=1, payload={"member_type": "Student"})
+    _scan(db, test_event, "NOPAYLOAD")
+    _scan(db, test_event, "EMPTYPAYLOAD", guests=3, payload={"status": "ACTIVE"})
+    assert backfill_counters(db, test_event.id) == 4
+
+    response = client.get(f"/api/v1/dashboard/events/{test_event.id}/summary")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "event_id": str(test_event.id),
+        "total_check_ins": 5,
+        "total_guests": 6,
+        "by_membership_type": {
+            "Family": {"members": 1, "guests": 2},
+            "Patron": {"members": 1, "guests": 0},
+            "Student": {"members": 1, "guests": 1},
+            "Unknown": {"members": 2, "guests": 3},
+        },
+    }
+
+
+def test_event_summary_without_scans(client, test_event):
+    response = client.get(f"/api/v1/dashboard/events/{test_event.id}/summary")
+    assert response.status_code == 404
+
+
+def test_scans_update_counters_in_the_same_transaction(client, db, test_event, test_member):
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"member_type": "Student"})):
+        client.post("/api/v1/scan", json={
+            "event_id": str(test_event.id),
+            "member_id": str(test_member.id),
+            "pass_id": test_member.pass_id,
+            "guests": 1,
+        })
+        client.post("/api/v1/scan/batch", json={"items": [
+            {"event_id": str(test_event.id), "pass_id": "TICKET-A", "kind": "event_ticket"},
+            {"event_id": str(test_event.id), "pass_id": "TICKET-B", "kind": "event_ticket", "guests": 2},
+        ]})
+
+    summary = client.get(f"/api/v1/dashboard/events/{test_event.id}/summary").json()
+    assert summary["total_check_ins"] == 3
+    assert summary["by_membership_type"] == {
+        "Family": {"members": 1, "guests": 1},
+        "Student": {"members": 2, "guests": 2},
+    }
+    assert check_counters(db, test_event.id) == []
+
+
+def test_check_counters_reports_drift(db, test_event):
+    _scan(db, test_event, "DRIFTPASS", guests=2)
+    db.add(EventAttendanceCounter(event_id=test_event.id, membership_type="Patron", members=4, guests=0))
+    db.commit()
+
+    drift = {(d.membership_type, d.expected, d.actual) for d in check_counters(db, test_event.id)}
+    assert drift == {("Unknown", (1, 2), (0, 0)), ("Patron", (0, 0), (4, 0))}
+
+    backfill_counters(db, test_event.id)
+    assert check_counters(db, test_event.id) == []
@@ -0,0 +1,110 @@
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from app.models.models import Member, MembershipType
+from app.services import door_pack, passkit
+from app.services.pass_prefetch import store_statuses
+
+
+def _status(db, pass_id, is_valid, status):
+    store_statuses(db, [{
+        "pass_id": pass_id,
+        "is_valid": is_valid,
+        "reason": None,
+        "payload": {"status": status},
+        "checked_at": datetime.now(timezone.utc),
+    }])
+
+
+def _scan(client, event_id, pass_id, guests=0):
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})):
+        res = client.post("/api/v1/scan", json={"event_id": str(event_id), "pass_id": pass_id, "guests": guests})
+    assert res.status_code == 200, res.text
+
+
+def test_full_door_pack(client, db, test_event, test_member):
+    _status(db, test_member.pass_id, is_valid=False, status="REVOKED")
+    # A verdict only in this worker's PassKit cache isn't served: other workers would disagree
+    passkit.validation_cache.set(test_member.pass_id, (True, None, {"status": "ACTIVE"}))
+    _scan(client, test_event.id, "GUESTPASS")
+
+    res = client.get(f"/api/v1/events/{test_event.id}/door-pack")
+    assert res.status_code == 200
+    pack = res.json()
+
+    assert pack["format"] == door_pack.DOOR_PACK_FORMAT
+    assert pack["since"] is None
+    assert pack["guest_limits"]["Family"] == 3
+    assert pack["members"] == [{
+        "id": str(test_member.id),
+        "pass_id": test_member.pass_id,
+        "name": "Test Member",
+        "membership_type": "Family",
+        "pass_status": "REVOKED",
+    }]
+    assert [a["pass_id"] for a in pack["admitted"]] == ["GUESTPASS"]
+    assert res.headers["ETag"] == door_pack.door_pack_etag(pack["version"])
+
+
+def test_if_none_match_returns_304_until_something_changes(client, test_event, test_member):
+    url = f"/api/v1/events/{test_event.id}/door-pack"
+    etag = client.get(url).headers["ETag"]
+
+    res = client.get(url, headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.headers["ETag"] == etag
+
+    _scan(client, test_event.id, test_member.pass_id)
+    res = client.get(url, headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+
+
+def test_delta_returns_only_changed_rows(client, db, test_event, test_member):
+    url = f"/api/v1/events/{test_event.id}/door-pack"
+    version = client.get(url).json()["version"]
+
+    with patch.object(door_pack, "DOOR_PACK_SYNC_OVERLAP_SECONDS", 0):
+        delta = client.get(url, params={"since": version}).json()
+        assert delta["members"] == [] and delta["admitted"] == []
+
+        db.add(Member(
+            id=uuid.uuid4(),
+            full_name="New Member",
+            membership_type=MembershipType.INDIVIDUAL,
+            pass_id="NEWPASS",
+            created_at=datetime.now(timezone.utc),
+        ))
+        db.commit()
+        _scan(client, test_event.id, "NEWPASS")
+
+        delta = client.get(url, params={"since": version}).json()
+
+    assert delta["since"] == version
+    assert delta["version"] > version
+    assert [m["pass_id"] for m in delta["members"]] == ["NEWPASS"]
+    assert [a["pass_id"] for a in delta["admitted"]] == ["NEWPASS"]
+
+
+def test_revoked_pass_reaches_devices(client, db, test_event, test_member):
+    url = f"/api/v1/events/{test_event.id}/door-pack"
+    _status(db, test_member.pass_id, is_valid=True, status="ACTIVE")
+    first = client.get(url)
+    version, etag = first.json()["version"], first.headers["ETag"]
+
+    with patch.object(door_pack, "DOOR_PACK_SYNC_OVERLAP_SECONDS", 0):
+        # A re-check with the same verdict changes nothing
+        _status(db, test_member.pass_id, is_valid=True, status="ACTIVE")
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+        _status(db, test_member.pass_id, is_valid=False, status="REVOKED")
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+        delta = client.get(url, params={"since": version}).json()
+
+    assert [(m["pass_id"], m["pass_status"]) for m in delta["members"]] == [(test_member.pass_id, "REVOKED")]
+
+
+def test_door_pack_unknown_event(client):
+    res = client.get(f"/api/v1/events/{uuid.uuid4()}/door-pack")
+    assert res.status_code == 404
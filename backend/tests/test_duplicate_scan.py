@@ -15,7 +15,7 @@ def test_duplicate_scan(client, test_event, test_member):
         "scanned_by": "tester"
     }
 
-    with patch.object(passkit, "validate_pass", return_value=(True, None, {"status": "ACTIVE"})):
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})):
         # First scan (should succeed)
         r1 = client.post("/api/v1/scan", json=payload)
         assert r1.status_code == 200
@@ -24,3 +24,26 @@ def test_duplicate_scan(client, test_event, test_member):
         r2 = client.post("/api/v1/scan", json=payload)
         assert r2.status_code == 409
         assert "Duplicate" in r2.json()["detail"]
+
+
+def test_concurrent_duplicate_is_rejected_by_unique_index(client, test_event, test_member):
+    payload = {
+        "event_id": str(test_event.id),
+        "pass_id": test_member.pass_id,
+        "mode": "in",
+        "kind": "membership_pass",
+        "guests": 0,
+    }
+
+    # Simulate two doors passing the duplicate pre-check at the same moment
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})), \
+            patch("app.routers.scan._check_event_and_duplicate"), \
+            patch("app.routers.scan._BatchContext.check"):
+        r1 = client.post("/api/v1/scan", json=payload)
+        r2 = client.post("/api/v1/scan", json=payload)
+        batch = client.post("/api/v1/scan/batch", json={"items": [payload]})
+
+    assert r1.status_code == 200
+    assert r2.status_code == 409
+    assert "Duplicate" in r2.json()["detail"]
+    assert batch.json()["results"][0]["error_code"] == "duplicate"
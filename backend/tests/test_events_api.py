@@ -68,3 +68,58 @@ def test_list_events_returns_all_when_not_filtered(client, db):
     assert response.status_code == 200
     names = [row["name"] for row in response.json()]
     assert set(names) == {early.name, late.name}
+
+
+def test_list_events_keyset_pagination(client, db):
+    now = datetime.now(timezone.utc)
+    # Two events share a start time: the id tiebreaker keeps pages disjoint
+    for hours in (0, 1, 1, 2, 3):
+        _create_event(db, name=f"Event {hours}", starts_at=now - timedelta(hours=hours), created_at=now)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/v1/events", params=params)
+        assert response.status_code == 200
+        seen.extend(row["id"] for row in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    full = client.get("/api/v1/events").json()
+    assert seen == [row["id"] for row in full]
+    assert len(seen) == 5
+    assert [row["name"] for row in full][0] == "Event 0"
+
+
+def test_list_events_invalid_cursor(client):
+    assert client.get("/api/v1/events", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_list_events_conditional_get(client, db):
+    now = datetime.now(timezone.utc)
+    event = _create_event(db, name="Gala", starts_at=now - timedelta(hours=1), created_at=now)
+
+    etag = client.get("/api/v1/events").headers["ETag"]
+    assert etag.startswith('W/"')
+    assert client.get("/api/v1/events", headers={"If-None-Match": etag}).status_code == 304
+
+    # Any write to events changes the version behind the ETag
+    event.location = "Hall A"
+    db.commit()
+    response = client.get("/api/v1/events", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["location"] == "Hall A"
+
+
+def test_active_only_etag_tracks_the_next_start_or_end(db):
+    from app.routers.events import _next_active_change
+
+    now = datetime(2026, 5, 1, 12, 0)
+    _create_event(db, name="Running", starts_at=now - timedelta(hours=1), ends_at=now + timedelta(hours=3))
+    _create_event(db, name="Soon", starts_at=now + timedelta(hours=1))
+
+    # Same result (and ETag) until "Soon" starts, then until "Running" ends
+    assert _next_active_change(db, now) == now + timedelta(hours=1)
+    assert _next_active_change(db, now + timedelta(minutes=30)) == now + timedelta(hours=1)
+    assert _next_active_change(db, now + timedelta(hours=2)) == now + timedelta(hours=3)
@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import insert
+
+from app.models.models import Scan
+from app.services import passkit
+from app.services.export import export_chunks
+
+
+def _scan(client, event_id, pass_id, **extra):
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})):
+        res = client.post("/api/v1/scan", json={"event_id": str(event_id), "pass_id": pass_id, **extra})
+    assert res.status_code == 200, res.text
+
+
+@pytest.fixture
+def scanned_event(client, test_event, test_member):
+    _scan(client, test_event.id, test_member.pass_id, member_id=str(test_member.id), guests=2,
+          guest_details=[{"name": "Guest One"}, {"name": "Guest Two", "contact": "555-0100"}])
+    _scan(client, test_event.id, "WALKIN", kind="event_ticket")
+    return test_event
+
+
+def test_csv_export_has_a_line_per_guest(client, scanned_event):
+    res = client.get(f"/api/v1/dashboard/events/{scanned_event.id}/export", params={"format": "csv"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/csv")
+    assert "attachment" in res.headers["content-disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    assert [(r["pass_id"], r["guest_name"]) for r in rows] == [
+        ("FAKEPASS123", "Guest One"), ("FAKEPASS123", "Guest Two"), ("WALKIN", ""),
+    ]
+    assert rows[0]["member_name"] == "Test Member"
+    assert rows[0]["membership_type"] == "Family"
+    assert rows[2]["membership_type"] == "Unknown"
+
+
+def test_ndjson_export_nests_guest_details(client, scanned_event):
+    res = client.get(f"/api/v1/dashboard/events/{scanned_event.id}/export", params={"format": "ndjson"})
+    records = [json.loads(line) for line in res.text.splitlines()]
+
+    assert [r["pass_id"] for r in records] == ["FAKEPASS123", "WALKIN"]
+    assert [g["name"] for g in records[0]["guest_details"]] == ["Guest One", "Guest Two"]
+    assert records[1]["guest_details"] == []
+
+
+def test_export_is_gzipped_when_accepted(client, scanned_event):
+    res = client.get(
+        f"/api/v1/dashboard/events/{scanned_event.id}/export",
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert res.headers["content-encoding"] == "gzip"
+    assert len(res.text.splitlines()) == 4  # decoded by the client
+
+
+def test_export_unknown_event(client):
+    assert client.get(f"/api/v1/dashboard/events/{uuid.uuid4()}/export").status_code == 404
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc to read RSS")
+def test_large_export_streams_in_constant_memory(db, test_event):
+    total = 200_000
+    start = datetime(2026, 5, 1, 18, 0)
+    for offset in range(0, total, 10_000):
+        db.execute(insert(Scan.__table__), [
+            {
+                "id": uuid.uuid4(), "event_id": test_event.id, "pass_id": f"PASS{i:06d}", "mode": "in",
+                "kind": "membership_pass", "guests": 0, "is_valid": True, "scanned_by": "bench",
+                "scanned_at": start + timedelta(milliseconds=i), "row_version": i,
+            }
+            for i in range(offset, offset + 10_000)
+        ])
+
+    baseline = peak = _rss_bytes()
+    lines = 0
+    for chunk in export_chunks(db, test_event.id, "csv"):
+        peak = max(peak, _rss_bytes())
+        lines += chunk.count(b"\n")
+
+    assert lines == total + 1  # plus the header
+    assert peak - baseline < 40 * 1024 * 1024
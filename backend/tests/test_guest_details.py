@@ -19,7 +19,7 @@ def test_guest_details_auto_sets_guest_count(client, test_event, test_member):
         "scanned_by": "tester",
     }
 
-    with patch.object(passkit, "validate_pass", return_value=(True, None, {"status": "ACTIVE"})):
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})):
         response = client.post("/api/v1/scan", json=payload)
 
     assert response.status_code == 200
@@ -41,7 +41,7 @@ def test_guest_details_count_mismatch_rejected(client, test_event, test_member):
         "scanned_by": "tester",
     }
 
-    with patch.object(passkit, "validate_pass", return_value=(True, None, {"status": "ACTIVE"})):
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})):
         response = client.post("/api/v1/scan", json=payload)
 
     assert response.status_code == 400
@@ -59,7 +59,7 @@ def test_event_ticket_scan_without_member(client, test_event):
         "scanned_by": "tester",
     }
 
-    with patch.object(passkit, "validate_pass", return_value=(True, None, {"status": "ACTIVE"})):
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})):
         response = client.post("/api/v1/scan", json=payload)
 
     assert response.status_code == 200
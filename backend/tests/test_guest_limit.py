@@ -15,7 +15,7 @@ def test_guest_limit_exceeded(client, test_event, test_member):
         "scanned_by": "tester"
     }
 
-    with patch.object(passkit, "validate_pass", return_value=(True, None, {"status": "ACTIVE"})):
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})):
         response = client.post("/api/v1/scan", json=payload)
 
     assert response.status_code == 400
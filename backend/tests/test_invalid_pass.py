@@ -16,7 +16,7 @@ def test_invalid_pass(client, test_event, test_member):
     }
 
     # Simulate pass being expired
-    with patch.object(passkit, "validate_pass", return_value=(False, "Pass is expired", {"status": "EXPIRED"})):
+    with patch.object(passkit, "validate_pass_async", return_value=(False, "Pass is expired", {"status": "EXPIRED"})):
         response = client.post("/api/v1/scan", json=payload)
 
     assert response.status_code == 200
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+from contextlib import nullcontext
+from unittest.mock import patch
+from uuid import uuid4
+
+import app.db as app_db
+from app.routers.dashboard import event_summary_stream
+from app.services.live import SummaryHub, summary_delta, summary_hub
+
+
+def _summary(event_id, members, by_type):
+    return {
+        "event_id": str(event_id),
+        "total_check_ins": members,
+        "total_guests": 0,
+        "by_membership_type": by_type,
+    }
+
+
+def test_burst_of_notifications_is_coalesced():
+    event_id = uuid4()
+    loads = []
+
+    async def loader(eid):
+        loads.append(eid)
+        return _summary(eid, len(loads), {})
+
+    async def run():
+        hub = SummaryHub(interval_seconds=0.05, queue_size=4, loader=loader)
+        queue = hub.subscribe(event_id)
+        for _ in range(50):
+            hub.notify(event_id)
+        first = await asyncio.wait_for(queue.get(), timeout=1)
+        await asyncio.sleep(0.1)
+        hub.unsubscribe(event_id, queue)
+        return first, queue.qsize()
+
+    first, remaining = asyncio.run(run())
+    assert first["total_check_ins"] == 1
+    assert remaining == 0
+    assert loads == [event_id]
+
+
+def test_notify_from_another_thread():
+    event_id = uuid4()
+
+    async def loader(eid):
+        return _summary(eid, 1, {})
+
+    async def run():
+        hub = SummaryHub(interval_seconds=0, queue_size=4, loader=loader)
+        queue = hub.subscribe(event_id)
+        worker = threading.Thread(target=hub.notify, args=(event_id,))
+        worker.start()
+        worker.join()
+        summary = await asyncio.wait_for(queue.get(), timeout=1)
+        hub.unsubscribe(event_id, queue)
+        return summary
+
+    assert asyncio.run(run())["total_check_ins"] == 1
+
+
+def test_slow_subscriber_queue_is_bounded():
+    event_id = uuid4()
+    count = 0
+
+    async def loader(eid):
+        nonlocal count
+        count += 1
+        return _summary(eid, count, {})
+
+    async def run():
+        hub = SummaryHub(interval_seconds=0, queue_size=2, loader=loader)
+        queue = hub.subscribe(event_id)
+        for _ in range(5):
+            hub.notify(event_id)
+            await asyncio.sleep(0.01)
+        received = [queue.get_nowait()["total_check_ins"] for _ in range(queue.qsize())]
+        hub.unsubscribe(event_id, queue)
+        return received
+
+    assert asyncio.run(run()) == [4, 5]
+
+
+def test_unsubscribe_stops_pump():
+    event_id = uuid4()
+
+    async def run():
+        hub = SummaryHub(interval_seconds=0, queue_size=2, loader=None)
+        queue = hub.subscribe(event_id)
+        hub.unsubscribe(event_id, queue)
+        hub.notify(event_id)  # no subscribers: ignored
+        return hub.subscriber_count(event_id)
+
+    assert asyncio.run(run()) == 0
+
+
+def test_summary_delta_only_carries_changes():
+    event_id = uuid4()
+    before = _summary(event_id, 2, {"Family": {"members": 1, "guests": 0}, "Patron": {"members": 1, "guests": 0}})
+    after = _summary(event_id, 3, {"Family": {"members": 2, "guests": 0}, "Patron": {"members": 1, "guests": 0}})
+
+    assert summary_delta(None, before) == before
+    assert summary_delta(before, before) is None
+    assert summary_delta(before, after)["by_membership_type"] == {"Family": {"members": 2, "guests": 0}}
+    assert summary_delta(before, after)["total_check_ins"] == 3
+
+
+def test_stream_of_unknown_event_is_404(client):
+    assert client.get(f"/api/v1/dashboard/events/{uuid4()}/stream").status_code == 404
+
+
+def test_stream_subscribes_only_once_its_body_is_sent(db, test_event):
+    async def run():
+        response = await event_summary_stream(test_event.id, db)
+        # A client that disconnects before the first chunk leaves no subscriber behind
+        before = summary_hub.subscriber_count(test_event.id)
+        first = await response.body_iterator.__anext__()
+        during = summary_hub.subscriber_count(test_event.id)
+        await response.body_iterator.aclose()
+        return before, first, during, summary_hub.subscriber_count(test_event.id)
+
+    with patch.object(app_db, "SessionLocal", lambda: nullcontext(db)):
+        before, first, during, after = asyncio.run(run())
+    assert (before, during, after) == (0, 1, 0)
+    assert first.startswith('event: summary\ndata: {"event_id":')
@@ -0,0 +1,113 @@
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from app.models.models import Member, MembershipType, Scan
+from app.services import passkit
+from app.services.members import MemberDirectory, member_directory
+
+
+VALID = (True, None, {"status": "ACTIVE"})
+
+
+def _scan(client, event_id, pass_id, guests=0):
+    with patch.object(passkit, "validate_pass_async", return_value=VALID):
+        return client.post("/api/v1/scan", json={
+            "event_id": str(event_id),
+            "pass_id": pass_id,
+            "guests": guests,
+        })
+
+
+def _add_member(db, pass_id, membership_type=MembershipType.INDIVIDUAL, name="Other Member"):
+    m = Member(
+        id=uuid.uuid4(),
+        full_name=name,
+        email=f"{pass_id.lower()}@example.com",
+        membership_type=membership_type,
+        pass_id=pass_id,
+        created_at=datetime.now(timezone.utc),
+    )
+    db.add(m)
+    db.commit()
+    return m
+
+
+def test_scan_without_member_id_resolves_member(client, db, test_event, test_member):
+    res = _scan(client, test_event.id, test_member.pass_id, guests=2)
+    assert res.status_code == 200, res.text
+    assert res.json()["member_name"] == "Test Member"
+
+    scan = db.query(Scan).filter(Scan.event_id == test_event.id).one()
+    assert scan.member_id == test_member.id
+
+    summary = client.get(f"/api/v1/dashboard/events/{test_event.id}/summary").json()
+    assert summary["by_membership_type"]["Family"]["guests"] == 2
+
+
+def test_guest_limit_applies_to_resolved_member(client, test_event, test_member):
+    res = _scan(client, test_event.id, test_member.pass_id, guests=99)
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Family members can only bring up to 3 guests."
+
+
+def test_unknown_pass_is_stored_without_member(client, db, test_event):
+    res = _scan(client, test_event.id, "NOSUCHPASS")
+    assert res.status_code == 200
+    assert res.json()["member_name"] is None
+
+
+def test_batch_resolves_members_in_one_query(client, db, test_event, test_member):
+    other = _add_member(db, "OTHERPASS")
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        if "FROM members" in statement and "members.pass_id IN" in statement:
+            statements.append(statement)
+
+    engine = db.get_bind().engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        with patch.object(passkit, "validate_pass_async", return_value=VALID):
+            res = client.post("/api/v1/scan/batch", json={"items": [
+                {"event_id": str(test_event.id), "pass_id": test_member.pass_id, "guests": 1},
+                {"event_id": str(test_event.id), "pass_id": other.pass_id, "guests": 0},
+            ]})
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert res.status_code == 200, res.text
+    names = [r["scan"]["member_name"] for r in res.json()["results"]]
+    assert names == ["Test Member", "Other Member"]
+    assert len(statements) == 1
+
+
+def test_directory_caches_hits_and_misses(db, test_member):
+    directory = MemberDirectory(ttl_seconds=60, negative_ttl_seconds=60, max_size=10)
+    with patch.object(db, "execute", wraps=db.execute) as execute:
+        assert directory.lookup(db, test_member.pass_id).id == test_member.id
+        assert directory.lookup(db, "MISSING") is None
+        assert directory.lookup(db, test_member.pass_id).id == test_member.id
+        assert directory.lookup(db, "MISSING") is None
+    assert execute.call_count == 2
+
+
+def test_member_changes_invalidate_directory(db, test_member):
+    assert member_directory.lookup(db, test_member.pass_id).membership_type == MembershipType.FAMILY
+    assert member_directory.lookup(db, "NEWPASS") is None
+
+    test_member.membership_type = MembershipType.INDIVIDUAL
+    db.commit()
+    added = _add_member(db, "NEWPASS")
+
+    assert member_directory.lookup(db, test_member.pass_id).membership_type == MembershipType.INDIVIDUAL
+    assert member_directory.lookup(db, "NEWPASS").id == added.id
+
+    # Re-keying a pass drops the old entry too
+    old_pass_id = test_member.pass_id
+    test_member.pass_id = "REISSUED"
+    db.commit()
+    assert member_directory.lookup(db, old_pass_id) is None
+    assert member_directory.lookup(db, "REISSUED").id == test_member.id
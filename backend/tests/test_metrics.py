@@ -0,0 +1,93 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.db import get_db
+from app.routers import api_router
+from app.services import metrics, passkit
+
+SCAN_ROUTE = "/api/v1/scan/"
+
+
+@pytest.fixture
+def metered_client(db):
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.include_router(api_router)
+    app.dependency_overrides[get_db] = lambda: db
+    with TestClient(app) as c:
+        yield c
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def _scan(client, event, pass_id, guests=0):
+    return client.post(SCAN_ROUTE, json={
+        "event_id": str(event.id),
+        "pass_id": pass_id,
+        "kind": "membership_pass",
+        "mode": "in",
+        "guests": guests,
+    })
+
+
+def test_request_latency_queries_and_scan_outcomes(metered_client, test_event, test_member):
+    requests_before = _sample("http_request_duration_seconds_count", method="POST", route=SCAN_ROUTE, status="200")
+    queries_before = _sample("db_queries_per_request_sum", route=SCAN_ROUTE)
+    accepted_before = _sample("scan_outcomes_total", outcome="accepted")
+    duplicate_before = _sample("scan_outcomes_total", outcome="duplicate")
+    over_limit_before = _sample("scan_outcomes_total", outcome="guest_limit_exceeded")
+
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})):
+        assert _scan(metered_client, test_event, test_member.pass_id).status_code == 200
+        assert _scan(metered_client, test_event, test_member.pass_id).status_code == 409
+        metered_client.post(f"{SCAN_ROUTE}batch", json={"items": [{
+            "event_id": str(test_event.id), "pass_id": "OTHER", "member_id": str(test_member.id),
+            "kind": "membership_pass", "mode": "in", "guests": 9,
+        }]})
+
+    assert _sample("http_request_duration_seconds_count", method="POST", route=SCAN_ROUTE, status="200") \
+        == requests_before + 1
+    assert _sample("db_queries_per_request_sum", route=SCAN_ROUTE) > queries_before
+    assert _sample("scan_outcomes_total", outcome="accepted") == accepted_before + 1
+    assert _sample("scan_outcomes_total", outcome="duplicate") == duplicate_before + 1
+    assert _sample("scan_outcomes_total", outcome="guest_limit_exceeded") == over_limit_before + 1
+
+
+def test_unmatched_paths_share_one_label(metered_client):
+    before = _sample("http_request_duration_seconds_count", method="GET", route="unmatched", status="404")
+    metered_client.get("/no/such/path/123")
+    assert _sample("http_request_duration_seconds_count", method="GET", route="unmatched", status="404") == before + 1
+
+
+def test_passkit_calls_are_timed_by_outcome():
+    def respond(request):
+        if request.url.path.endswith("DOWN"):
+            return httpx.Response(503)
+        return httpx.Response(200, json={"status": "REVOKED"})
+
+    client = httpx.Client(transport=httpx.MockTransport(respond), base_url="https://passkit.test")
+    invalid_before = _sample("passkit_request_duration_seconds_count", outcome="invalid")
+    error_before = _sample("passkit_request_duration_seconds_count", outcome="http_5xx")
+
+    with patch.object(passkit, "get_passkit_client", return_value=client):
+        assert passkit._fetch_pass("REVOKED")[0] is False
+        with pytest.raises(passkit.PasskitValidationError):
+            passkit._fetch_pass("DOWN")
+
+    assert _sample("passkit_request_duration_seconds_count", outcome="invalid") == invalid_before + 1
+    assert _sample("passkit_request_duration_seconds_count", outcome="http_5xx") == error_before + 1
+
+
+def test_metrics_endpoint_exposes_pool_gauges():
+    from app.main import app
+
+    body = TestClient(app).get("/metrics").text
+    assert "db_pool_checked_out_connections" in body
+    assert "passkit_request_duration_seconds" in body
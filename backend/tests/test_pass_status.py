@@ -0,0 +1,153 @@
+import asyncio
+import time
+import uuid
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+import app.db as app_db
+from app.models.models import Member, MembershipType, PassStatus
+from app.services import passkit
+from app.services.pass_prefetch import RateLimiter, prefetch_job, prefetch_pass_statuses
+from app.services.query_budget import track_queries
+
+
+@pytest.fixture
+def shared_session(db):
+    """Point the short-lived sessions used by validation and the job at the test transaction."""
+    with patch.object(app_db, "SessionLocal", lambda: nullcontext(db)):
+        yield db
+
+
+def _status(db, pass_id, is_valid=True, age=timedelta(0), status="ACTIVE"):
+    db.add(PassStatus(
+        pass_id=pass_id,
+        is_valid=is_valid,
+        reason=None if is_valid else "Pass is revoked",
+        payload={"status": status},
+        checked_at=datetime.now(timezone.utc) - age,
+    ))
+    db.commit()
+
+
+def test_fresh_pass_status_skips_passkit(shared_session):
+    _status(shared_session, "PREFETCHED")
+    with patch.object(passkit, "IS_STUB_MODE", False), patch.object(passkit, "_fetch_pass_async") as fetch:
+        result = asyncio.run(passkit.validate_pass_async("PREFETCHED"))
+
+    assert result == (True, None, {"status": "ACTIVE"})
+    fetch.assert_not_called()
+    assert passkit.validation_cache.get("PREFETCHED") == result
+
+
+def test_stale_pass_status_falls_back_to_passkit(shared_session):
+    _status(shared_session, "OLDVALID", age=timedelta(seconds=passkit.PASS_STATUS_MAX_AGE_SECONDS + 60))
+    # Negative verdicts are trusted for a much shorter time
+    _status(shared_session, "OLDREVOKED", is_valid=False, status="REVOKED",
+            age=timedelta(seconds=passkit.PASS_STATUS_NEGATIVE_MAX_AGE_SECONDS + 60))
+
+    live = (True, None, {"status": "ACTIVE", "live": True})
+    with patch.object(passkit, "IS_STUB_MODE", False), \
+            patch.object(passkit, "_fetch_pass", return_value=live) as fetch:
+        assert passkit.validate_pass("OLDVALID") == live
+        assert passkit.validate_pass("OLDREVOKED") == live
+    assert fetch.call_count == 2
+
+
+def _member(db, pass_id):
+    db.add(Member(id=uuid.uuid4(), full_name=pass_id, membership_type=MembershipType.LIFE, pass_id=pass_id))
+    db.commit()
+
+
+def test_prefetch_stores_verdicts_and_skips_fresh_passes(shared_session, test_member):
+    for pass_id in ("REVOKEDPASS", "FLAKYPASS"):
+        _member(shared_session, pass_id)
+
+    async def fetch(pass_id):
+        if pass_id == "FLAKYPASS":
+            raise passkit.PasskitValidationError("down")
+        if pass_id == "REVOKEDPASS":
+            return False, "Pass is revoked", {"status": "REVOKED"}
+        return True, None, {"status": "ACTIVE"}
+
+    with patch.object(passkit, "IS_STUB_MODE", False), patch.object(passkit, "_fetch_pass_async", side_effect=fetch):
+        result = asyncio.run(prefetch_pass_statuses(rate_per_second=0))
+        assert (result.total, result.valid, result.invalid, result.failed) == (3, 1, 1, 1)
+
+        stored = {row.pass_id: row for row in shared_session.query(PassStatus)}
+        assert set(stored) == {test_member.pass_id, "REVOKEDPASS"}
+        assert stored["REVOKEDPASS"].reason == "Pass is revoked"
+
+        # Only the pass that failed is checked again
+        assert asyncio.run(prefetch_pass_statuses(rate_per_second=0)).total == 1
+        assert asyncio.run(prefetch_pass_statuses(refresh_all=True, rate_per_second=0)).total == 3
+
+
+def test_rate_limiter_spaces_calls(fake_clock):
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    limiter = RateLimiter(rate_per_second=4, clock=fake_clock, sleep=sleep)
+
+    async def run():
+        for _ in range(3):
+            await limiter.acquire()
+
+    asyncio.run(run())
+    assert sleeps == [0.25, 0.5]
+
+
+def test_prefetch_endpoint_runs_in_background(client, shared_session, test_member):
+    with patch.object(passkit, "IS_STUB_MODE", True):
+        res = client.post("/api/v1/admin/passes/prefetch")
+        assert res.status_code == 202
+
+        deadline = time.monotonic() + 5
+        while (status := client.get("/api/v1/admin/passes/prefetch").json())["running"]:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+    assert (status["total"], status["valid"]) == (1, 1)
+    assert shared_session.get(PassStatus, test_member.pass_id).is_valid
+
+
+def test_prefetch_job_queries_are_not_the_starting_requests(shared_session, test_member):
+    async def start_and_wait():
+        with track_queries() as request_log:
+            prefetch_job.start()
+            await prefetch_job._task
+        return request_log.count
+
+    with patch.object(passkit, "IS_STUB_MODE", True):
+        assert asyncio.run(start_and_wait()) == 0
+    assert shared_session.get(PassStatus, test_member.pass_id).is_valid
+
+
+def test_door_pack_reports_prefetched_status(client, db, test_event, test_member):
+    _status(db, test_member.pass_id, is_valid=False, status="REVOKED")
+    pack = client.get(f"/api/v1/events/{test_event.id}/door-pack").json()
+    assert pack["members"][0]["pass_status"] == "REVOKED"
+
+
+def test_scans_read_pass_status_on_the_request_session(client, db, test_event):
+    for pass_id in ("DOOR1", "DOOR2", "DOOR3"):
+        _status(db, pass_id)
+
+    def ticket(pass_id):
+        return {"event_id": str(test_event.id), "pass_id": pass_id, "kind": "event_ticket", "mode": "in"}
+
+    # No second pool connection per scan, and one pass_status query for a whole batch
+    with patch.object(passkit, "IS_STUB_MODE", False), \
+            patch.object(passkit, "_fetch_pass_async") as fetch, \
+            patch.object(app_db, "SessionLocal", side_effect=AssertionError("opened a second session")), \
+            patch.object(passkit, "stored_statuses", wraps=passkit.stored_statuses) as lookup:
+        assert client.post("/api/v1/scan/", json=ticket("DOOR1")).status_code == 200
+        batch = client.post("/api/v1/scan/batch", json={"items": [ticket("DOOR2"), ticket("DOOR3")]})
+
+    assert [r["status_code"] for r in batch.json()["results"]] == [200, 200]
+    fetch.assert_not_called()
+    assert lookup.call_count == 2
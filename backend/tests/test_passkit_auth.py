@@ -0,0 +1,53 @@
+import base64
+import json
+import time
+
+import pytest
+
+from app.services.passkit_auth import PasskitTokenManager, make_passkit_jwt
+
+
+def _claims(token):
+    segment = token.split(".")[1]
+    return json.loads(base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4)))
+
+
+def test_jwt_uses_configurable_skew():
+    claims = _claims(make_passkit_jwt(ttl_seconds=60, skew_seconds=25, now=1000))
+    assert claims["iat"] == 975
+    assert claims["exp"] == 1060
+
+
+def test_token_is_reused_until_refresh_window(fake_clock):
+    manager = PasskitTokenManager(ttl_seconds=120, refresh_margin_seconds=30, skew_seconds=10, clock=fake_clock)
+
+    first = manager.get_token()
+    fake_clock.now += 60
+    assert manager.get_token() == first
+
+
+def test_token_refreshes_in_background_before_expiry(fake_clock):
+    manager = PasskitTokenManager(ttl_seconds=120, refresh_margin_seconds=30, skew_seconds=10, clock=fake_clock)
+
+    first = manager.get_token()
+    # Inside the refresh window: the old token is still served, a new one is minted off-path
+    fake_clock.now += 85
+    assert manager.get_token() == first
+    for _ in range(100):
+        if manager._token.value != first:
+            break
+        time.sleep(0.01)
+    assert manager.get_token() != first
+
+
+def test_lapsed_token_is_replaced_inline(fake_clock):
+    manager = PasskitTokenManager(ttl_seconds=120, refresh_margin_seconds=30, skew_seconds=10, clock=fake_clock)
+
+    first = manager.get_token()
+    fake_clock.now += 500
+    assert manager.get_token() != first
+
+
+def test_rejects_ttl_shorter_than_margins():
+    with pytest.raises(ValueError):
+        PasskitTokenManager(ttl_seconds=30, refresh_margin_seconds=20, skew_seconds=10)
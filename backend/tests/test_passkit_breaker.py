@@ -0,0 +1,208 @@
+import asyncio
+from contextlib import nullcontext
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+import app.db as app_db
+from app.models.models import EventAttendanceCounter, Scan
+from app.services import passkit
+from app.services.revalidation import revalidate_deferred
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_once(make_breaker, fake_clock):
+    breaker = make_breaker(failure_threshold=3, open_seconds=10)
+
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success(0.1)  # a success resets the streak
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    fake_clock.now += 10
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    fake_clock.now += 10
+    assert breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == "closed"
+
+
+def test_breaker_opens_on_slow_p95():
+    breaker = passkit.CircuitBreaker(p95_seconds=1.0, window=20, min_samples=20)
+    for _ in range(18):
+        breaker.record_success(0.05)
+    breaker.record_success(3.0)
+    assert breaker.state == "closed"  # not enough samples yet
+    breaker.record_success(3.0)
+    assert breaker.state == "open"
+
+
+def test_open_breaker_fails_fast_without_calling_passkit():
+    def fail(*args, **kwargs):
+        raise httpx.ConnectError("refused")
+
+    client = httpx.Client(transport=httpx.MockTransport(fail), base_url="https://passkit.test")
+    with patch.object(passkit, "get_passkit_client", return_value=client) as get_client:
+        for _ in range(passkit.breaker.failure_threshold):
+            with pytest.raises(passkit.PasskitValidationError):
+                passkit._fetch_pass("P1")
+        with pytest.raises(passkit.PasskitUnavailable):
+            passkit._fetch_pass("P1")
+    assert get_client.call_count == passkit.breaker.failure_threshold
+
+
+def test_not_found_does_not_count_against_passkit():
+    client = httpx.Client(
+        transport=httpx.MockTransport(lambda request: httpx.Response(404)), base_url="https://passkit.test"
+    )
+    with patch.object(passkit, "get_passkit_client", return_value=client):
+        for _ in range(passkit.breaker.failure_threshold + 1):
+            with pytest.raises(passkit.PasskitValidationError):
+                passkit._fetch_pass("P1")
+    assert passkit.breaker.state == "closed"
+
+
+def test_hedged_request_returns_the_faster_attempt():
+    delays = [1.0, 0.0]
+
+    async def call():
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    with patch.object(passkit, "HEDGE_DELAY_SECONDS", 0.05):
+        assert asyncio.run(passkit._hedged(call)) == 0.0
+
+
+def test_cancelled_probe_lets_the_next_call_probe(make_breaker, fake_clock):
+    breaker = make_breaker(failure_threshold=1, open_seconds=10)
+    breaker.record_failure()
+    fake_clock.now += 10
+    started = []
+
+    async def hang(pass_id):
+        started.append(asyncio.current_task())
+        await asyncio.sleep(60)
+
+    async def probe_then_disconnect():
+        probe = asyncio.create_task(passkit._fetch_pass_async("PROBE"))
+        await asyncio.sleep(0.01)
+        probe.cancel()  # e.g. the scanner's request was dropped
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    with patch.object(passkit, "_request_pass_async", hang), \
+            patch.object(passkit, "HEDGE_DELAY_SECONDS", 0.05):
+        asyncio.run(probe_then_disconnect())
+
+    assert started[0].cancelled()  # the attempt didn't outlive the caller
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def _scan(client, event, pass_id="OUTAGEPASS", kind="event_ticket"):
+    return client.post("/api/v1/scan/", json={
+        "event_id": str(event.id),
+        "pass_id": pass_id,
+        "kind": kind,
+        "mode": "in",
+        "guests": 1,
+    })
+
+
+def test_outage_rejects_unless_event_admits_deferred(client, db, test_event):
+    with patch.object(passkit, "validate_pass_async", side_effect=passkit.PasskitUnavailable("circuit open")):
+        res = _scan(client, test_event)
+        assert res.status_code == 503
+
+        test_event.passkit_outage_policy = "admit_deferred"
+        db.commit()
+        res = _scan(client, test_event)
+        assert res.status_code == 200, res.text
+        assert (res.json()["is_valid"], res.json()["validation_reason"]) == (True, "deferred")
+
+        batch = client.post("/api/v1/scan/batch", json={"items": [{
+            "event_id": str(test_event.id), "pass_id": "OUTAGEPASS2", "kind": "event_ticket", "mode": "in",
+        }]}).json()
+        assert batch["results"][0]["scan"]["validation_reason"] == "deferred"
+
+
+def test_revalidator_records_passkit_verdict_and_moves_counters(client, db, test_event):
+    test_event.passkit_outage_policy = "admit_deferred"
+    db.commit()
+    with patch.object(passkit, "validate_pass_async", side_effect=passkit.PasskitUnavailable("circuit open")):
+        assert _scan(client, test_event).status_code == 200
+
+    async def fetch(pass_id):
+        return False, "Pass is revoked", {"status": "REVOKED", "member_type": "Patron"}
+
+    with patch.object(app_db, "SessionLocal", lambda: nullcontext(db)), \
+            patch.object(passkit, "IS_STUB_MODE", False), \
+            patch.object(passkit, "_fetch_pass_async", side_effect=fetch):
+        assert asyncio.run(revalidate_deferred()) == 1
+        assert asyncio.run(revalidate_deferred()) == 0  # nothing left deferred
+
+    db.expire_all()
+    scan = db.query(Scan).filter(Scan.pass_id == "OUTAGEPASS").one()
+    assert (scan.is_valid, scan.validation_reason) == (False, "Pass is revoked")
+    counters = {
+        row.membership_type: (row.members, row.guests)
+        for row in db.query(EventAttendanceCounter).filter(EventAttendanceCounter.event_id == test_event.id)
+    }
+    assert counters == {"Unknown": (0, 0), "Patron": (1, 1)}
+
+
+def _passkit_request(status_for):
+    async def request(pass_id):
+        status = status_for(pass_id)
+        return passkit._parse_response(httpx.Response(
+            status, json={"status": "ACTIVE"}, request=httpx.Request("GET", f"https://passkit.test/pass/{pass_id}")
+        ))
+    return request
+
+
+def test_pass_refused_by_passkit_is_not_admitted_deferred(client, db, test_event):
+    test_event.passkit_outage_policy = "admit_deferred"
+    db.commit()
+    with patch.object(passkit, "IS_STUB_MODE", False), \
+            patch.object(passkit, "_request_pass_async", _passkit_request(lambda pass_id: 404)):
+        res = _scan(client, test_event, pass_id="FORGED")
+        batch = client.post("/api/v1/scan/batch", json={"items": [{
+            "event_id": str(test_event.id), "pass_id": "FORGED2", "kind": "event_ticket", "mode": "in",
+        }]}).json()
+
+    assert passkit.breaker.state == "closed"
+    assert res.status_code == 503
+    assert res.json()["detail"] == "PassKit error: 404"
+    assert batch["results"][0]["error_code"] == "passkit_error"
+    assert db.query(Scan).filter(Scan.pass_id.in_(["FORGED", "FORGED2"])).count() == 0
+
+
+def test_revalidator_records_a_refused_pass_and_moves_past_it(client, db, test_event):
+    test_event.passkit_outage_policy = "admit_deferred"
+    db.commit()
+    with patch.object(passkit, "validate_pass_async", side_effect=passkit.PasskitUnavailable("circuit open")):
+        for pass_id in ("FORGED", "GOOD"):  # the refused pass is at the head of the queue
+            assert _scan(client, test_event, pass_id=pass_id).status_code == 200
+
+    with patch.object(app_db, "SessionLocal", lambda: nullcontext(db)), \
+            patch.object(passkit, "IS_STUB_MODE", False), \
+            patch.object(passkit, "_request_pass_async",
+                         _passkit_request(lambda pass_id: 404 if pass_id == "FORGED" else 200)):
+        assert asyncio.run(revalidate_deferred()) == 2
+
+    db.expire_all()
+    verdicts = {
+        scan.pass_id: (scan.is_valid, scan.validation_reason)
+        for scan in db.query(Scan).filter(Scan.pass_id.in_(["FORGED", "GOOD"]))
+    }
+    assert verdicts == {"FORGED": (False, "PassKit error: 404"), "GOOD": (True, None)}
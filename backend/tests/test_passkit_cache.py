@@ -0,0 +1,61 @@
+from unittest.mock import patch
+
+from app.services import passkit
+from app.services.passkit import PassValidationCache
+
+
+def test_cache_hits_misses_and_ttl(fake_clock):
+    cache = PassValidationCache(ttl_seconds=60, negative_ttl_seconds=5, max_size=10, clock=fake_clock)
+
+    assert cache.get("PASS1") is None
+    cache.set("PASS1", (True, None, {"status": "ACTIVE"}))
+    cache.set("PASS2", (False, "Pass is revoked", {"status": "REVOKED"}))
+
+    assert cache.get("PASS1") == (True, None, {"status": "ACTIVE"})
+    assert cache.get("PASS2")[1] == "Pass is revoked"
+
+    # Negative results expire sooner than valid ones
+    fake_clock.now += 10
+    assert cache.get("PASS2") is None
+    assert cache.get("PASS1") is not None
+
+    fake_clock.now += 51
+    assert cache.get("PASS1") is None
+    assert cache.stats() == {"size": 0, "hits": 3, "misses": 3}
+
+
+def test_cache_evicts_least_recently_used():
+    cache = PassValidationCache(ttl_seconds=60, negative_ttl_seconds=5, max_size=2)
+    cache.set("A", (True, None, {}))
+    cache.set("B", (True, None, {}))
+    cache.get("A")  # A becomes most recently used
+    cache.set("C", (True, None, {}))
+
+    assert cache.get("B") is None
+    assert cache.get("A") is not None
+    assert cache.get("C") is not None
+
+
+def test_validate_pass_uses_cache():
+    passkit.validation_cache.clear()
+    with patch.object(passkit, "IS_STUB_MODE", False), \
+            patch.object(passkit, "_fetch_pass", return_value=(True, None, {"status": "ACTIVE"})) as fetch:
+        first = passkit.validate_pass("CACHEDPASS")
+        second = passkit.validate_pass("CACHEDPASS")
+
+    assert first == second == (True, None, {"status": "ACTIVE"})
+    assert fetch.call_count == 1
+    passkit.validation_cache.clear()
+
+
+def test_validate_pass_does_not_cache_errors():
+    passkit.validation_cache.clear()
+    with patch.object(passkit, "IS_STUB_MODE", False), \
+            patch.object(passkit, "_fetch_pass", side_effect=passkit.PasskitValidationError("down")) as fetch:
+        for _ in range(2):
+            try:
+                passkit.validate_pass("FLAKYPASS")
+            except passkit.PasskitValidationError:
+                pass
+
+    assert fetch.call_count == 2
@@ -0,0 +1,21 @@
+from app.services import passkit
+
+
+def test_shared_client_is_reused_until_closed():
+    client = passkit.get_passkit_client()
+    assert passkit.get_passkit_client() is client
+
+    passkit.close_passkit_client()
+    assert client.is_closed
+
+    reopened = passkit.get_passkit_client()
+    assert reopened is not client
+    passkit.close_passkit_client()
+
+
+def test_client_signs_each_request():
+    client = passkit.passkit_client()
+    request = client.build_request("GET", "/pass/ABC")
+    signed = next(client.auth.auth_flow(request))
+    assert signed.headers["Authorization"].startswith("Bearer ")
+    client.close()
@@ -0,0 +1,91 @@
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from fastapi import Depends, FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.db import get_db
+from app.models.models import Member, MembershipType, PassStatus
+from app.routers import api_router
+from app.services import passkit
+from app.services.query_budget import ROUTE_BUDGETS, QueryBudgetMiddleware, repeated_statements, track_queries
+
+
+def test_every_route_has_a_budget():
+    routes = {
+        (method, route.path)
+        for route in api_router.routes if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+    assert routes == set(ROUTE_BUDGETS)
+
+
+def test_warm_scan_stays_within_four_statements(client, test_event, query_budgets):
+    def scan(pass_id):
+        return client.post("/api/v1/scan/", json={
+            "event_id": str(test_event.id), "pass_id": pass_id, "kind": "event_ticket", "mode": "in",
+        })
+
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})):
+        assert scan("FIRST").status_code == 200
+        query_budgets[("POST", "/api/v1/scan/")] = 4
+        query_budgets[("GET", "/api/v1/dashboard/events/{event_id}/summary")] = 2
+        assert scan("SECOND").status_code == 200
+    assert client.get(f"/api/v1/dashboard/events/{test_event.id}/summary").status_code == 200
+
+
+def test_member_scans_within_budget(client, db, test_event, query_budgets):
+    for pass_id in ("MEMBER1", "MEMBER2"):
+        db.add(Member(id=uuid.uuid4(), full_name=pass_id, membership_type=MembershipType.FAMILY, pass_id=pass_id))
+        db.add(PassStatus(pass_id=pass_id, is_valid=True, reason=None, payload={"status": "ACTIVE"},
+                          checked_at=datetime.now(timezone.utc)))
+    db.commit()
+
+    def scan(pass_id, **extra):
+        return client.post("/api/v1/scan/", json={"event_id": str(test_event.id), "pass_id": pass_id, **extra})
+
+    # Validation reads pass_status on the request's session
+    with patch.object(passkit, "IS_STUB_MODE", False):
+        # Cold: the route's full budget, with guest details
+        assert scan("MEMBER1", guests=1, guest_details=[{"name": "Guest"}]).status_code == 200
+        query_budgets[("POST", "/api/v1/scan/")] = 4
+        assert scan("MEMBER2").status_code == 200
+
+
+def test_event_routes_stay_within_budget(client):
+    created = client.post("/api/v1/events/", json={"name": "Budgeted", "starts_at": "2026-05-01T18:00:00Z"})
+    assert created.status_code == 200
+    assert client.get(f"/api/v1/events/{created.json()['id']}").status_code == 200
+
+
+def test_repeated_statements_are_reported(db, test_member):
+    app = FastAPI()
+    reports = []
+    app.add_middleware(QueryBudgetMiddleware, on_report=reports.append)
+
+    @app.get("/members/{count}")
+    def lazy_loop(count: int, session=Depends(get_db)):
+        for _ in range(count):
+            session.execute(select(Member).where(Member.id == test_member.id)).all()
+        return {}
+
+    app.dependency_overrides[get_db] = lambda: db
+    with TestClient(app) as c:
+        c.get("/members/2")
+        assert reports == []
+        c.get("/members/3")
+
+    [report] = reports
+    assert (report.route, report.count, report.budget) == ("/members/{count}", 3, None)
+    assert report.repeated[0][1] == 3
+
+
+def test_track_queries_counts_statements(db):
+    with track_queries() as queries:
+        db.execute(select(Member)).all()
+        db.execute(select(Member)).all()
+    assert queries.count == 2
+    assert repeated_statements(queries, threshold=2)[0][1] == 2
@@ -0,0 +1,31 @@
+import json
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from app.core.responses import ORJSONResponse
+from app.schemas.dashboard import EventSummary, MembershipBreakdown
+from app.schemas.scan import GuestDetailOut, ScanOut
+
+
+def test_orjson_body_matches_pydantic_json():
+    scan = ScanOut.model_construct(
+        id=uuid4(),
+        scanned_at=datetime(2026, 5, 2, 18, 0, 5, 250000, tzinfo=timezone.utc),
+        is_valid=True,
+        validation_reason=None,
+        guests=1,
+        kind="membership_pass",
+        membership_type="Family",
+        member_name="Ada",
+        guest_details=[GuestDetailOut.model_construct(id=uuid4(), name="Guest", contact=None, notes=None)],
+    )
+    summary = EventSummary.model_construct(
+        event_id=uuid4(),
+        total_check_ins=1,
+        total_guests=1,
+        by_membership_type={"Family": MembershipBreakdown.model_construct(members=1, guests=1)},
+    )
+
+    for model in (scan, summary):
+        assert json.loads(ORJSONResponse(model).body) == json.loads(model.model_dump_json())
+    assert json.loads(ORJSONResponse([scan]).body)[0]["scanned_at"] == "2026-05-02T18:00:05.250000Z"
@@ -0,0 +1,74 @@
+import io
+from unittest.mock import patch
+
+from app.models.models import Member, MembershipType
+from app.services import roster
+from app.services.members import member_directory
+
+ROSTER = """pass_id,full_name,email,membership_type
+FAKEPASS123,Test Member,test@example.com,Individual
+NEW1,New One,,family
+NEW2,New Two,two@example.com,PATRON
+NEW2,New Two Renamed,two@example.com,Patron
+BAD1,Bad Type,,Platinum
+,No Pass,,Family
+"""
+
+
+def _import(client, body):
+    return client.post("/api/v1/admin/members/import", content=body, headers={"Content-Type": "text/csv"})
+
+
+def test_import_upserts_and_reports_counts(client, db, test_member):
+    res = _import(client, ROSTER)
+    assert res.status_code == 200, res.text
+    body = res.json()
+
+    assert (body["inserted"], body["updated"], body["rejected"]) == (2, 1, 2)
+    assert body["unchanged"] == 1  # the first NEW2 line, superseded by the second
+    assert body["errors"] == [
+        {"line": 6, "reason": "Unknown membership_type 'Platinum'"},
+        {"line": 7, "reason": "pass_id is required"},
+    ]
+
+    db.expire_all()
+    members = {m.pass_id: m for m in db.query(Member)}
+    assert members["FAKEPASS123"].membership_type == MembershipType.INDIVIDUAL
+    assert members["FAKEPASS123"].id == test_member.id
+    assert members["NEW1"].membership_type == MembershipType.FAMILY
+    assert members["NEW1"].email is None
+    assert members["NEW2"].full_name == "New Two Renamed"
+
+
+def test_reimport_leaves_unchanged_members_alone(client, db, test_member):
+    assert _import(client, ROSTER).status_code == 200
+    db.expire_all()
+    versions = {m.pass_id: m.row_version for m in db.query(Member)}
+
+    body = _import(client, ROSTER).json()
+    assert (body["inserted"], body["updated"], body["unchanged"]) == (0, 0, 4)
+    db.expire_all()
+    assert {m.pass_id: m.row_version for m in db.query(Member)} == versions
+
+
+def test_import_refreshes_member_cache(client, db, test_member):
+    assert member_directory.lookup(db, test_member.pass_id).membership_type == MembershipType.FAMILY
+    _import(client, ROSTER)
+    assert member_directory.lookup(db, test_member.pass_id).membership_type == MembershipType.INDIVIDUAL
+
+
+def test_import_rejects_missing_columns(client):
+    res = _import(client, "pass_id,full_name\nA,B\n")
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Missing column(s): email, membership_type"
+
+
+def test_import_works_in_chunks(db):
+    lines = io.StringIO("pass_id,full_name,email,membership_type\n" + "".join(
+        f"P{i},Member {i},,Life\n" for i in range(25)
+    ) + "P3,Member 3 again,,Life\n")
+    with patch.object(roster, "ROSTER_IMPORT_CHUNK_SIZE", 10):
+        result = roster.import_roster(db, lines)
+
+    assert (result.inserted, result.updated, result.unchanged, result.rejected) == (25, 1, 0, 0)
+    assert db.query(Member).filter(Member.pass_id == "P3").one().full_name == "Member 3 again"
@@ -0,0 +1,91 @@
+from unittest.mock import patch
+from uuid import uuid4
+
+from app.models.models import Scan
+from app.services import passkit
+
+
+def _item(event, pass_id, **overrides):
+    item = {
+        "event_id": str(event.id),
+        "pass_id": pass_id,
+        "mode": "in",
+        "kind": "membership_pass",
+        "guests": 0,
+        "scanned_by": "tester",
+    }
+    item.update(overrides)
+    return item
+
+
+def test_batch_records_items_and_reports_per_item_errors(client, db, test_event, test_member):
+    items = [
+        _item(test_event, test_member.pass_id, member_id=str(test_member.id),
+              guest_details=[{"name": "Guest One"}]),
+        _item(test_event, test_member.pass_id, member_id=str(test_member.id)),  # repeated in batch
+        _item(test_event, "TICKET-1", kind="event_ticket"),
+        _item(test_event, "BADMODE", mode="out"),
+        {**_item(test_event, "NOEVENT"), "event_id": str(uuid4())},
+        _item(test_event, "NOMEMBER", member_id=str(uuid4())),
+        _item(test_event, "TOOMANY", member_id=str(test_member.id), guests=9),
+    ]
+
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})):
+        response = client.post("/api/v1/scan/batch", json={"items": items})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["index"] for r in results] == list(range(len(items)))
+    assert [r["status_code"] for r in results] == [200, 409, 200, 400, 404, 404, 400]
+    assert [r["error_code"] for r in results] == [
+        None, "duplicate", None, "invalid_mode", "event_not_found", "member_not_found", "guest_limit_exceeded",
+    ]
+
+    first = results[0]["scan"]
+    assert first["membership_type"] == "Family"
+    assert first["guests"] == 1
+    assert first["guest_details"][0]["name"] == "Guest One"
+    assert results[2]["scan"]["kind"] == "event_ticket"
+
+    assert db.query(Scan).filter(Scan.event_id == test_event.id).count() == 2
+
+
+def test_batch_rejects_passes_already_scanned(client, test_event, test_member):
+    payload = _item(test_event, test_member.pass_id, member_id=str(test_member.id))
+
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})):
+        assert client.post("/api/v1/scan", json=payload).status_code == 200
+        response = client.post("/api/v1/scan/batch", json={"items": [payload]})
+
+    assert response.json()["results"][0]["error_code"] == "duplicate"
+
+
+def test_batch_validates_each_distinct_pass_once(client, test_event):
+    items = [_item(test_event, f"PASS-{i}", kind="event_ticket") for i in range(3)]
+
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {})) as validate:
+        response = client.post("/api/v1/scan/batch", json={"items": items + items})
+
+    assert validate.await_count == 3
+    assert [r["status_code"] for r in response.json()["results"]] == [200] * 3 + [409] * 3
+
+
+def test_batch_passkit_failure_is_per_item(client, test_event):
+    async def flaky(pass_id, **kwargs):
+        if pass_id == "DOWN":
+            raise passkit.PasskitOutage("PassKit error: 502")
+        return True, None, {}
+
+    items = [_item(test_event, "UP", kind="event_ticket"), _item(test_event, "DOWN", kind="event_ticket")]
+    with patch.object(passkit, "validate_pass_async", side_effect=flaky):
+        response = client.post("/api/v1/scan/batch", json={"items": items})
+
+    results = response.json()["results"]
+    assert results[0]["status_code"] == 200
+    assert results[1]["status_code"] == 503
+    assert results[1]["error_code"] == "passkit_unavailable"
+
+
+def test_batch_size_is_bounded(client, test_event):
+    response = client.post("/api/v1/scan/batch", json={"items": []})
+    assert response.status_code == 422
@@ -0,0 +1,196 @@
+import asyncio
+import glob
+import json
+from contextlib import nullcontext
+from unittest.mock import patch
+
+import pytest
+
+import app.db as app_db
+import app.routers.scan as scan_router
+from app.models.models import EventAttendanceCounter, GuestDetail, Scan
+from app.services import metrics, passkit
+from app.services.scan_queue import ScanQueue
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "journal" / "scans.ndjson")
+
+
+@pytest.fixture
+def queue(db, journal_path):
+    """A write-behind queue wired into the scan router, writing through the test transaction."""
+    q = ScanQueue(journal_path, batch_size=2, flush_ms=10, fsync=False)
+    q.open()
+    with patch.object(scan_router, "scan_queue", q), \
+            patch.object(app_db, "SessionLocal", lambda: nullcontext(db)), \
+            patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})):
+        yield q
+
+
+def _scan(client, event, pass_id, guests=0, **extra):
+    return client.post("/api/v1/scan/", json={
+        "event_id": str(event.id),
+        "pass_id": pass_id,
+        "kind": "event_ticket",
+        "mode": "in",
+        "guests": guests,
+        **extra,
+    })
+
+
+def test_scan_is_acknowledged_before_it_is_written(client, db, test_event, queue):
+    res = _scan(client, test_event, "QUEUED1", guest_details=[{"name": "Guest"}])
+    assert res.status_code == 200, res.text
+    scan_id = res.json()["id"]
+    assert db.query(Scan).count() == 0
+    assert len(queue) == 1
+
+    # Duplicates are caught while the first scan is still queued
+    assert _scan(client, test_event, "QUEUED1").status_code == 409
+
+    assert asyncio.run(queue.flush()) == 1
+    scan = db.query(Scan).one()
+    assert str(scan.id) == scan_id
+    assert db.query(GuestDetail).one().scan_id == scan.id
+    counter = db.query(EventAttendanceCounter).filter_by(event_id=test_event.id, membership_type="Unknown").one()
+    assert (counter.members, counter.guests) == (1, 1)
+
+
+def test_flush_writes_in_group_commits(client, db, test_event, queue):
+    for i in range(5):
+        assert _scan(client, test_event, f"GROUP{i}").status_code == 200
+
+    with patch.object(db, "commit", wraps=db.commit) as commit:
+        assert asyncio.run(queue.flush()) == 5
+    assert commit.call_count == 3  # batches of 2, 2 and 1
+    assert db.query(Scan).count() == 5
+
+
+def test_full_queue_writes_through(client, db, test_event, queue):
+    queue.max_size = 1
+    assert _scan(client, test_event, "FIRST").status_code == 200
+    assert _scan(client, test_event, "SECOND").status_code == 200
+    assert [s.pass_id for s in db.query(Scan)] == ["SECOND"]
+
+
+def _segments(journal_path):
+    return sorted(p for p in glob.glob(journal_path + ".*") if not p.endswith((".lock", ".dead")))
+
+
+def test_journal_is_replayed_after_a_crash(client, db, test_event, queue, journal_path):
+    assert _scan(client, test_event, "CRASH1", guests=2).status_code == 200
+    assert _scan(client, test_event, "CRASH2").status_code == 200
+    # The process dies before flushing; a torn line was being written as it did
+    with open(_segments(journal_path)[-1], "a") as f:
+        f.write('{"row":{"id"')
+    queue._journal.close()
+
+    restarted = ScanQueue(journal_path, batch_size=10, fsync=False)
+    assert restarted.open() == 2
+    # ...and dies again after committing but before releasing the journal
+    with patch.object(restarted._journal, "release"):
+        assert asyncio.run(restarted.flush()) == 2
+    restarted._journal.close()
+    assert sorted(s.pass_id for s in db.query(Scan)) == ["CRASH1", "CRASH2"]
+
+    # Replaying scans that were already written changes nothing
+    third = ScanQueue(journal_path, fsync=False)
+    assert third.open() == 2
+    with patch.object(db, "scalars", wraps=db.scalars) as lookup:
+        assert asyncio.run(third.flush()) == 0  # nothing new was inserted
+    assert lookup.call_count == 1  # one lookup for the whole batch, not one per scan
+    assert db.query(Scan).count() == 2
+    counter = db.query(EventAttendanceCounter).filter_by(event_id=test_event.id, membership_type="Unknown").one()
+    assert (counter.members, counter.guests) == (2, 2)
+    assert sorted(glob.glob(journal_path + ".*")) == sorted([third._journal._file.name, third._journal._lock.name])
+    third._journal.close()
+    assert glob.glob(journal_path + ".*") == []
+
+
+def test_processes_sharing_a_journal_path_keep_their_own_segments(client, db, test_event, queue, journal_path):
+    # Two workers with the same SCAN_JOURNAL_PATH, as under uvicorn --workers
+    other = ScanQueue(journal_path, fsync=False)
+    assert other.open() == 0  # `queue` is alive: its segments aren't orphans
+    assert _scan(client, test_event, "WORKER-A").status_code == 200
+    with patch.object(scan_router, "scan_queue", other):
+        assert _scan(client, test_event, "WORKER-B").status_code == 200
+
+    # A flushes; B dies with its scan confirmed but not committed
+    assert asyncio.run(queue.flush()) == 1
+    other._journal.close()
+
+    restarted = ScanQueue(journal_path, fsync=False)
+    assert restarted.open() == 1
+    assert asyncio.run(restarted.flush()) == 1
+    assert sorted(s.pass_id for s in db.query(Scan)) == ["WORKER-A", "WORKER-B"]
+
+
+def test_failed_flush_keeps_scans_and_journal(client, db, test_event, queue, journal_path):
+    assert _scan(client, test_event, "RETRY").status_code == 200
+    with patch("app.services.scan_queue.write_scans", side_effect=RuntimeError("db down")):
+        with pytest.raises(RuntimeError):
+            asyncio.run(queue.flush())
+    assert len(queue) == 1
+    assert len(_segments(journal_path)) == 2
+
+    assert asyncio.run(queue.flush()) == 1
+    assert db.query(Scan).one().pass_id == "RETRY"
+    assert len(_segments(journal_path)) == 1
+
+
+def test_bad_row_is_dead_lettered_and_the_rest_written(client, db, test_event, queue, journal_path):
+    for pass_id in ("GOOD1", "BAD", "GOOD2"):
+        assert _scan(client, test_event, pass_id).status_code == 200
+    queue._pending[1].row["guests"] = None  # violates NOT NULL
+    dead_letters = metrics.SCAN_QUEUE_DEAD_LETTERS._value.get()
+
+    assert asyncio.run(queue.flush()) == 2
+    assert sorted(s.pass_id for s in db.query(Scan)) == ["GOOD1", "GOOD2"]
+    assert len(queue) == 0
+    assert len(_segments(journal_path)) == 1
+    assert metrics.SCAN_QUEUE_DEAD_LETTERS._value.get() == dead_letters + 1
+    with open(journal_path + ".dead") as f:
+        [line] = f.read().splitlines()
+    assert json.loads(line)["row"]["pass_id"] == "BAD"
+    assert "IntegrityError" in json.loads(line)["error"]
+
+
+def test_cancelled_flush_keeps_the_batch_queued(client, db, test_event, queue):
+    for pass_id in ("CANCEL1", "CANCEL2"):
+        assert _scan(client, test_event, pass_id).status_code == 200
+
+    async def hang(*args):
+        await asyncio.sleep(60)
+
+    async def flush_then_cancel():
+        flush = asyncio.create_task(queue.flush())
+        await asyncio.sleep(0.01)
+        flush.cancel()  # as stop() does to the worker
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+
+    with patch("app.services.scan_queue.run_in_new_session", hang):
+        asyncio.run(flush_then_cancel())
+    assert len(queue) == 2
+    assert asyncio.run(queue.flush()) == 2
+    assert db.query(Scan).count() == 2
+
+
+def test_journal_fsync_is_shared_and_outside_the_queue_lock(client, test_event, queue):
+    queue._journal.fsync = True
+
+    def fsync(fd):
+        assert not queue._lock.locked()
+
+    with patch("app.services.scan_queue.os.fsync", side_effect=fsync) as synced:
+        assert _scan(client, test_event, "SYNCED").status_code == 200
+        assert synced.call_count == 1
+
+        # Lines appended during an fsync are covered by the next one, whoever asks first
+        tickets = [queue._journal.append(queue._pending[0]) for _ in range(3)]
+        queue._journal.sync(tickets[-1])
+        for ticket in tickets:
+            queue._journal.sync(ticket)
+        assert synced.call_count == 2
@@ -16,7 +16,7 @@ def test_scan_with_unknown_event(client, test_member):
         "scanned_by": "tester",
     }
 
-    with patch.object(passkit, "validate_pass", return_value=(True, None, {})):
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {})):
         response = client.post("/api/v1/scan", json=payload)
 
     assert response.status_code == 404
@@ -35,7 +35,7 @@ def test_scan_with_unknown_member(client, test_event):
         "scanned_by": "tester",
     }
 
-    with patch.object(passkit, "validate_pass", return_value=(True, None, {})):
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {})):
         response = client.post("/api/v1/scan", json=payload)
 
     assert response.status_code == 404
@@ -2,6 +2,7 @@
 from unittest.mock import patch
 from app.services import passkit
 import uuid
+from datetime import datetime
 
 def test_valid_scan(client, test_event, test_member):
     payload = {
@@ -15,7 +16,7 @@ def test_valid_scan(client, test_event, test_member):
         "scanned_by": "tester"
     }
 
-    with patch.object(passkit, "validate_pass", return_value=(True, None, {"status": "ACTIVE"})):
+    with patch.object(passkit, "validate_pass_async", return_value=(True, None, {"status": "ACTIVE"})):
         response = client.post("/api/v1/scan", json=payload)
 
     assert response.status_code == 200
@@ -26,3 +27,5 @@ def test_valid_scan(client, test_event, test_member):
     assert body["membership_type"] == "Family"
     assert body["member_name"] == test_member.full_name
     assert body["guest_details"] == []
+    # Same naive-UTC format the column reads back as: no offset or "Z" suffix
+    assert datetime.fromisoformat(body["scanned_at"]).tzinfo is None